@@ -1,12 +1,41 @@
 # AIST 2025 design library
 # created on: 2026/01/13
-# last change: 2026/01/30
+# last change: 2026/10/18
 
+import os
 import gdstk
 import numpy as np
+import lib_v8_CACHE as lib_CACHE
+import lib_v8_PORT as lib_PORT
+import lib_v8_TIN as lib_TIN
 
-AIST_PDK = gdstk.read_rawcells("../PDK_Device_Cells_20251112.gds")
+# PDK cells are read on first use, not at import
+PDK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "PDK_Device_Cells_20251112.gds")
+PDK_PREFIX = "AIST_" # all cells of the PDK file are named AIST_*
+
+class LazyPDK:
+	def __init__(self, filename):
+		self.filename = filename
+		self.rawcells = None # all raw cells of the PDK file (unparsed, read once)
+		self.cells = {}      # requested cells
+
+	def load(self):
+		if self.rawcells is None:
+			self.rawcells = gdstk.read_rawcells(self.filename)
+		return self.rawcells
+
+	def __getitem__(self, cell_name):
+		if cell_name not in self.cells:
+			self.cells[cell_name] = self.load()[cell_name]
+		return self.cells[cell_name]
+
+	def __contains__(self, cell_name):
+		# other names are answered without reading the file (ex. cells of reloaded fragments)
+		return cell_name.startswith(PDK_PREFIX) and cell_name in self.load()
+
+AIST_PDK = LazyPDK(PDK_PATH)
 LIB = gdstk.Library()
+lib_CACHE.RESOLVERS.append(lambda cell_name: AIST_PDK[cell_name] if cell_name in AIST_PDK else None)
 
 # design rule
 LAYER_SiWG   = 30
@@ -47,6 +76,38 @@ RF_PAD_taper_end = 30.5
 
 PIN_distance = 2*RF_PAD_PITCH - GAP_width - SIG_width
 
+#-------------------- PDK ports --------------------#
+# PDK cells without rotation: MMI inputs at the bottom (going -y), outputs at the top (going +y)
+lib_PORT.set_ports("AIST_MMI_2x2",
+	lib_PORT.Port("in0",  [-0.55,  0.0],   -np.pi/2, wg_width, LAYER_SiWG),
+	lib_PORT.Port("in1",  [+0.55,  0.0],   -np.pi/2, wg_width, LAYER_SiWG),
+	lib_PORT.Port("out0", [-0.55, 41.016], +np.pi/2, wg_width, LAYER_SiWG),
+	lib_PORT.Port("out1", [+0.55, 41.016], +np.pi/2, wg_width, LAYER_SiWG),
+)
+lib_PORT.set_ports("AIST_MMI_1x2",
+	lib_PORT.Port("in0",  [ 0.0,   0.0],   -np.pi/2, wg_width, LAYER_SiWG),
+	lib_PORT.Port("out0", [-0.55, 15.704], +np.pi/2, wg_width, LAYER_SiWG),
+	lib_PORT.Port("out1", [+0.55, 15.704], +np.pi/2, wg_width, LAYER_SiWG),
+)
+lib_PORT.set_ports("AIST_GC",
+	lib_PORT.Port("opt",  [217, 0], 0, wg_width, LAYER_SiWG),
+)
+MMI2x2_BOTLEFT_CENTER  = lib_PORT.PORTS["AIST_MMI_2x2"]["in0"].point
+MMI2x2_BOTRIGHT_CENTER = lib_PORT.PORTS["AIST_MMI_2x2"]["in1"].point
+MMI2x2_TOPLEFT_CENTER  = lib_PORT.PORTS["AIST_MMI_2x2"]["out0"].point
+MMI2x2_TOPRIGHT_CENTER = lib_PORT.PORTS["AIST_MMI_2x2"]["out1"].point
+MMI1x2_BOT_CENTER      = lib_PORT.PORTS["AIST_MMI_1x2"]["in0"].point
+MMI1x2_TOPLEFT_CENTER  = lib_PORT.PORTS["AIST_MMI_1x2"]["out0"].point
+MMI1x2_TOPRIGHT_CENTER = lib_PORT.PORTS["AIST_MMI_1x2"]["out1"].point
+
+def set_MZM_ports(ret_cell):
+	# MZM ports = outer ports of the first (input) and the last (output) 2x2 MMI of the cell
+	MMI_refs = [ref for ref in ret_cell.references if lib_PORT.cell_name(ref.cell) == "AIST_MMI_2x2"]
+	MMI_in, MMI_out = lib_PORT.ports(MMI_refs[0]), lib_PORT.ports(MMI_refs[-1])
+	return lib_PORT.set_ports(ret_cell,
+		MMI_in["in0"], MMI_in["in1"], MMI_out["out0"], MMI_out["out1"],
+	)
+
 def get_cell_size(cell):
 	min_xy, max_xy = cell.bounding_box()
 	width = max_xy[0] - min_xy[0]
@@ -62,6 +123,7 @@ def horizontal(origin, length, layer, ret_cell):
 		origin[1],
 	]
 	ret_cell.add(path)
+	lib_PORT.add_waveguide(ret_cell, [origin, origin_next], wg_width, layer)
 	return origin_next
 
 def vertical(origin, length, layer, ret_cell):
@@ -73,111 +135,171 @@ def vertical(origin, length, layer, ret_cell):
 		origin[1] + length,
 	]
 	ret_cell.add(path)
+	lib_PORT.add_waveguide(ret_cell, [origin, origin_next], wg_width, layer)
 	return origin_next
 
-def arc_RU(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = -np.pi / 2, 0
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.horizontal(dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.vertical(dr, relative=True)
+#-------------------- Route builder --------------------#
+# one continuous FlexPath per waveguide instead of one FlexPath per segment
+# ex) o = Route(o, layer).h(10).ru().v(50).commit(ret_cell)
+
+# bend name: (first straight, theta_start, theta_end, x direction, y direction)
+ARC_TABLE = {
+	"RU": ("h", -np.pi / 2, 0,          +1, +1),
+	"RD": ("h",  np.pi / 2, 0,          +1, -1),
+	"LU": ("h", -np.pi / 2, -np.pi,     -1, +1),
+	"LD": ("h",  np.pi / 2,  np.pi,     -1, -1),
+	"UR": ("v",  np.pi,      np.pi / 2, +1, +1),
+	"DR": ("v", -np.pi,     -np.pi / 2, +1, -1),
+	"UL": ("v",  0,          np.pi / 2, -1, +1),
+	"DL": ("v",  0,         -np.pi / 2, -1, -1),
+}
+
+class Route:
+	def __init__(self, origin, layer, width=wg_width):
+		self.o = [origin[0], origin[1]] # current end point of the waveguide
+		self.layer = layer
+		self.width = width
+		self.path = gdstk.FlexPath(self.o, width, layer=layer, datatype=0, tolerance=1e-3)
+		self.segments = 0
+		# tally, registered with the cell on commit (see lib_v8_PORT.RouteInfo)
+		self.start = [origin[0], origin[1]]
+		self.start_angle = None # direction of the waveguide at the start point
+		self.angle = None       # direction of the waveguide at the end point
+		self.straight = 0       # straight length (um), straight parts of the bends included
+		self.arcs = {}          # radius -> number of 90 degree arcs
+		self.points = [self.start.copy()] # Manhattan skeleton (bends as corners), for crossings
+
+	def turn(self, side_in, side_out):
+		if self.start_angle is None:
+			self.start_angle = lib_PORT.SIDES[side_in]
+		self.angle = lib_PORT.SIDES[side_out]
+
+	@classmethod
+	def from_port(cls, port, layer=None):
+		# start at a port (see lib_v8_PORT), with the width and layer of the port
+		return cls(port.point, port.layer if layer is None else layer, width=port.width)
+
+	def h(self, length):
+		assert np.abs(length) >= 1e-3, f"Route.h(): {length=}" # to avoid empty path
+		self.path.horizontal(length, relative=True)
+		self.o = [self.o[0] + length, self.o[1]]
+		self.segments += 1
+		side = "R" if length > 0 else "L"
+		self.turn(side, side)
+		self.straight += np.abs(length)
+		return self
+
+	def v(self, length):
+		assert np.abs(length) >= 1e-3, f"Route.v(): {length=}" # to avoid empty path
+		self.path.vertical(length, relative=True)
+		self.o = [self.o[0], self.o[1] + length]
+		self.segments += 1
+		side = "U" if length > 0 else "D"
+		self.turn(side, side)
+		self.straight += np.abs(length)
+		return self
+
+	def arc(self, name, radius=radius):
+		first, theta_start, theta_end, sx, sy = ARC_TABLE[name]
+		if first == "h":
+			self.path.horizontal(sx * dr, relative=True)
+			self.path.arc(radius, theta_start, theta_end)
+			self.path.vertical(sy * dr, relative=True)
+			self.points.append([self.o[0] + sx * (radius + dr), self.o[1]])
+		else:
+			self.path.vertical(sy * dr, relative=True)
+			self.path.arc(radius, theta_start, theta_end)
+			self.path.horizontal(sx * dr, relative=True)
+			self.points.append([self.o[0], self.o[1] + sy * (radius + dr)])
+		self.o = [
+			self.o[0] + sx * (radius + dr),
+			self.o[1] + sy * (radius + dr),
+		]
+		self.segments += 3
+		self.turn(name[0], name[1])
+		self.straight += 2*dr
+		self.arcs[radius] = self.arcs.get(radius, 0) + 1
+		return self
+
+	def ru(self, radius=radius): return self.arc("RU", radius)
+	def rd(self, radius=radius): return self.arc("RD", radius)
+	def lu(self, radius=radius): return self.arc("LU", radius)
+	def ld(self, radius=radius): return self.arc("LD", radius)
+	def ur(self, radius=radius): return self.arc("UR", radius)
+	def dr(self, radius=radius): return self.arc("DR", radius)
+	def ul(self, radius=radius): return self.arc("UL", radius)
+	def dl(self, radius=radius): return self.arc("DL", radius)
+
+	def info(self):
+		return lib_PORT.RouteInfo(
+			lib_PORT.Port("start", self.start, self.start_angle + np.pi, self.width, self.layer),
+			lib_PORT.Port("end", self.o, self.angle, self.width, self.layer),
+			self.straight, self.arcs, self.points + [self.o],
+		)
+
+	def commit(self, ret_cell):
+		if self.segments > 0:
+			ret_cell.add(self.path)
+			lib_PORT.add_route(ret_cell, self.info())
+		return self.o.copy()
+
+#-------------------- Bend cells --------------------#
+# identical bends are drawn once and placed as gdstk.Reference
+BEND_CELLS = {}       # (radius, bend name, layer, width) -> cell
+FLATTEN_BENDS = False # True: add the bend as FlexPath to ret_cell (no reference)
+lib_CACHE.IGNORED_NAMES.add("BEND_CELLS")
+
+def new_bend_cell(name, layer, radius=radius, width=wg_width):
+	key = (radius, name, layer, width)
+	if key not in BEND_CELLS:
+		cell_name = f"BEND_{name}_R{radius:g}_W{width:g}_L{layer}"
+		ret_cell = lib_CACHE.CELLS.get(cell_name) # already loaded from a cached cell
+		if ret_cell is None:
+			ret_cell = gdstk.Cell(cell_name)
+			Route((0, 0), layer, width=width).arc(name, radius).commit(ret_cell)
+			lib_CACHE.register(ret_cell)
+			_, _, _, sx, sy = ARC_TABLE[name]
+			lib_PORT.set_ports(ret_cell,
+				lib_PORT.Port("in", (0, 0), lib_PORT.SIDES[name[0]] + np.pi, width, layer),
+				lib_PORT.Port("out", (sx * (radius + dr), sy * (radius + dr)), lib_PORT.SIDES[name[1]], width, layer),
+			)
+		BEND_CELLS[key] = ret_cell
+	return BEND_CELLS[key]
+
+def arc_bend(name, origin, layer, ret_cell, radius=radius):
+	if FLATTEN_BENDS:
+		return Route(origin, layer).arc(name, radius).commit(ret_cell)
+	ret_cell.add(gdstk.Reference(new_bend_cell(name, layer, radius=radius), origin=origin))
+	_, _, _, sx, sy = ARC_TABLE[name]
 	origin_next = [
-		origin[0] + radius + dr,
-		origin[1] + radius + dr,
+		origin[0] + sx * (radius + dr),
+		origin[1] + sy * (radius + dr),
 	]
-	ret_cell.add(path)
 	return origin_next
 
+def arc_RU(origin, layer, ret_cell, radius=radius):
+	return arc_bend("RU", origin, layer, ret_cell, radius=radius)
+
 def arc_RD(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = np.pi / 2, 0
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.horizontal(dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.vertical(-dr, relative=True)
-	origin_next = [
-		origin[0] + radius + dr,
-		origin[1] - radius - dr,
-	]
-	ret_cell.add(path)
-	return origin_next
+	return arc_bend("RD", origin, layer, ret_cell, radius=radius)
 
 def arc_LU(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = -np.pi / 2, -np.pi
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.horizontal(-dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.vertical(dr, relative=True)
-	origin_next = [
-		origin[0] - radius - dr,
-		origin[1] + radius + dr,
-	]
-	ret_cell.add(path)
-	return origin_next
+	return arc_bend("LU", origin, layer, ret_cell, radius=radius)
 
 def arc_LD(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = np.pi / 2, np.pi
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.horizontal(-dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.vertical(-dr, relative=True)
-	origin_next = [
-		origin[0] - radius - dr,
-		origin[1] - radius - dr,
-	]
-	ret_cell.add(path)
-	return origin_next
+	return arc_bend("LD", origin, layer, ret_cell, radius=radius)
 
 def arc_UR(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = np.pi, np.pi / 2
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.vertical(dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.horizontal(dr, relative=True)
-	origin_next = [
-		origin[0] + radius + dr,
-		origin[1] + radius + dr,
-	]
-	ret_cell.add(path)
-	return origin_next
+	return arc_bend("UR", origin, layer, ret_cell, radius=radius)
 
 def arc_DR(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = -np.pi, -np.pi / 2
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.vertical(-dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.horizontal(dr, relative=True)
-	origin_next = [
-		origin[0] + radius + dr,
-		origin[1] - radius - dr,
-	]
-	ret_cell.add(path)
-	return origin_next
+	return arc_bend("DR", origin, layer, ret_cell, radius=radius)
 
 def arc_UL(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = 0, np.pi / 2
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.vertical(dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.horizontal(-dr, relative=True)
-	origin_next = [
-		origin[0] - radius - dr,
-		origin[1] + radius + dr,
-	]
-	ret_cell.add(path)
-	return origin_next
+	return arc_bend("UL", origin, layer, ret_cell, radius=radius)
 
 def arc_DL(origin, layer, ret_cell, radius=radius):
-	theta_start, theta_end = 0, -np.pi / 2
-	path = gdstk.FlexPath(origin, wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.vertical(-dr, relative=True)
-	path.arc(radius, theta_start, theta_end)
-	path.horizontal(-dr, relative=True)
-	origin_next = [
-		origin[0] - radius - dr,
-		origin[1] - radius - dr,
-	]
-	ret_cell.add(path)
-	return origin_next
+	return arc_bend("DL", origin, layer, ret_cell, radius=radius)
 
 def new_ssc_cell(layer, cell_name, position='left'):
 	length = ssc_length # um
@@ -199,6 +321,10 @@ def new_ssc_cell(layer, cell_name, position='left'):
 		ret_cell.add(rect)
 		rect = gdstk.rectangle(( dicing_length, -10), (dicing_length+length, 10), layer=LAYER_SSC, datatype=0)
 		ret_cell.add(rect)
+		lib_PORT.set_ports(ret_cell,
+			lib_PORT.Port("facet", (-dicing_length, 0), np.pi, width_small, layer),
+			lib_PORT.Port("wg", (dicing_length+length, 0), 0, width_large, layer),
+		)
 	else:
 		path = gdstk.FlexPath((-length-dicing_length, 0), width_large, layer=layer, datatype=0, tolerance=1e-3)
 		path.horizontal(length, width=width_small, relative=True)
@@ -214,59 +340,68 @@ def new_ssc_cell(layer, cell_name, position='left'):
 		ret_cell.add(rect)
 		rect = gdstk.rectangle((-dicing_length, -10), (dicing_length, 10), layer=LAYER_SSC, datatype=0)
 		ret_cell.add(rect)
+		lib_PORT.set_ports(ret_cell,
+			lib_PORT.Port("facet", (dicing_length, 0), 0, width_small, layer),
+			lib_PORT.Port("wg", (-length-dicing_length, 0), np.pi, width_large, layer),
+		)
 	return ret_cell
 
 def new_loopback_cell(straight_length, layer, cell_name):
 	ret_cell = gdstk.Cell(cell_name)
-	o = (0, 0)
-	o = horizontal(o, straight_length, layer, ret_cell)
-	o = arc_RU(o, layer, ret_cell)
-	o = vertical(o, ssc_pitch-2*(radius+dr), layer, ret_cell)
-	o = arc_UL(o, layer, ret_cell)
-	o = horizontal(o, -straight_length, layer, ret_cell)
+	Route((0, 0), layer).h(straight_length).ru().v(ssc_pitch-2*(radius+dr)).ul().h(-straight_length).commit(ret_cell)
+	lib_PORT.set_ports(ret_cell,
+		lib_PORT.Port("in", (0, 0), np.pi, wg_width, layer),
+		lib_PORT.Port("out", (0, ssc_pitch), np.pi, wg_width, layer),
+	)
 	return ret_cell
 
-def new_GC_cell(grating_num, grating_pitch, angle_deg, taper_length, cell_name):
-	ret_cell = gdstk.Cell(cell_name)
-	# Si taper
-	layer = LAYER_SiWG
-	# constants
-	grating_duty = 0.5
+def arc_points_num(angle, radius, tolerance=1e-3):
+	# number of points so that the chord error stays below tolerance (as gdstk does for arcs)
+	step = 2 * np.arccos(np.clip(1 - tolerance / np.asarray(radius, dtype=float), -1, 1))
+	return max(int(np.ceil(np.max(np.abs(angle) / step))) + 1, 4)
+
+def GC_rib_polygons(radius_inner, rib_width, angle_rad, layer):
+	# all rib rings as annular sectors, computed at once (rings on rows, arc points on columns)
+	radius_inner = np.asarray(radius_inner, dtype=float)[:, None]
+	radius_outer = radius_inner + np.asarray(rib_width, dtype=float)[:, None]
+	angle_rad = np.asarray(angle_rad, dtype=float)[..., None] # a number, or one angle per ring
+	half_angle = angle_rad/2 + 1.5/((radius_inner + radius_outer) / 2) # ribs extend 1.5 um beyond the taper edges
+	n = arc_points_num(2*half_angle, radius_outer)
+	arc = np.exp(1j * half_angle * np.linspace(1, -1, n)) # points as complex numbers
+	points = np.concatenate((radius_outer * arc, (radius_inner * arc)[:, ::-1]), axis=1)
+	return [gdstk.Polygon(p, layer=layer, datatype=0) for p in points]
+
+def GC_dimensions(grating_num, grating_pitch, angle_deg, taper_length, grating_duty=0.5):
+	# grating_pitch, grating_duty: a number, or one value per rib (apodized / chirped grating)
+	grating_pitch = np.asarray(grating_pitch, dtype=float) * np.ones(grating_num)
+	grating_duty = np.asarray(grating_duty, dtype=float) * np.ones(grating_num)
 	angle_rad = angle_deg / 180 * np.pi
 	taper_start = wg_width/2 / np.tan(angle_rad/2)
-	taper_end = 0.55 - grating_pitch*(1-grating_duty) # design rule, end slab width should be >0.5 um
-	radius = taper_start + taper_length + grating_pitch * grating_num + taper_end
-	# curve
-	curve = gdstk.Curve((0,0), tolerance=1e-3)
-	curve.segment((radius,0), True)
-	curve.arc(radius, 0, angle_rad, 0)
-	polygon = gdstk.Polygon(curve.points())
-	polygon.rotate(-angle_rad/2)
-	polygon.translate((-taper_start, 0))
-	# region to remove
-	path = gdstk.FlexPath((-taper_start, 0), wg_width, layer=layer, datatype=0, tolerance=1e-3)
-	path.horizontal(taper_start, relative=True)
+	taper_end = 0.55 - grating_pitch[-1]*(1-grating_duty[-1]) # design rule, end slab width should be >0.5 um
+	radius = taper_start + taper_length + np.sum(grating_pitch) + taper_end
+	rib_width = grating_pitch * grating_duty
+	radius_inner = taper_length + np.cumsum(grating_pitch) - grating_pitch
+	return angle_rad, taper_start, radius, radius_inner, rib_width
+
+def GC_taper_polygon(angle_rad, taper_start, radius, layer):
+	# sector from the taper apex (-taper_start, 0), cut where it reaches the waveguide width (x = 0)
+	arc = radius * np.exp(1j * np.linspace(-angle_rad/2, angle_rad/2, arc_points_num(angle_rad, radius))) - taper_start
+	return gdstk.Polygon(np.concatenate(([-0.5j*wg_width], arc, [0.5j*wg_width])), layer=layer, datatype=0)
+
+GC_NODMY_size = 30
+
+@lib_CACHE.cached_cell
+def new_GC_cell(grating_num, grating_pitch, angle_deg, taper_length, cell_name, grating_duty=0.5):
+	ret_cell = gdstk.Cell(cell_name)
+	angle_rad, taper_start, radius, radius_inner, rib_width = GC_dimensions(grating_num, grating_pitch, angle_deg, taper_length, grating_duty)
 	# Si taper
-	si_taper = gdstk.boolean(polygon, path, "not", precision=1e-3, layer=layer, datatype=0)
-	ret_cell.add(*si_taper)
+	ret_cell.add(GC_taper_polygon(angle_rad, taper_start, radius, LAYER_SiWG))
 	# Rib arcs
-	layer = LAYER_RIB
-	# angle_rad = (angle_deg+10) / 180 * np.pi
-	radius = taper_length
-	rib_width = grating_pitch * grating_duty
-	for i in range(grating_num):
-		r = radius + rib_width / 2
-		angle_rad_start = angle_rad/2 + 1.5/r
-		angle_rad_end = -(angle_rad/2 + 1.5/r)
-		start_point = [r*np.cos(angle_rad_start), r*np.sin(angle_rad_start)]
-		path = gdstk.FlexPath(start_point, rib_width, layer=layer, datatype=0, tolerance=1e-3)
-		path.arc(r, angle_rad_start, angle_rad_end)
-		ret_cell.add(path)
-		radius += grating_pitch
+	ret_cell.add(*GC_rib_polygons(radius_inner, rib_width, angle_rad, LAYER_RIB))
 	# NODMY
-	NODMY_size = 30
-	no_dummy = gdstk.rectangle((0, -NODMY_size/2), (NODMY_size, NODMY_size/2), layer=LAYER_NODMY, datatype=0)
+	no_dummy = gdstk.rectangle((0, -GC_NODMY_size/2), (GC_NODMY_size, GC_NODMY_size/2), layer=LAYER_NODMY, datatype=0)
 	ret_cell.add(no_dummy)
+	lib_PORT.set_ports(ret_cell, lib_PORT.Port("opt", (0, 0), np.pi, wg_width, LAYER_SiWG))
 	return ret_cell
 
 def new_RF_PAD_cell():
@@ -297,7 +432,7 @@ def new_RF_PAD_cell():
 			MET_MIDDLE_corner_topright[0] - 5,
 			MET_MIDDLE_corner_topright[1] - 5,
 		]
-		assert RF_PAD_PITCH - (PW_MIDDLE_corner_topright[0]-PW_MIDDLE_corner_botleft[0]) > 4 # design rule
+		# design rule: PW spacing and enclosure in lib_v8_DRC.DRC_RULES
 		pad_window = gdstk.rectangle(PW_MIDDLE_corner_botleft, PW_MIDDLE_corner_topright, layer=layer, datatype=0)
 		ret_cell.add(pad_window)
 	# taper
@@ -368,11 +503,19 @@ def new_RF_PAD_cell():
 		taper_right_SIG_topleft, taper_right_SIG_topright,
 		taper_right_GND_topleft, taper_right_GND_topright,
 	]
+	# electrical ports at the top of the tapers (GSGSG)
+	lib_PORT.set_ports(ret_cell, *[
+		lib_PORT.Port(name, ((left[0] + right[0])/2, left[1]), np.pi/2, right[0] - left[0], LAYER_MET)
+		for name, left, right in zip(["GND_L", "SIG_L", "GND_M", "SIG_R", "GND_R"], ret_points[0::2], ret_points[1::2])
+	])
 	return ret_cell, ret_points
 RF_PAD_cell, RF_PAD_cell_points = new_RF_PAD_cell()
+lib_CACHE.register(RF_PAD_cell)
 
 # contact_width=12, contact_length=12 => contact resistance = 8e-6Ωcm^2 / 12e-4 / 12e-4 = 5.56Ω/contact
 # TIN_width=36, TIN_length=24 => 18Ω based on sheet resistance = 27 Ω/sq + contact 5.56*2=11.1Ω => 29.1Ω
+# (lib_v8_TIN.resistance; new_TIN_SERIES_TERM_cell_for chooses the sizes for a target resistance)
+@lib_CACHE.cached_cell
 def new_TIN_SERIES_TERM_cell(cell_name, TIN_width=36, TIN_length=24, contact_width=12, contact_length=12):
 	# top pads
 	ret_cell = gdstk.Cell(cell_name)
@@ -424,8 +567,20 @@ def new_TIN_SERIES_TERM_cell(cell_name, TIN_width=36, TIN_length=24, contact_wid
 	)
 	ret_size = [TIN_width, TIN_length + contact_length + 2*gap]
 	return ret_cell, ret_size
-TIN_SERIES_TERM_30Ohm, TIN_SERIES_TERM_30Ohm_size = new_TIN_SERIES_TERM_cell("TIN_SERIES_TERM_30Ohm")
 
+def __getattr__(name):
+	# TIN_SERIES_TERM_30Ohm(_size) are built on first use, importing lib_v8 builds (and caches) no cell
+	if name in ("TIN_SERIES_TERM_30Ohm", "TIN_SERIES_TERM_30Ohm_size"):
+		cell, size = new_TIN_SERIES_TERM_cell("TIN_SERIES_TERM_30Ohm")
+		globals().update(TIN_SERIES_TERM_30Ohm=cell, TIN_SERIES_TERM_30Ohm_size=size)
+		return globals()[name]
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def new_TIN_SERIES_TERM_cell_for(cell_name, resistance):
+	# resistance [Ω] -> sizes by lib_v8_TIN.size_for, passed explicitly so that they are part of the cache key
+	return new_TIN_SERIES_TERM_cell(cell_name, **lib_TIN.size_for(resistance))
+
+@lib_CACHE.cached_cell
 def new_CPW_TERM_cell(CPW_length, thermal_isolation_length, cell_name, with_end_pad=False):
 	ret_cell = gdstk.Cell(cell_name)
 	# RF pad
@@ -569,10 +724,6 @@ def new_PIN_AMZM_cell(PIN_length, cell_name):
 	MZM_BOTLEFT_CENTER = [0.0, +0.55]
 	MZM_BOTRIGHT_CENTER = [0.0, -0.55]
 	# constants
-	MMI2x2_BOTLEFT_CENTER  = [-0.55, 0.0]
-	MMI2x2_BOTRIGHT_CENTER = [+0.55, 0.0]
-	MMI2x2_TOPLEFT_CENTER  = [-0.55, 41.016]
-	MMI2x2_TOPRIGHT_CENTER = [+0.55, 41.016]
 	AMZM_total_delay_length = 100 # um, total optical path difference
 	AMZM_delayloop_length = AMZM_total_delay_length # delay on one side, total delay is doubled to match AMZM_total_delay_length
 	assert AMZM_delayloop_length > 0
@@ -660,7 +811,7 @@ def new_PIN_AMZM_cell(PIN_length, cell_name):
 		MET_MIDDLE_corner_topright[0] - 5,
 		MET_MIDDLE_corner_topright[1] - 5,
 	]
-	assert RF_PAD_PITCH - (PW_MIDDLE_corner_topright[0]-PW_MIDDLE_corner_botleft[0]) > 4 # design rule
+	# design rule: PW spacing and enclosure in lib_v8_DRC.DRC_RULES
 	pad_window = gdstk.rectangle(PW_MIDDLE_corner_botleft, PW_MIDDLE_corner_topright, layer=layer, datatype=0)
 	### create pad cell
 	pad_cell = gdstk.Cell(cell_name+"_PIN_PAD")
@@ -673,6 +824,7 @@ def new_PIN_AMZM_cell(PIN_length, cell_name):
 	label_cell = new_label_cell(f"{PIN_length:.0f}", cell_name+"_label", layer=LAYER_MET)
 	w, h = get_cell_size(label_cell)
 	ret_cell.add(gdstk.Reference(label_cell, origin=(-250-h/2, 175+PIN_length/2-w/2), rotation=-np.pi/2))
+	set_MZM_ports(ret_cell)
 	return ret_cell, ret_o
 
 def new_PIN_AMZM_CPW_cell(PIN_length, cell_name, with_TERM=False, with_end_pad=False):
@@ -680,10 +832,6 @@ def new_PIN_AMZM_CPW_cell(PIN_length, cell_name, with_TERM=False, with_end_pad=F
 	MZM_BOTLEFT_CENTER = [0.0, +0.55]
 	MZM_BOTRIGHT_CENTER = [0.0, -0.55]
 	# constants
-	MMI2x2_BOTLEFT_CENTER  = [-0.55, 0.0]
-	MMI2x2_BOTRIGHT_CENTER = [+0.55, 0.0]
-	MMI2x2_TOPLEFT_CENTER  = [-0.55, 41.016]
-	MMI2x2_TOPRIGHT_CENTER = [+0.55, 41.016]
 	AMZM_total_delay_length = 100 # um, total optical path difference
 	AMZM_delayloop_length = AMZM_total_delay_length # delay on one side, total delay is doubled to match AMZM_total_delay_length
 	assert AMZM_delayloop_length > 0
@@ -770,6 +918,7 @@ def new_PIN_AMZM_CPW_cell(PIN_length, cell_name, with_TERM=False, with_end_pad=F
 	# label_cell = new_label_cell(f"{PIN_length:.0f}", cell_name+"_label", layer=LAYER_MET)
 	# w, h = get_cell_size(label_cell)
 	# ret_cell.add(gdstk.Reference(label_cell, origin=(420-h/2, 40+PIN_length/2-w/2), rotation=np.pi/2))
+	set_MZM_ports(ret_cell)
 	return ret_cell, ret_o
 
 def new_PIN_AMZM_CPW_TERM_cell(PIN_length, cell_name, with_TERM=True, with_end_pad=False):
@@ -779,10 +928,6 @@ def new_PIN_AMZM_CPW_TERM_cell(PIN_length, cell_name, with_TERM=True, with_end_p
 	MZM_BOTLEFT_CENTER = [0.0, +0.55]
 	MZM_BOTRIGHT_CENTER = [0.0, -0.55]
 	# constants
-	MMI2x2_BOTLEFT_CENTER  = [-0.55, 0.0]
-	MMI2x2_BOTRIGHT_CENTER = [+0.55, 0.0]
-	MMI2x2_TOPLEFT_CENTER  = [-0.55, 41.016]
-	MMI2x2_TOPRIGHT_CENTER = [+0.55, 41.016]
 	AMZM_total_delay_length = 100 # um, total optical path difference
 	AMZM_delayloop_length = AMZM_total_delay_length # delay on one side
 	AMZM_refloop_length = PIN_distance + np.abs(MMI2x2_BOTRIGHT_CENTER[0]-MMI2x2_BOTLEFT_CENTER[0]) # compensate additional delay of the other side
@@ -883,6 +1028,7 @@ def new_PIN_AMZM_CPW_TERM_cell(PIN_length, cell_name, with_TERM=True, with_end_p
 	# label_cell = new_label_cell(f"{PIN_length:.0f}", cell_name+"_label", layer=LAYER_MET)
 	# w, h = get_cell_size(label_cell)
 	# ret_cell.add(gdstk.Reference(label_cell, origin=(420-h/2, 40+PIN_length/2-w/2), rotation=np.pi/2))
+	set_MZM_ports(ret_cell)
 	return ret_cell, ret_o
 
 def new_PIN_GC_cell(PIN_length, cell_name, with_TERM=False, with_end_pad=False):
@@ -905,10 +1051,6 @@ def new_PIN_GC_cell(PIN_length, cell_name, with_TERM=False, with_end_pad=False):
 	PIN_right_o = PIN_origin.copy()
 	## dummy waveguides
 	layer = LAYER_SiWG
-	MMI2x2_BOTLEFT_CENTER  = [-0.55, 0.0]
-	MMI2x2_BOTRIGHT_CENTER = [+0.55, 0.0]
-	MMI2x2_TOPLEFT_CENTER  = [-0.55, 41.016]
-	MMI2x2_TOPRIGHT_CENTER = [+0.55, 41.016]
 	GC_length = 217
 	Uturn_length = 10 # arbitrary value
 	## bot left
@@ -1064,6 +1206,7 @@ def new_PIN_GC_cell(PIN_length, cell_name, with_TERM=False, with_end_pad=False):
 	# # ret_cell.add(gdstk.Reference(label_cell, origin=(560-h/2, 40+PIN_length/2-w/2), rotation=np.pi/2))
 	# return ret_cell, ret_o
 
+@lib_CACHE.cached_cell
 def PIN_structure(PIN_length, start_point, cell_name):
 	# LAYER_SiWG   = 30
 	# LAYER_RIB    = 40
@@ -1211,6 +1354,10 @@ def PIN_structure(PIN_length, start_point, cell_name):
 	assert np.abs(CT2PN_RIGHT_corner_botleft[1] - CT2PN_RIGHT_corner_topright[1]) == PIN_length - 2
 	CT2PN_RIGHT_rectangle = gdstk.rectangle(CT2PN_RIGHT_corner_botleft, CT2PN_RIGHT_corner_topright, layer=layer, datatype=0)
 	ret_cell.add(CT2PN_RIGHT_rectangle)
+	lib_PORT.set_ports(ret_cell,
+		lib_PORT.Port("in", start_point, -np.pi/2, wg_width, LAYER_SiWG),
+		lib_PORT.Port("out", ret_o, np.pi/2, wg_width, LAYER_SiWG),
+	)
 	return ret_cell, ret_o
 
 # coplanar waveguide for RF probe calibration
@@ -1259,21 +1406,45 @@ def new_CPW_cell(length, cell_name, with_end_pad=True):
 		ret_cell.add(gdstk.Reference(RF_PAD_cell, origin=(0, length), x_reflection=True))
 	return ret_cell
 
-def new_label_cell(text, cell_name, size=label_size, layer=LAYER_MET):
-	ret_cell = gdstk.Cell(cell_name)
+#---------- label glyphs ----------#
+# each character is drawn once per size and layer, labels are references to the glyph cells
+# placed as gdstk.text does: characters 9/16*size apart, lines 5/4*size apart
+GLYPH_CELLS = {} # (character, size, layer) -> cell
+lib_CACHE.IGNORED_NAMES.add("GLYPH_CELLS")
+
+def new_glyph_cell(char, size, layer):
+	key = (char, size, layer)
+	if key not in GLYPH_CELLS:
+		cell_name = f"GLYPH_{ord(char)}_S{size:g}_L{layer}"
+		ret_cell = lib_CACHE.CELLS.get(cell_name) # already loaded from a cached cell
+		if ret_cell is None:
+			ret_cell = gdstk.Cell(cell_name)
+			ret_cell.add(*gdstk.text(char, size, (0,0), layer=layer, datatype=0))
+			lib_CACHE.register(ret_cell)
+		GLYPH_CELLS[key] = ret_cell
+	return GLYPH_CELLS[key]
+
+def text_references(text, size, position, layer=LAYER_MET):
 	# replace error characters
 	text = text.replace('0', 'O')
-	# replace error characters
-	text = gdstk.text(text, size, (0,0), layer=layer, datatype=0)
-	ret_cell.add(*text)
+	ret = []
+	for line_index, line in enumerate(text.split("\n")):
+		for char_index, char in enumerate(line):
+			if not char.isspace():
+				pos = [
+					position[0] + char_index * size*9/16,
+					position[1] - line_index * size*5/4
+				]
+				ret.append(gdstk.Reference(new_glyph_cell(char, size, layer), origin=pos))
+	return ret
+
+def new_label_cell(text, cell_name, size=label_size, layer=LAYER_MET):
+	ret_cell = gdstk.Cell(cell_name)
+	ret_cell.add(*text_references(text, size, (0,0), layer=layer))
 	return ret_cell
 
 #-------------------- Routing functions --------------------#
 
-# port position of 2x2 MMI of AMZM
-MMI2x2_BOTLEFT_CENTER  = [-0.55, 0.0]
-MMI2x2_BOTRIGHT_CENTER = [+0.55, 0.0]
-
 routing_wg_pitch = 5
 MZM_routing_height_max = 3500 + 875
 MZM_routing_width_max = 1066
@@ -1285,118 +1456,121 @@ GC_routing_height_ssc_min = 3500 + ssc_length + dicing_length + routing_wg_pitch
 GC_routing_height_GC_min = 10000 - 1325
 GC_routing_height_GC_max = 3500 + 1500
 
-def S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset, dh=0, skip=0):
+def S_shape_routing(r, ssc_point, wg_offset, dh=0, skip=0):
 	h = dh
 	if wg_offset > 2 and skip < 1:
 		h += ssc_pitch * 4 - 2*(2*radius+dr)
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_RD(o, layer, ret_cell)
-		o = arc_DR(o, layer, ret_cell)
+		r.h(h)
+		r.rd()
+		r.dr()
 	# if wg_offset > 6 and skip < 2:
 		# h = ssc_pitch * 4 - 2*(2*radius+dr)
-		# o = horizontal(o, h, layer, ret_cell)
-		# o = arc_RD(o, layer, ret_cell)
-		# o = arc_DR(o, layer, ret_cell)
+		# r.h(h)
+		# r.rd()
+		# r.dr()
 	# if wg_offset > 10 and skip < 3:
 		# h = ssc_pitch * 4 - 2*(2*radius+dr)
-		# o = horizontal(o, h, layer, ret_cell)
-		# o = arc_RD(o, layer, ret_cell)
-		# o = arc_DR(o, layer, ret_cell)
+		# r.h(h)
+		# r.rd()
+		# r.dr()
 	# if wg_offset > 14 and skip < 4:
 		# h = ssc_pitch * 4 - 2*(2*radius+dr)
-		# o = horizontal(o, h, layer, ret_cell)
-		# o = arc_RD(o, layer, ret_cell)
-		# o = arc_DR(o, layer, ret_cell)
+		# r.h(h)
+		# r.rd()
+		# r.dr()
 	# if wg_offset > 18 and skip < 5:
 		# h = ssc_pitch * 4 - 2*(2*radius+dr)
-		# o = horizontal(o, h, layer, ret_cell)
-		# o = arc_RD(o, layer, ret_cell)
-		# o = arc_DR(o, layer, ret_cell)
+		# r.h(h)
+		# r.rd()
+		# r.dr()
 	# if wg_offset > 22 and skip < 6:
 		# h = ssc_pitch * 6 - 2*(2*radius+dr)
-		# o = horizontal(o, h, layer, ret_cell)
-		# o = arc_RD(o, layer, ret_cell)
-		# o = arc_DR(o, layer, ret_cell)
+		# r.h(h)
+		# r.rd()
+		# r.dr()
 	if wg_offset > 22 and skip < 6:
 		h = ssc_pitch * (4+4+4+2+6) - 50
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_RD(o, layer, ret_cell)
+		r.h(h)
+		r.rd()
 		v = -8*(radius+dr)
-		o = vertical(o, v, layer, ret_cell)
-		o = arc_DR(o, layer, ret_cell)
-	return o
+		r.v(v)
+		r.dr()
+	return r
 
 # bot left
 def PINL500_01_route_cell(origin, end_o, ssc_point, layer, cell_name, right_end):
 	ret_cell = gdstk.Cell(cell_name)
 	# bot left port
 	wg_offset = 0
-	o = [
+	r = Route([
 		origin[0] + MMI2x2_BOTLEFT_CENTER[0],
 		origin[1],
-	]
-	o = arc_DL(o, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	r.dl()
+	r.ld()
+	v = GC_routing_height_ssc_min - r.o[1] + (20+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 90 - 4.45 + GC_routing_width_min - origin[0] + wg_offset*routing_wg_pitch
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+20, dh=dh)
+	S_shape_routing(r, ssc_point, wg_offset+20, dh=dh)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	# bot right port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0] + MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1],
-	]
-	v = GC_routing_height_ssc_min - o[1] + (20+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	v = GC_routing_height_ssc_min - r.o[1] + (20+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 90 - 4.45 + GC_routing_width_min - origin[0] - 2*(radius+dr) + wg_offset*routing_wg_pitch
 	dh -= np.abs(MMI2x2_BOTRIGHT_CENTER[0] - MMI2x2_BOTLEFT_CENTER[0])
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+20, dh=dh)
+	S_shape_routing(r, ssc_point, wg_offset+20, dh=dh)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	# top right port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0] - end_o[1] + MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1] + end_o[0],
-	]
-	o = arc_UR(o, layer, ret_cell)
+	], layer)
+	r.ur()
 	h_1 = 15 # arbitrary value
-	o = horizontal(o, h_1, layer, ret_cell)
-	o = arc_RU(o, layer, ret_cell)
+	r.h(h_1)
+	r.ru()
 	v = 80 # arbitrary value
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_UR(o, layer, ret_cell)
+	r.v(v)
+	r.ur()
 	h = end_o[1] - 4*(radius+dr) + routing_wg_pitch - h_1
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	r.h(h)
+	r.rd()
+	v = GC_routing_height_ssc_min - r.o[1] + (20+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 90 - 4.45 + GC_routing_width_min - origin[0] - 2*(radius+dr) + (wg_offset-1)*routing_wg_pitch
 	dh -= np.abs(MMI2x2_BOTRIGHT_CENTER[0] - MMI2x2_BOTLEFT_CENTER[0])
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+20, dh=dh)
+	S_shape_routing(r, ssc_point, wg_offset+20, dh=dh)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	return ret_cell
 
 # bot right
@@ -1404,76 +1578,79 @@ def PINL200_01_route_cell(origin, end_o, ssc_point, layer, cell_name, right_end)
 	ret_cell = gdstk.Cell(cell_name)
 	# bot left port
 	wg_offset = 3
-	o = [
+	r = Route([
 		origin[0] + MMI2x2_BOTLEFT_CENTER[0],
 		origin[1],
-	]
-	o = arc_DL(o, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	r.dl()
+	r.ld()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	# h = 240 - 13.2
-	# o = horizontal(o, h, layer, ret_cell)
-	# o = arc_RD(o, layer, ret_cell)
-	# o = arc_DR(o, layer, ret_cell)
+	# r.h(h)
+	# r.rd()
+	# r.dr()
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1] # note: v=0 here!!!
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1] # note: v=0 here!!!
+	r.v(v)
+	r.commit(ret_cell)
 	# bot right port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0] + MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1],
-	]
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	# h = 240 - 13.2 - 16.1 - 2*(radius+dr) + wg_offset*routing_wg_pitch
-	# o = horizontal(o, h, layer, ret_cell)
-	# o = arc_RD(o, layer, ret_cell)
-	# o = arc_DR(o, layer, ret_cell)
+	# r.h(h)
+	# r.rd()
+	# r.dr()
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	# top right port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0] - end_o[1] + MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1] + end_o[0],
-	]
-	o = arc_UR(o, layer, ret_cell)
-	o = arc_RU(o, layer, ret_cell)
+	], layer)
+	r.ur()
+	r.ru()
 	v = 80 # arbitrary value
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_UR(o, layer, ret_cell)
+	r.v(v)
+	r.ur()
 	h = end_o[1] - 4*(radius+dr) + routing_wg_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	r.h(h)
+	r.rd()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	return ret_cell
 
 # top left
@@ -1481,89 +1658,92 @@ def PINL100TERM_02_route_cell(origin, end_o, ssc_point, layer, cell_name):
 	ret_cell = gdstk.Cell(cell_name)
 	# top right port
 	wg_offset = 6
-	o = [
+	r = Route([
 		origin[0] + end_o[1] - MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1] - end_o[0],
-	]
-	o = arc_DL(o, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = MZM_routing_height_max - o[1] + (-6+wg_offset)*routing_wg_pitch + 1*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
-	h = MZM_routing_width_max - o[0] + (-8+wg_offset)*routing_wg_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	r.dl()
+	r.ld()
+	v = MZM_routing_height_max - r.o[1] + (-6+wg_offset)*routing_wg_pitch + 1*(radius+dr)
+	r.v(v)
+	r.dr()
+	h = MZM_routing_width_max - r.o[0] + (-8+wg_offset)*routing_wg_pitch
+	r.h(h)
+	r.rd()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	# top left port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0] + end_o[1] + MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1] - end_o[0],
-	]
-	v = MZM_routing_height_max - o[1] + (-6+wg_offset)*routing_wg_pitch + 1*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
-	h = MZM_routing_width_max - o[0] + (-8+wg_offset)*routing_wg_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	v = MZM_routing_height_max - r.o[1] + (-6+wg_offset)*routing_wg_pitch + 1*(radius+dr)
+	r.v(v)
+	r.dr()
+	h = MZM_routing_width_max - r.o[0] + (-8+wg_offset)*routing_wg_pitch
+	r.h(h)
+	r.rd()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	# bot left port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0],
 		origin[1] - MMI2x2_BOTLEFT_CENTER[0],
-	]
-	o = arc_LU(o, layer, ret_cell)
-	o = arc_UL(o, layer, ret_cell)
+	], layer)
+	r.lu()
+	r.ul()
 	h_1 = -50
-	o = horizontal(o, h_1, layer, ret_cell)
-	o = arc_LU(o, layer, ret_cell)
+	r.h(h_1)
+	r.lu()
 	v = PIN_distance / 2 + routing_wg_pitch*2 # arbitrary value
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_UR(o, layer, ret_cell)
+	r.v(v)
+	r.ur()
 	h = end_o[1] + MMI2x2_BOTRIGHT_CENTER[0] + 1*(radius+dr) + routing_wg_pitch - h_1
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = MZM_routing_height_max - o[1] + (-6+wg_offset)*routing_wg_pitch + 1*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
-	h = MZM_routing_width_max - o[0] + (-8+wg_offset)*routing_wg_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	r.h(h)
+	r.rd()
+	v = MZM_routing_height_max - r.o[1] + (-6+wg_offset)*routing_wg_pitch + 1*(radius+dr)
+	r.v(v)
+	r.dr()
+	h = MZM_routing_width_max - r.o[0] + (-8+wg_offset)*routing_wg_pitch
+	r.h(h)
+	r.rd()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	return ret_cell
 
 # top right
@@ -1571,86 +1751,89 @@ def PINL200TERM_02_route_cell(origin, end_o, ssc_point, layer, cell_name):
 	ret_cell = gdstk.Cell(cell_name)
 	# top right port
 	wg_offset = 9
-	o = [
+	r = Route([
 		origin[0] + end_o[1] - MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1] - end_o[0],
-	]
-	o = arc_DL(o, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = MZM_routing_height_max - o[1] + (11-wg_offset)*routing_wg_pitch + 1*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DL(o, layer, ret_cell)
-	h = MZM_routing_width_max - o[0] + (-4+wg_offset)*routing_wg_pitch + 2*dr
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	r.dl()
+	r.ld()
+	v = MZM_routing_height_max - r.o[1] + (11-wg_offset)*routing_wg_pitch + 1*(radius+dr)
+	r.v(v)
+	r.dl()
+	h = MZM_routing_width_max - r.o[0] + (-4+wg_offset)*routing_wg_pitch + 2*dr
+	r.h(h)
+	r.ld()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	# top left port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0] + end_o[1] + MMI2x2_BOTRIGHT_CENTER[0],
 		origin[1] - end_o[0],
-	]
-	v = MZM_routing_height_max - o[1] + (11-wg_offset)*routing_wg_pitch + 1*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DL(o, layer, ret_cell)
-	h = MZM_routing_width_max - o[0] + (-4+wg_offset)*routing_wg_pitch + 2*dr
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	], layer)
+	v = MZM_routing_height_max - r.o[1] + (11-wg_offset)*routing_wg_pitch + 1*(radius+dr)
+	r.v(v)
+	r.dl()
+	h = MZM_routing_width_max - r.o[0] + (-4+wg_offset)*routing_wg_pitch + 2*dr
+	r.h(h)
+	r.ld()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	# bot left port
 	wg_offset += 1
-	o = [
+	r = Route([
 		origin[0] - MMI2x2_BOTLEFT_CENTER[0],
 		origin[1],
-	]
-	o = arc_UR(o, layer, ret_cell)
-	o = arc_RU(o, layer, ret_cell)
+	], layer)
+	r.ur()
+	r.ru()
 	v = 40 # arbitrary value
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_UR(o, layer, ret_cell)
+	r.v(v)
+	r.ur()
 	h = end_o[1] - 4*(radius+dr) + routing_wg_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = MZM_routing_height_max - o[1] + (11-wg_offset)*routing_wg_pitch + 1*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DL(o, layer, ret_cell)
-	h = MZM_routing_width_max - o[0] + (-4+wg_offset)*routing_wg_pitch + 2*dr
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = GC_routing_height_ssc_min - o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	r.h(h)
+	r.rd()
+	v = MZM_routing_height_max - r.o[1] + (11-wg_offset)*routing_wg_pitch + 1*(radius+dr)
+	r.v(v)
+	r.dl()
+	h = MZM_routing_width_max - r.o[0] + (-4+wg_offset)*routing_wg_pitch + 2*dr
+	r.h(h)
+	r.ld()
+	v = GC_routing_height_ssc_min - r.o[1] + (20-4+wg_offset)*routing_wg_pitch + 2*(radius+dr)
+	r.v(v)
+	r.dr()
 	### bend at SSC for better space efficiency
 	dh = 0
-	o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset+24, dh=dh, skip=2)
+	S_shape_routing(r, ssc_point, wg_offset+24, dh=dh, skip=2)
 	### bend at SSC for better space efficiency
-	h = ssc_point[0] - o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = ssc_point[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	h = ssc_point[0] - r.o[0] - (radius+dr) - (13-wg_offset)*ssc_pitch
+	r.h(h)
+	r.rd()
+	v = ssc_point[1] - r.o[1]
+	r.v(v)
+	r.commit(ret_cell)
 	return ret_cell
 
 # # bot right right
@@ -1694,39 +1877,40 @@ def GC4x4_route_cell(origin, GC_pitch, ssc_point, layer, cell_name):
 	for i in range(4): # row
 		for j in range(4): # column
 			wg_offset = i*4 + j
-			o = [
+			r = Route([
 				origin[0] + (3-j) * GC_pitch,
 				origin[1] + (3-i) * GC_pitch,
-			]
+			], layer)
 			h = -10
-			o = horizontal(o, h, layer, ret_cell)
-			o = arc_LU(o, layer, ret_cell)
+			r.h(h)
+			r.lu()
 			v = + 10 + (3-j)*routing_wg_pitch
-			o = vertical(o, v, layer, ret_cell)
-			o = arc_UL(o, layer, ret_cell)
-			h = GC_routing_width_min - o[0] + wg_offset*routing_wg_pitch
-			o = horizontal(o, h, layer, ret_cell)
-			o = arc_LD(o, layer, ret_cell)
+			r.v(v)
+			r.ul()
+			h = GC_routing_width_min - r.o[0] + wg_offset*routing_wg_pitch
+			r.h(h)
+			r.ld()
 			### bend in Sherry region for better space efficiency
-			v = (3500+1500) - o[1] - wg_offset*routing_wg_pitch
-			o = vertical(o, v, layer, ret_cell)
-			o = arc_DL(o, layer, ret_cell)
+			v = (3500+1500) - r.o[1] - wg_offset*routing_wg_pitch
+			r.v(v)
+			r.dl()
 			h = -(GC_routing_width_min - 50 - routing_wg_pitch - 3*(radius+dr)) # 5 um from dicing line
-			o = horizontal(o, h, layer, ret_cell)
-			o = arc_LD(o, layer, ret_cell)
+			r.h(h)
+			r.ld()
 			### bend in Sherry region for better space efficiency
-			v = GC_routing_height_ssc_min - o[1] + wg_offset*routing_wg_pitch + 2*(radius+dr)
-			o = vertical(o, v, layer, ret_cell)
-			o = arc_DR(o, layer, ret_cell)
+			v = GC_routing_height_ssc_min - r.o[1] + wg_offset*routing_wg_pitch + 2*(radius+dr)
+			r.v(v)
+			r.dr()
 			### bend at SSC for better space efficiency
 			dh = 350 - GC_routing_width_min
-			o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset, dh=dh)
+			S_shape_routing(r, ssc_point, wg_offset, dh=dh)
 			### bend at SSC for better space efficiency
-			h = ssc_point[0] - o[0] - (radius+dr) + (2+wg_offset)*ssc_pitch
-			o = horizontal(o, h, layer, ret_cell)
-			o = arc_RD(o, layer, ret_cell)
-			v = ssc_point[1] - o[1]
-			o = vertical(o, v, layer, ret_cell)
+			h = ssc_point[0] - r.o[0] - (radius+dr) + (2+wg_offset)*ssc_pitch
+			r.h(h)
+			r.rd()
+			v = ssc_point[1] - r.o[1]
+			r.v(v)
+			r.commit(ret_cell)
 	return ret_cell
 
 # GC 4x1 routing
@@ -1734,36 +1918,37 @@ def GC4x1output_route_cell(origin, GC_pitch, ssc_point, layer, cell_name):
 	ret_cell = gdstk.Cell(cell_name)
 	for i in range(4): # row
 		wg_offset = i + 16
-		o = [
+		r = Route([
 			origin[0],
 			origin[1] + (3-i) * GC_pitch,
-		]
+		], layer)
 		v = -10
-		o = vertical(o, v, layer, ret_cell)
-		o = arc_DL(o, layer, ret_cell)
-		h = GC_routing_width_min - o[0] + wg_offset*routing_wg_pitch
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_LD(o, layer, ret_cell)
+		r.v(v)
+		r.dl()
+		h = GC_routing_width_min - r.o[0] + wg_offset*routing_wg_pitch
+		r.h(h)
+		r.ld()
 		### bend in Sherry region for better space efficiency
-		v = (3500+1500) - o[1] - wg_offset*routing_wg_pitch
-		o = vertical(o, v, layer, ret_cell)
-		o = arc_DL(o, layer, ret_cell)
+		v = (3500+1500) - r.o[1] - wg_offset*routing_wg_pitch
+		r.v(v)
+		r.dl()
 		h = -(GC_routing_width_min - 50 - routing_wg_pitch - 3*(radius+dr)) # 5 um from dicing line
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_LD(o, layer, ret_cell)
+		r.h(h)
+		r.ld()
 		### bend in Sherry region for better space efficiency
-		v = GC_routing_height_ssc_min - o[1] + wg_offset*routing_wg_pitch + 2*(radius+dr)
-		o = vertical(o, v, layer, ret_cell)
-		o = arc_DR(o, layer, ret_cell)
+		v = GC_routing_height_ssc_min - r.o[1] + wg_offset*routing_wg_pitch + 2*(radius+dr)
+		r.v(v)
+		r.dr()
 		### bend at SSC for better space efficiency
 		dh = 350 - GC_routing_width_min
-		o = S_shape_routing(o, layer, ret_cell, ssc_point, wg_offset, dh=dh)
+		S_shape_routing(r, ssc_point, wg_offset, dh=dh)
 		### bend at SSC for better space efficiency
-		h = ssc_point[0] - o[0] - (radius+dr) + (2+wg_offset)*ssc_pitch
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_RD(o, layer, ret_cell)
-		v = ssc_point[1] - o[1]
-		o = vertical(o, v, layer, ret_cell)
+		h = ssc_point[0] - r.o[0] - (radius+dr) + (2+wg_offset)*ssc_pitch
+		r.h(h)
+		r.rd()
+		v = ssc_point[1] - r.o[1]
+		r.v(v)
+		r.commit(ret_cell)
 	return ret_cell
 
 # GC 1x4 routing
@@ -1771,95 +1956,97 @@ def GC1x4input_route_cell(origin, GC_pitch, layer, cell_name,
 						PINL500_01_origin, PINL200_01_origin, PINL100TERM_02_origin, PINL200TERM_02_origin,
 						pin_mzm_L500_end_o, pin_mzm_L200_end_o, pin_mzm_L100_TERM_end_o, pin_mzm_L200_TERM_end_o):
 	ret_cell = gdstk.Cell(cell_name)
-	top_ends = []
+	top_routes = []
 	for j in range(4): # col
 		wg_offset = j + 16 + 4
-		o = [
+		r = Route([
 			origin[0] + j * GC_pitch,
 			origin[1],
-		]
+		], layer)
 		h = -10
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_LD(o, layer, ret_cell)
+		r.h(h)
+		r.ld()
 		v = - 20 + (wg_offset-20)*routing_wg_pitch # note: v=0 here!!!
-		o = vertical(o, v, layer, ret_cell)
-		o = arc_DR(o, layer, ret_cell)
-		h = GC_routing_width_max - o[0] + (wg_offset-20)*routing_wg_pitch
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_RD(o, layer, ret_cell)
-		v = GC_routing_height_GC_min - o[1] - (wg_offset-20)*routing_wg_pitch
-		o = vertical(o, v, layer, ret_cell)
-		o = arc_DL(o, layer, ret_cell)
-		h = GC_routing_width_min - o[0] + wg_offset*routing_wg_pitch
-		o = horizontal(o, h, layer, ret_cell)
-		o = arc_LD(o, layer, ret_cell)
+		r.v(v)
+		r.dr()
+		h = GC_routing_width_max - r.o[0] + (wg_offset-20)*routing_wg_pitch
+		r.h(h)
+		r.rd()
+		v = GC_routing_height_GC_min - r.o[1] - (wg_offset-20)*routing_wg_pitch
+		r.v(v)
+		r.dl()
+		h = GC_routing_width_min - r.o[0] + wg_offset*routing_wg_pitch
+		r.h(h)
+		r.ld()
 		if j >= 2:
-			v = (3500+1500+20) - o[1]
-			o = vertical(o, v, layer, ret_cell)
+			v = (3500+1500+20) - r.o[1]
+			r.v(v)
 		else:
 			### bend in Sherry region for better space efficiency
-			v = (3500+1500) - o[1] - wg_offset*routing_wg_pitch
-			o = vertical(o, v, layer, ret_cell)
-			o = arc_DL(o, layer, ret_cell)
+			v = (3500+1500) - r.o[1] - wg_offset*routing_wg_pitch
+			r.v(v)
+			r.dl()
 			h = -(GC_routing_width_min - 50 - routing_wg_pitch - 3*(radius+dr)) # 5 um from dicing line
-			o = horizontal(o, h, layer, ret_cell)
-			o = arc_LD(o, layer, ret_cell)
+			r.h(h)
+			r.ld()
 			### bend in Sherry region for better space efficiency
-		top_ends.append(o.copy())
+		top_routes.append(r)
 	v_3 = -97 # arbitrary value
 	v_1 = -606 # arbitrary value
 	# PINL200TERM_02_origin
-	o = top_ends[3]
+	r = top_routes[3]
 	right_end = PINL200TERM_02_origin.copy()
 	right_end[0] -= np.abs(MMI2x2_BOTLEFT_CENTER[0])
-	o = arc_DR(o, layer, ret_cell)
-	h = right_end[0] - o[0] - 1*(radius+dr)
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = right_end[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	r.dr()
+	h = right_end[0] - r.o[0] - 1*(radius+dr)
+	r.h(h)
+	r.rd()
+	v = right_end[1] - r.o[1]
+	r.v(v)
 	# PINL100TERM_02_origin
-	o = top_ends[2]
+	r = top_routes[2]
 	right_end = PINL100TERM_02_origin.copy()
-	v = right_end[1] - o[1] + 1*(radius+dr) - MMI2x2_BOTRIGHT_CENTER[0]
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
-	h = right_end[0] - o[0]
-	o = horizontal(o, h, layer, ret_cell)
+	v = right_end[1] - r.o[1] + 1*(radius+dr) - MMI2x2_BOTRIGHT_CENTER[0]
+	r.v(v)
+	r.dr()
+	h = right_end[0] - r.o[0]
+	r.h(h)
 	# PINL200_01_origin
-	o = top_ends[1]
+	r = top_routes[1]
 	right_end = PINL200_01_origin.copy()
 	right_end[0] -= pin_mzm_L200_end_o[1]
 	right_end[0] -= np.abs(MMI2x2_BOTLEFT_CENTER[0])
 	right_end[1] += pin_mzm_L200_end_o[0]
 	v = v_1 # arbitrary value
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
-	h = right_end[0] - o[0] - 1*(radius+dr)
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	v = right_end[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	r.v(v)
+	r.dr()
+	h = right_end[0] - r.o[0] - 1*(radius+dr)
+	r.h(h)
+	r.rd()
+	v = right_end[1] - r.o[1]
+	r.v(v)
 	# PINL500_01_origin
-	o = top_ends[0]
+	r = top_routes[0]
 	right_end = PINL500_01_origin.copy()
 	right_end[0] -= pin_mzm_L500_end_o[1]
 	right_end[0] -= np.abs(MMI2x2_BOTLEFT_CENTER[0])
 	right_end[1] += pin_mzm_L500_end_o[0]
 	v = -1*(radius+dr-dr) # here only radius is enough
 	v += v_1 # arbitrary value
-	o = vertical(o, v, layer, ret_cell)
-	o = arc_DR(o, layer, ret_cell)
+	r.v(v)
+	r.dr()
 	h = 10 # arbitrary value
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_RD(o, layer, ret_cell)
-	o = arc_DL(o, layer, ret_cell)
-	h = right_end[0] - o[0] + 1*(radius+dr)
+	r.h(h)
+	r.rd()
+	r.dl()
+	h = right_end[0] - r.o[0] + 1*(radius+dr)
 	assert h < 0
-	o = horizontal(o, h, layer, ret_cell)
-	o = arc_LD(o, layer, ret_cell)
-	v = right_end[1] - o[1]
-	o = vertical(o, v, layer, ret_cell)
+	r.h(h)
+	r.ld()
+	v = right_end[1] - r.o[1]
+	r.v(v)
+	for r in top_routes:
+		r.commit(ret_cell)
 	return ret_cell
 
 #---------- SSC labels ----------#
@@ -2019,9 +2206,6 @@ def new_ssc_labels_cell(ssc_right_origin, cell_name):
 def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 	ret_cell = gdstk.Cell(cell_name)
 	# constants
-	MMI1x2_BOT_CENTER  = [0, 0]
-	MMI1x2_TOPLEFT_CENTER  = [-0.55, 15.704]
-	MMI1x2_TOPRIGHT_CENTER = [+0.55, 15.704]
 	GC_length = 217
 	ssc_minor_pitch = 40
 	minor_origin = [origin[0], origin[1] - 50]
@@ -2079,6 +2263,7 @@ def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 	]
 	path = gdstk.FlexPath(points, wg_width, layer=layer, datatype=0, tolerance=1e-3, bend_radius=slope_bend_radius)
 	ret_cell.add(path)
+	lib_PORT.add_waveguide(ret_cell, points, wg_width, layer)
 	o = [o[0] - slope_width, o[1] + slope_length]
 	## smooth slope
 	v = end_point[1] - o[1] - (radius+dr)
@@ -2099,6 +2284,7 @@ def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 	]
 	path = gdstk.FlexPath(points, wg_width, layer=layer, datatype=0, tolerance=1e-3, bend_radius=slope_bend_radius)
 	ret_cell.add(path)
+	lib_PORT.add_waveguide(ret_cell, points, wg_width, layer)
 	o = [o[0] + slope_width, o[1] + slope_length]
 	## smooth slope
 	v = end_point[1] - o[1] - (radius+dr)
@@ -2135,6 +2321,7 @@ def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 	for label in list(GC_cell_woNODMY.labels):
 		if label.layer == remove_layer:
 			GC_cell_woNODMY.remove(label)
+	lib_PORT.set_ports(GC_cell_woNODMY, *lib_PORT.cell_ports(GC_cell))
 	o = [
 		minor_origin[0] - ssc_length - dicing_length,
 		minor_origin[1] + 1*ssc_minor_pitch
@@ -2157,9 +2344,7 @@ def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 			o[1] + 10 + label_index*ssc_pitch
 		]
 		text = f"{label_index}"
-		text = text.replace('0', 'O')
-		text = gdstk.text(text, size, pos, layer=LAYER_MET)
-		ret_cell.add(*text)
+		ret_cell.add(*text_references(text, size, pos, layer=LAYER_MET))
 		label_index += 1
 	# 1x2 MMI
 	for j in range(3):
@@ -2171,9 +2356,7 @@ def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 		# elif j == 1: text = f"{label_index}iR"
 		# elif j == 2: text = f"{label_index}iL"
 		text = f"{label_index}"
-		text = text.replace('0', 'O')
-		text = gdstk.text(text, size, pos, layer=LAYER_MET)
-		ret_cell.add(*text)
+		ret_cell.add(*text_references(text, size, pos, layer=LAYER_MET))
 		label_index += 1
 	# loop back
 	for i in range(2):
@@ -2182,9 +2365,7 @@ def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 			o[1] + 10 + label_index*ssc_pitch
 		]
 		text = f"{label_index}"
-		text = text.replace('0', 'O')
-		text = gdstk.text(text, size, pos, layer=LAYER_MET)
-		ret_cell.add(*text)
+		ret_cell.add(*text_references(text, size, pos, layer=LAYER_MET))
 		label_index += 1
 	#----- GC B2B -----#
 	# horizontal
@@ -2296,6 +2477,68 @@ def passive_test_patterns(origin, ssc_right, loop_bot, GC_cell, cell_name):
 	GC_longloops(o, 10000, ret_cell, label_offset=[0,-250])
 	return ret_cell
 
+#-------------------- GC sweep --------------------#
+# B2B GC pairs for every (grating_num, angle_deg, taper_length) row x grating_pitch column
+# identical tapers and rib rings are shared sub-cells, all rib rings are generated in one batch
+
+@lib_CACHE.cached_cell
+def new_GC_sweep_cell(grating_num_list, grating_pitch_list, angle_deg_list, taper_length_list, cell_name, grating_duty=0.5, pair_length=100, row_pitch=50, text_size=10):
+	ret_cell = gdstk.Cell(cell_name)
+	variants = [
+		(grating_num, grating_pitch, angle_deg, taper_length)
+		for grating_num in grating_num_list
+		for angle_deg in angle_deg_list
+		for taper_length in taper_length_list
+		for grating_pitch in grating_pitch_list
+	]
+	dimensions = [GC_dimensions(*variant, grating_duty=grating_duty) for variant in variants]
+	# unique rib rings (rounded to the 1 nm grid) -> cell
+	rings = {}
+	for (_, _, angle_deg, _), (_, _, _, radius_inner, rib_width) in zip(variants, dimensions):
+		for r, w in zip(radius_inner, rib_width):
+			rings.setdefault((round(r, 3), round(w, 3), angle_deg), None)
+	ring_keys = list(rings)
+	ring_polygons = GC_rib_polygons(
+		[k[0] for k in ring_keys], [k[1] for k in ring_keys], [k[2] / 180 * np.pi for k in ring_keys], LAYER_RIB
+	)
+	for (r, w, angle_deg), polygon in zip(ring_keys, ring_polygons):
+		rings[(r, w, angle_deg)] = gdstk.Cell(f"{cell_name}_RIB_R{r:g}_W{w:g}_A{angle_deg:g}").add(polygon)
+	# unique tapers -> cell
+	tapers = {}
+	no_dummy = gdstk.Cell(f"{cell_name}_NODMY")
+	no_dummy.add(gdstk.rectangle((0, -GC_NODMY_size/2), (GC_NODMY_size, GC_NODMY_size/2), layer=LAYER_NODMY, datatype=0))
+	# GC and B2B pair of each variant
+	pairs = []
+	for (grating_num, grating_pitch, angle_deg, taper_length), (angle_rad, taper_start, radius, radius_inner, rib_width) in zip(variants, dimensions):
+		taper_key = (angle_deg, round(radius, 3))
+		if taper_key not in tapers:
+			tapers[taper_key] = gdstk.Cell(f"{cell_name}_TAPER_A{angle_deg:g}_R{taper_key[1]:g}")
+			tapers[taper_key].add(GC_taper_polygon(angle_rad, taper_start, radius, LAYER_SiWG))
+		name = f"T{grating_num}P{grating_pitch:g}A{angle_deg:g}L{taper_length:g}"
+		GC_cell = gdstk.Cell(f"{cell_name}_{name}")
+		GC_cell.add(gdstk.Reference(tapers[taper_key]), gdstk.Reference(no_dummy))
+		for r, w in zip(radius_inner, rib_width):
+			GC_cell.add(gdstk.Reference(rings[(round(r, 3), round(w, 3), angle_deg)]))
+		pair_cell = gdstk.Cell(f"{cell_name}_{name}_B2B")
+		pair_cell.add(gdstk.Reference(GC_cell, rotation=np.pi)) # left
+		Route((0, 0), LAYER_SiWG).h(pair_length).commit(pair_cell)
+		pair_cell.add(gdstk.Reference(GC_cell, origin=(pair_length, 0))) # right
+		# label above the left GC
+		GC_length = radius - taper_start
+		label_cell = new_label_cell(name, f"{cell_name}_{name}_label", size=text_size)
+		pair_cell.add(gdstk.Reference(label_cell, origin=(-GC_length, GC_NODMY_size/2 + 2)))
+		pairs.append((pair_cell, GC_length))
+	# grid
+	columns = len(grating_pitch_list)
+	column_pitch = max(2*GC_length + pair_length for _, GC_length in pairs) + 50
+	for i, (pair_cell, GC_length) in enumerate(pairs):
+		pos = [
+			(i % columns) * column_pitch + GC_length,
+			-(i // columns) * row_pitch,
+		]
+		ret_cell.add(gdstk.Reference(pair_cell, origin=pos))
+	return ret_cell
+
 #-------------------- TIN resistor test patterns --------------------#
 
 def TIN_test_patterns(cell_name):
@@ -2319,7 +2562,7 @@ def TIN_test_patterns(cell_name):
 			MET_MIDDLE_corner_topright[0] - 5,
 			MET_MIDDLE_corner_topright[1] - 5,
 		]
-		assert RF_PAD_PITCH - (PW_MIDDLE_corner_topright[0]-PW_MIDDLE_corner_botleft[0]) > 4 # design rule
+		# design rule: PW spacing and enclosure in lib_v8_DRC.DRC_RULES
 		pad_window = gdstk.rectangle(PW_MIDDLE_corner_botleft, PW_MIDDLE_corner_topright, layer=layer, datatype=0)
 		ret_cell.add(pad_window)
 		return ret_cell
@@ -2378,6 +2621,5 @@ def TIN_test_patterns(cell_name):
 			- 1 * RF_PAD_PITCH,
 			RF_PAD_PITCH * (5-row) + 20,
 		]
-		text = gdstk.text(f"{row}".replace('0','O'), label_size, pos, layer=layer, datatype=0)
-		ret_cell.add(*text)
+		ret_cell.add(*text_references(f"{row}", label_size, pos, layer=layer))
 	return ret_cell
@@ -0,0 +1,222 @@
+# AIST 2025 incremental chip build
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import os
+import sys
+import time
+import types
+import inspect
+import hashlib
+import tempfile
+import multiprocessing
+import concurrent.futures
+import gdstk
+import lib_v8_CACHE as lib_CACHE
+
+# A chip script is split into sections:
+#
+#   build = lib_BUILD.Build("TOP_Ren")
+#   @build.section
+#   def GC_arrays(top):                # top: cell whose content is placed in the top cell
+#       ...
+#       return {"GC_cell": GC_cell}    # values (cells, points) for other sections
+#   @build.section
+#   def passive(top, GC_arrays):       # depends on the section GC_arrays (argument name)
+#       GC_cell = GC_arrays["GC_cell"]
+#   top_cell = build.run()
+#
+# Each section is hashed over its source, the script constants it reads, the lib_v8* sources
+# and the hashes of the sections it depends on. Sections with an unchanged hash are reloaded
+# from lib_v8_CACHE.CACHE_DIR instead of being regenerated. Sections generated in less than
+# AIST_BUILD_STORE_MS (default 5 ms) are not stored, they are regenerated every time.
+#
+# Stale sections run in worker processes (AIST_BUILD_JOBS, default: number of cores), one wave of
+# mutually independent sections at a time. Workers send each section back as GDS bytes; the parent
+# merges them in section order, reusing cells with the same name (they must have the same content).
+# Without the "fork" start method, or with a single job, sections are generated serially.
+
+BUILD_JOBS = int(os.environ.get("AIST_BUILD_JOBS", os.cpu_count() or 1))
+BUILD_STORE_MS = float(os.environ.get("AIST_BUILD_STORE_MS", 5)) # sections generated faster are not stored (loading costs as much)
+ACTIVE_BUILD = None # build being run, seen by the forked workers
+
+class Section:
+	def __init__(self, func):
+		self.func = func
+		self.name = func.__name__
+		self.deps = [p for p in inspect.signature(func).parameters if p != "top"]
+		self.key = None
+		self.value = None
+		self.cell = None
+		self.cached = False
+		self.time = 0
+
+class Build:
+	def __init__(self, top_name, cache=True, jobs=None):
+		self.top_name = top_name
+		self.cache = cache and lib_CACHE.CACHE_ENABLED
+		self.jobs = BUILD_JOBS if jobs is None else jobs
+		self.sections = {}
+		self.sources_digest = None
+		self.modules = None
+		self.placements = [] # section of each reference of the top cell (ex. lib_v8_PORT.port_map)
+
+	def section(self, func):
+		self.sections[func.__name__] = Section(func)
+		return func
+
+	def order(self):
+		# topological order, declaration order among independent sections
+		ret, visiting = [], set()
+		def visit(name):
+			if name in ret:
+				return
+			assert name in self.sections, f"unknown section: {name}"
+			assert name not in visiting, f"circular section dependency: {name}"
+			visiting.add(name)
+			for dep in self.sections[name].deps:
+				visit(dep)
+			visiting.discard(name)
+			ret.append(name)
+		for name in self.sections:
+			visit(name)
+		return ret
+
+	def section_key(self, sec):
+		h = hashlib.sha1(f"{sec.name} fragment {lib_CACHE.FRAGMENT_FORMAT}".encode())
+		# with the lib_v8* sources hashed, the closure stays in the script (lib_X.attr is not followed)
+		uses_project = uses_project_module(sec.func, self.modules)
+		closure = lib_CACHE.closure_key(sec.func, sec.func.__globals__, follow=not uses_project)
+		for k in sorted(closure):
+			h.update(k.encode())
+			h.update(closure[k].encode())
+		if uses_project:
+			h.update(self.sources_digest.encode())
+		for dep in sec.deps:
+			h.update(self.sections[dep].key.encode())
+		return h.hexdigest()
+
+	def fragment_path(self, sec):
+		return os.path.join(lib_CACHE.CACHE_DIR, f"section_{sec.name}_{sec.key[:20]}.gds")
+
+	def run_section(self, sec):
+		sec.cell = gdstk.Cell(f"SECTION_{sec.name}")
+		deps = {dep: self.sections[dep].value for dep in sec.deps}
+		sec.value = sec.func(sec.cell, **deps)
+		lib_CACHE.register(*sec.cell.dependencies(True))
+		for cell in lib_CACHE.returned_cells(sec.value):
+			lib_CACHE.register(cell, *cell.dependencies(True))
+
+	def run(self):
+		self.modules = project_modules()
+		self.sources_digest = project_sources_digest(self.modules)
+		stale = []
+		for name in self.order():
+			sec = self.sections[name]
+			t = time.time()
+			sec.key = self.section_key(sec)
+			path = self.fragment_path(sec)
+			sec.cached = self.cache and os.path.exists(path) and os.path.exists(path + ".json")
+			if sec.cached:
+				sec.cell, sec.value = lib_CACHE.load_fragment(path)
+				sec.time = time.time() - t
+				self.report(sec)
+			else:
+				stale.append(name)
+		if self.jobs > 1 and len(stale) > 1 and "fork" in multiprocessing.get_all_start_methods():
+			self.run_parallel(stale)
+		else:
+			for name in stale:
+				sec = self.sections[name]
+				t = time.time()
+				self.run_section(sec)
+				sec.time = time.time() - t
+				if self.stored(sec):
+					lib_CACHE.store_fragment(self.fragment_path(sec), (sec.cell, sec.value))
+				self.report(sec)
+		return self.top_cell()
+
+	def run_parallel(self, stale):
+		global ACTIVE_BUILD
+		ACTIVE_BUILD = self
+		context = multiprocessing.get_context("fork")
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			while stale:
+				# sections whose dependencies are all available; workers are forked per wave so they see them
+				wave = [name for name in stale if all(dep not in stale for dep in self.sections[name].deps)]
+				stale = [name for name in stale if name not in wave]
+				with concurrent.futures.ProcessPoolExecutor(min(self.jobs, len(wave)), mp_context=context) as pool:
+					futures = [pool.submit(section_worker, name) for name in wave]
+					# merged in section order, not in completion order, so that cell reuse is deterministic
+					for name, future in zip(wave, futures):
+						sec = self.sections[name]
+						gds_bytes, json_bytes, sec.time = future.result()
+						path = self.fragment_path(sec) if self.stored(sec) else os.path.join(tmp_dir, f"section_{name}.gds")
+						os.makedirs(os.path.dirname(path), exist_ok=True)
+						with open(path, "wb") as f:
+							f.write(gds_bytes)
+						with open(path + ".json", "wb") as f:
+							f.write(json_bytes)
+						sec.cell, sec.value = lib_CACHE.load_fragment(path, check=True)
+						self.report(sec)
+		ACTIVE_BUILD = None
+
+	def stored(self, sec):
+		return self.cache and sec.time * 1e3 >= BUILD_STORE_MS
+
+	def report(self, sec):
+		print(f"[build] {sec.name}: {'cached' if sec.cached else 'rebuilt'} ({sec.time*1e3:.0f} ms)")
+
+	def top_cell(self):
+		top_cell = gdstk.Cell(self.top_name)
+		self.placements = []
+		for name in self.order():
+			sec = self.sections[name]
+			top_cell.add(*sec.cell.polygons, *sec.cell.paths, *sec.cell.labels, *sec.cell.references)
+			self.placements += [name] * len(sec.cell.references)
+		names = [cell.name for cell in top_cell.dependencies(True)]
+		duplicates = sorted(set(n for n in names if names.count(n) > 1))
+		assert not duplicates, f"different cells with the same name: {duplicates}"
+		return top_cell
+
+def section_worker(name):
+	# runs in a forked process: generate one section and return it as GDS (+ JSON values)
+	t = time.time()
+	sec = ACTIVE_BUILD.sections[name]
+	ACTIVE_BUILD.run_section(sec)
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		path = os.path.join(tmp_dir, "section.gds")
+		lib_CACHE.store_fragment(path, (sec.cell, sec.value))
+		with open(path, "rb") as f:
+			gds_bytes = f.read()
+		with open(path + ".json", "rb") as f:
+			json_bytes = f.read()
+	return gds_bytes, json_bytes, time.time() - t
+
+#-------------------- project sources --------------------#
+
+def project_modules():
+	design_dir = os.path.dirname(os.path.abspath(__file__))
+	ret = []
+	for module in list(sys.modules.values()):
+		path = getattr(module, "__file__", None)
+		if module.__name__ != "__main__" and path and os.path.dirname(os.path.abspath(path)) == design_dir:
+			ret.append(module)
+	return sorted(ret, key=lambda m: m.__name__)
+
+def uses_project_module(func, modules=None):
+	if modules is None:
+		modules = project_modules()
+	for name in lib_CACHE.code_names(func.__code__):
+		value = func.__globals__.get(name)
+		if isinstance(value, types.ModuleType) and value in modules:
+			return True
+	return False
+
+def project_sources_digest(modules=None):
+	h = hashlib.sha1()
+	for module in project_modules() if modules is None else modules:
+		h.update(module.__name__.encode())
+		with open(module.__file__, "rb") as f:
+			h.update(f.read())
+	return h.hexdigest()
@@ -0,0 +1,286 @@
+# AIST 2025 cell cache
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import os
+import json
+import hashlib
+import inspect
+import functools
+import types
+import dis
+import gdstk
+import numpy as np
+
+# generated cells are stored as GDS fragments under a hash of (function source, args, constants)
+CACHE_DIR = os.environ.get("AIST_CELL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cell_cache"))
+CACHE_ENABLED = os.environ.get("AIST_CELL_CACHE", "1") != "0"
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__)) # modules in this directory are followed by closure_key (lib_X.func)
+
+CELLS = {}           # cell name -> live cell, so that reloaded fragments share cells with the running design
+RESOLVERS = []       # functions: cell name -> live cell or None (ex. PDK cells)
+IGNORED_NAMES = {"CELLS", "RESOLVERS", "CELL_DATA"} # module globals that are registries, not design constants (ex. BEND_CELLS)
+CELL_DATA = {}       # name -> (get: cell name -> JSON-able or None, set: (cell name, data)), stored with fragments (ex. ports)
+FRAGMENT_FORMAT = 2  # version of the fragment files, part of every cache key
+
+def register(*cells):
+	for cell in cells:
+		CELLS.setdefault(cell.name, cell)
+
+def live_cell(cell_name):
+	if cell_name in CELLS:
+		return CELLS[cell_name]
+	for resolver in RESOLVERS:
+		cell = resolver(cell_name)
+		if cell is not None:
+			return cell
+	return None
+
+#-------------------- content hash --------------------#
+
+def array_digest(points, h):
+	# rounded to the GDS database unit (1 nm), so that cells compare equal after a GDS round trip
+	h.update(np.ascontiguousarray(np.round(np.asarray(points, dtype=float), 3) + 0.0).tobytes())
+
+def repetition_digest(repetition, h):
+	if repetition.size > 0:
+		array_digest(repetition.get_offsets(), h)
+
+def cell_digest(cell, memo=None):
+	# content hash of a cell and everything it references, independent of cell names and element order
+	if memo is None:
+		memo = {}
+	if id(cell) in memo:
+		return memo[id(cell)]
+	if isinstance(cell, gdstk.RawCell):
+		ret = hashlib.sha1(f"RawCell:{cell.name}:{cell.size}".encode()).hexdigest()
+		memo[id(cell)] = ret
+		return ret
+	items = []
+	for poly in cell.polygons:
+		h = hashlib.sha1(f"P{poly.layer}/{poly.datatype}".encode())
+		array_digest(poly.points, h)
+		repetition_digest(poly.repetition, h)
+		items.append(h.hexdigest())
+	for path in cell.paths:
+		for poly in path.to_polygons():
+			h = hashlib.sha1(f"P{poly.layer}/{poly.datatype}".encode())
+			array_digest(poly.points, h)
+			repetition_digest(path.repetition, h)
+			items.append(h.hexdigest())
+	for label in cell.labels:
+		h = hashlib.sha1(f"L{label.layer}/{label.texttype}:{label.text}:{label.rotation:.9g}:{label.magnification:.9g}:{label.x_reflection}".encode())
+		array_digest(label.origin, h)
+		repetition_digest(label.repetition, h)
+		items.append(h.hexdigest())
+	for ref in cell.references:
+		ref_cell = ref.cell
+		ref_digest = cell_digest(ref_cell, memo) if not isinstance(ref_cell, str) else "name:" + ref_cell
+		h = hashlib.sha1(f"R{ref_digest}:{ref.rotation:.9g}:{ref.magnification:.9g}:{ref.x_reflection}".encode())
+		array_digest(ref.origin, h)
+		repetition_digest(ref.repetition, h)
+		items.append(h.hexdigest())
+	items.sort()
+	ret = hashlib.sha1("\n".join(items).encode()).hexdigest()
+	memo[id(cell)] = ret
+	return ret
+
+def value_key(value):
+	# JSON-able representation of argument / constant values
+	if isinstance(value, (gdstk.Cell, gdstk.RawCell)):
+		return {"cell": cell_digest(value)}
+	if isinstance(value, np.ndarray):
+		return value.tolist()
+	if isinstance(value, np.generic):
+		return value.item()
+	if isinstance(value, (list, tuple)):
+		return [value_key(v) for v in value]
+	if isinstance(value, dict):
+		return {str(k): value_key(v) for k, v in value.items()}
+	if isinstance(value, (int, float, str, bool)) or value is None:
+		return value
+	if hasattr(value, "to_json"):
+		return value.to_json()
+	if hasattr(value, "filename") and os.path.exists(value.filename):
+		stat = os.stat(value.filename)
+		return {"file": os.path.basename(value.filename), "size": stat.st_size, "mtime": stat.st_mtime}
+	return None
+
+@functools.lru_cache(maxsize=None)
+def code_names(code):
+	names = set(code.co_names)
+	for const in code.co_consts:
+		if isinstance(const, types.CodeType):
+			names |= code_names(const)
+	return frozenset(names)
+
+@functools.lru_cache(maxsize=None)
+def global_attributes(code):
+	# (global name, attribute) of every global.attribute read, ex. ("lib_TIN", "size_for")
+	ret = set()
+	instructions = list(dis.get_instructions(code))
+	for ins, nxt in zip(instructions, instructions[1:]):
+		if ins.opname == "LOAD_GLOBAL" and nxt.opname in ("LOAD_ATTR", "LOAD_METHOD"):
+			ret.add((ins.argval, nxt.argval))
+	for const in code.co_consts:
+		if isinstance(const, types.CodeType):
+			ret |= global_attributes(const)
+	return frozenset(ret)
+
+@functools.lru_cache(maxsize=None)
+def source_text(func):
+	# inspect.getsource parses the whole module for a class; sources do not change while running
+	return inspect.getsource(func)
+
+def project_module(value):
+	path = getattr(value, "__file__", None)
+	return isinstance(value, types.ModuleType) and path is not None and os.path.dirname(os.path.abspath(path)) == SOURCE_DIR
+
+def closure_key(func, module_globals, seen=None, follow=True):
+	# source of func and of every project function/class it uses (module level or lib_X.attr), plus the constants it reads
+	# follow=False: lib_X.attr is not followed (the caller hashes the project sources instead, ex. lib_v8_BUILD)
+	if seen is None:
+		seen = {}
+	func = inspect.unwrap(func)
+	if f"def:{func.__module__}.{func.__qualname__}" in seen:
+		return seen
+	seen[f"def:{func.__module__}.{func.__qualname__}"] = source_text(func)
+	if not isinstance(func, type) and (func.__defaults__ or func.__kwdefaults__):
+		# default values are bound at definition (ex. widths=TIN_WIDTHS)
+		seen[f"defaults:{func.__module__}.{func.__qualname__}"] = json.dumps(value_key([func.__defaults__, func.__kwdefaults__]), sort_keys=True)
+	if isinstance(func, type):
+		codes = [f.__code__ for f in vars(func).values() if isinstance(f, types.FunctionType)]
+	else:
+		codes = [func.__code__]
+	def use(name, value, namespace):
+		if isinstance(value, (types.FunctionType, type)) and getattr(value, "__module__", None) == namespace["__name__"]:
+			closure_key(value, namespace, seen, follow)
+		elif not callable(value) and not isinstance(value, (types.ModuleType, gdstk.Library)):
+			seen[f"var:{namespace['__name__']}.{name}"] = json.dumps(value_key(value), sort_keys=True)
+	for code in codes:
+		for name in sorted(code_names(code)):
+			if name in module_globals and name not in IGNORED_NAMES:
+				use(name, module_globals[name], module_globals)
+		for name, attr in sorted(global_attributes(code)) if follow else []:
+			module = module_globals.get(name)
+			if project_module(module) and hasattr(module, attr) and attr not in IGNORED_NAMES:
+				use(attr, getattr(module, attr), vars(module))
+	return seen
+
+def call_key(func, args, kwargs):
+	closure = closure_key(func, func.__globals__)
+	h = hashlib.sha1(f"gdstk {gdstk.__version__} fragment {FRAGMENT_FORMAT}".encode())
+	for k in sorted(closure):
+		h.update(k.encode())
+		h.update(closure[k].encode())
+	h.update(json.dumps([value_key(args), value_key(kwargs)], sort_keys=True).encode())
+	return h.hexdigest()
+
+#-------------------- GDS fragments --------------------#
+
+def encode_value(value):
+	if isinstance(value, (gdstk.Cell, gdstk.RawCell)):
+		return {"__cell__": value.name}
+	if isinstance(value, tuple):
+		return {"__tuple__": [encode_value(v) for v in value]}
+	if isinstance(value, list):
+		return [encode_value(v) for v in value]
+	if isinstance(value, dict):
+		return {k: encode_value(v) for k, v in value.items()}
+	if isinstance(value, np.ndarray):
+		return value.tolist()
+	if isinstance(value, np.generic):
+		return value.item()
+	return value
+
+def decode_value(value, cells):
+	if isinstance(value, dict):
+		if "__cell__" in value:
+			return cells[value["__cell__"]]
+		if "__tuple__" in value:
+			return tuple(decode_value(v, cells) for v in value["__tuple__"])
+		return {k: decode_value(v, cells) for k, v in value.items()}
+	if isinstance(value, list):
+		return [decode_value(v, cells) for v in value]
+	return value
+
+def returned_cells(value):
+	if isinstance(value, (gdstk.Cell, gdstk.RawCell)):
+		return [value]
+	if isinstance(value, (list, tuple)):
+		return [c for v in value for c in returned_cells(v)]
+	if isinstance(value, dict):
+		return [c for v in value.values() for c in returned_cells(v)]
+	return []
+
+def store_fragment(path, value):
+	lib = gdstk.Library()
+	cells = {}
+	for cell in returned_cells(value):
+		for c in [cell] + list(cell.dependencies(True)):
+			cells.setdefault(c.name, c)
+	lib.add(*cells.values())
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp = f".{os.getpid()}.tmp" # several build processes may store the same fragment
+	lib.write_gds(path + tmp)
+	cell_data = {}
+	for key, (get, _) in CELL_DATA.items():
+		data = {name: get(name) for name in cells}
+		cell_data[key] = {name: d for name, d in data.items() if d is not None}
+	with open(path + ".json" + tmp, "w") as f:
+		json.dump({"value": encode_value(value), "cell_data": cell_data}, f)
+	os.replace(path + tmp, path)
+	os.replace(path + ".json" + tmp, path + ".json")
+
+def load_fragment(path, check=False):
+	lib = gdstk.read_gds(path)
+	with open(path + ".json") as f:
+		data = json.load(f)
+	value = data["value"]
+	for key, cells in data["cell_data"].items():
+		for name, d in cells.items():
+			CELL_DATA[key][1](name, d)
+	return decode_value(value, adopt_cells(lib.cells, keep=fragment_cell_names(value), check=check))
+
+def fragment_cell_names(value):
+	if isinstance(value, dict):
+		if "__cell__" in value:
+			return {value["__cell__"]}
+		return set().union(*[fragment_cell_names(v) for v in value.values()])
+	if isinstance(value, list):
+		return set().union(*[fragment_cell_names(v) for v in value])
+	return set()
+
+def adopt_cells(cells, keep=(), check=False):
+	# replace dependency cells that already live in the design (same name) and register the rest
+	swap = {}
+	for cell in cells:
+		live = None if cell.name in keep else live_cell(cell.name)
+		if check and isinstance(live, gdstk.Cell):
+			assert cell_digest(cell) == cell_digest(live), f"different cells with the same name: {cell.name}"
+		swap[cell.name] = cell if live is None else live
+	for cell in cells:
+		if swap[cell.name] is not cell:
+			continue
+		for ref in cell.references:
+			ref_name = ref.cell if isinstance(ref.cell, str) else ref.cell.name
+			if ref_name in swap and swap[ref_name] is not ref.cell:
+				ref.cell = swap[ref_name]
+	register(*swap.values())
+	return swap
+
+def cached_cell(func):
+	@functools.wraps(func)
+	def wrapper(*args, **kwargs):
+		if not CACHE_ENABLED:
+			return func(*args, **kwargs)
+		key = call_key(func, args, kwargs)
+		path = os.path.join(CACHE_DIR, f"{func.__name__}_{key[:20]}.gds")
+		if os.path.exists(path) and os.path.exists(path + ".json"):
+			return load_fragment(path)
+		value = func(*args, **kwargs)
+		for cell in returned_cells(value):
+			register(cell, *cell.dependencies(True))
+		store_fragment(path, value)
+		return value
+	return wrapper
@@ -0,0 +1,347 @@
+# AIST 2025 optical circuit of the layout
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import os
+import sys
+import numpy as np
+import gdstk
+import lib_v8 as lib
+import lib_v8_PORT as lib_PORT
+import lib_v8_LOSS as lib_LOSS
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../sim/amzm"))
+import lib_amzm
+
+# Broadband transmission between the fiber ports (SSC facets, GCs) of a generated chip:
+#
+#   netlist = lib_CIRCUIT.extract(top_cell)           # elements and connections, from the cells
+#   result = lib_CIRCUIT.simulate(netlist, lamb)      # S-parameters of every fiber port pair
+#   rows = lib_CIRCUIT.transmission_table(result)     # insertion loss, extinction, FSR per pair
+#   lib_CIRCUIT.report(rows)
+#
+# Elements (ports from lib_v8_PORT, placed through the hierarchy):
+#   mmi2x2, mmi1x2 AIST_MMI_2x2, AIST_MMI_1x2 (ideal 3 dB splitters, LOSS_MMI)
+#   pin            PIN_structure cells ({cell}_PIN, PIN_L{length}): waveguide + LOSS_PIN on the doped length, phase from phases
+#   ssc, gc        cells with ports facet/wg and opt: LOSS_SSC, LOSS_GC to the fiber port
+#   wg             routes (lib_v8.Route, bend cells) and waveguides (lib_v8.horizontal(), vertical(), slopes) on LAYER_SiWG
+# Other cells are walked into. Ports at the same point (PORT_MAP_TOLERANCE) are connected.
+#
+# Chains of two-port elements are reduced to one link (length, loss and phase summed), so only the
+# MMIs remain in the S-matrix of each sub-circuit, solved for all wavelengths at once:
+#   S = S_ee + S_ei P (1 - S_ii P)^-1 S_ie   (e: external, i: connected ports, P: connections)
+# Unconnected ports are matched (no reflection); only fiber ports are reported.
+
+CIRCUIT_LAYER = lib.LAYER_SiWG
+PIN_TAPER_LENGTH = 62 # um, undoped part of lib_v8.PIN_structure between the ports (tapers and margins)
+LAMBDA = np.linspace(1530e-9, 1565e-9, 1001) # m
+CIRCUIT_MIN_EXTINCTION = 3 # dB, FSR reported above this extinction (interferometers)
+CIRCUIT_FIELDS = ["port_a", "x_a", "y_a", "port_b", "x_b", "y_b", "mmis", "length", "il_dB", "extinction_dB", "fsr_nm"]
+
+class Element:
+	__slots__ = ("name", "kind", "ports", "external", "length", "loss", "phase")
+
+	def __init__(self, name, kind, ports, external=(), length=0.0, loss=0.0, phase=0.0):
+		self.name = name
+		self.kind = kind
+		self.ports = ports           # [Port] in top cell coordinates
+		self.external = set(external) # names of fiber ports (not connected to the layout)
+		self.length = length         # um, two-port elements
+		self.loss = loss             # dB
+		self.phase = phase           # rad
+
+	def __repr__(self):
+		return f"Element({self.name!r}, {self.kind}, {[port.name for port in self.ports]}, length={self.length:g}, loss={self.loss:g})"
+
+class Netlist:
+	def __init__(self):
+		self.elements = []
+		self.counts = {} # cell name -> number of placed elements, for the element names
+		self.connections = []
+		self.conflicts = [] # points with more than two ports
+
+	def add(self, cell_name, kind, ports, **kwargs):
+		k = self.counts.get(cell_name, 0)
+		self.counts[cell_name] = k + 1
+		self.elements.append(Element(f"{cell_name}#{k}", kind, ports, **kwargs))
+
+#-------------------- extraction --------------------#
+
+def placed(port, transforms):
+	# transforms: innermost first, (origin, rotation, magnification, x_reflection)
+	for t in transforms:
+		port = port.transformed(*t)
+	return port
+
+def model(cell):
+	name = lib_PORT.cell_name(cell)
+	names = set(lib_PORT.cell_ports(cell).names())
+	if name == "AIST_MMI_2x2":
+		return "mmi2x2"
+	if name == "AIST_MMI_1x2":
+		return "mmi1x2"
+	if (name.endswith("_PIN") or name.startswith("PIN_L")) and names == {"in", "out"}:
+		return "pin"
+	if names == {"facet", "wg"}:
+		return "ssc"
+	if names == {"opt"}:
+		return "gc"
+	return None
+
+def optical(cell, memo):
+	# cell (or its hierarchy) has waveguides or optical elements
+	name = lib_PORT.cell_name(cell)
+	if name not in memo:
+		memo[name] = False
+		memo[name] = model(cell) is not None or (isinstance(cell, gdstk.Cell) and (
+			len(lib_PORT.cell_routes(cell)) > 0 or len(lib_PORT.cell_waveguides(cell)) > 0 or
+			any(optical(ref.cell, memo) for ref in cell.references)
+		))
+	return memo[name]
+
+def add_model(netlist, cell, kind, transforms, phases):
+	name = lib_PORT.cell_name(cell)
+	ports = [placed(port, transforms) for port in lib_PORT.cell_ports(cell)]
+	if kind in ("mmi2x2", "mmi1x2"):
+		order = ["in0", "in1", "out0", "out1"] if kind == "mmi2x2" else ["in0", "out0", "out1"]
+		ports = sorted(ports, key=lambda port: order.index(port.name))
+		netlist.add(name, kind, ports, loss=lib_LOSS.LOSS_MMI)
+	elif kind == "pin":
+		length = np.hypot(ports[1].x - ports[0].x, ports[1].y - ports[0].y)
+		k = netlist.counts.get(name, 0)
+		netlist.add(name, kind, ports, length=length, loss=lib_LOSS.LOSS_PIN * (length - PIN_TAPER_LENGTH) * 1e-4 + lib_LOSS.LOSS_PROPAGATION * PIN_TAPER_LENGTH * 1e-4, phase=phases.get(f"{name}#{k}", 0.0))
+	elif kind == "ssc":
+		length = np.hypot(ports[1].x - ports[0].x, ports[1].y - ports[0].y)
+		netlist.add(name, kind, ports, external=["facet"], length=length, loss=lib_LOSS.LOSS_SSC)
+	elif kind == "gc":
+		# fiber port at the waveguide end of the grating
+		netlist.add(name, kind, ports + [ports[0].renamed("fiber")], external=["fiber"], loss=lib_LOSS.LOSS_GC)
+
+def walk(netlist, cell, transforms, phases, memo):
+	for info in lib_PORT.cell_routes(cell) + lib_PORT.cell_waveguides(cell):
+		if info.start.layer == CIRCUIT_LAYER:
+			netlist.add(cell.name, "wg", [placed(info.start, transforms), placed(info.end, transforms)], length=info.length, loss=lib_LOSS.route_loss(info.length, info.arcs, 0))
+	for ref in cell.references:
+		if not optical(ref.cell, memo):
+			continue
+		kind = model(ref.cell)
+		offsets = ref.repetition.get_offsets() if ref.repetition.size > 0 else [(0, 0)]
+		for offset in offsets:
+			t = [((ref.origin[0] + offset[0], ref.origin[1] + offset[1]), ref.rotation, ref.magnification, ref.x_reflection)] + transforms
+			if kind is not None:
+				add_model(netlist, ref.cell, kind, t, phases)
+			elif isinstance(ref.cell, gdstk.Cell):
+				walk(netlist, ref.cell, t, phases, memo)
+
+def extract(top_cell, phases=None):
+	# phases: element name ({PIN cell}#{k}) -> phase shift (rad)
+	netlist = Netlist()
+	walk(netlist, top_cell, [], phases or {}, {})
+	points = {}
+	for i, element in enumerate(netlist.elements):
+		for j, port in enumerate(element.ports):
+			if port.name not in element.external and port.layer == CIRCUIT_LAYER:
+				key = (int(np.round(port.x / lib_PORT.PORT_MAP_TOLERANCE)), int(np.round(port.y / lib_PORT.PORT_MAP_TOLERANCE)))
+				points.setdefault(key, []).append((i, j))
+	for key, items in points.items():
+		if len(items) == 2:
+			netlist.connections.append(tuple(items))
+		elif len(items) > 2:
+			netlist.conflicts.append((key[0] * lib_PORT.PORT_MAP_TOLERANCE, key[1] * lib_PORT.PORT_MAP_TOLERANCE))
+	n_models = sum(1 for element in netlist.elements if element.kind != "wg")
+	n_open = sum(len(items) for items in points.values() if len(items) == 1)
+	print(f"[circuit] {top_cell.name}: {len(netlist.elements)} elements ({n_models} devices), {len(netlist.connections)} connections, {n_open} open ports" + (f", {len(netlist.conflicts)} points with more than two ports" if netlist.conflicts else ""))
+	return netlist
+
+#-------------------- reduction --------------------#
+
+class Link:
+	# chain of two-port elements between two terminals (element index, port index)
+	__slots__ = ("ends", "length", "loss", "phase")
+
+	def __init__(self, ends, length, loss, phase):
+		self.ends = ends
+		self.length = length
+		self.loss = loss
+		self.phase = phase
+
+def reduce(netlist):
+	elements = netlist.elements
+	partner = {}
+	for a, b in netlist.connections:
+		partner[a] = b
+		partner[b] = a
+	def multiport(item):
+		return elements[item[0]].kind in ("mmi2x2", "mmi1x2")
+	def follow(item):
+		# from a port of a two-port element, through the chain to the next terminal
+		length, loss, phase = 0.0, 0.0, 0.0
+		seen = set()
+		while True:
+			i, j = item
+			if i in seen:
+				return None, length, loss, phase # loop of two-port elements
+			seen.add(i)
+			element = elements[i]
+			length += element.length
+			loss += element.loss
+			phase += element.phase
+			item = (i, 1 - j if len(element.ports) == 2 else j)
+			nxt = partner.get(item)
+			if nxt is None or multiport(nxt):
+				return (item if nxt is None else nxt), length, loss, phase
+			item = nxt
+	links = {}
+	for i, element in enumerate(elements):
+		for j in range(len(element.ports)):
+			item = (i, j)
+			if multiport(item):
+				nxt = partner.get(item)
+				if nxt is None:
+					continue
+				end, length, loss, phase = (nxt, 0.0, 0.0, 0.0) if multiport(nxt) else follow(nxt)
+			elif item not in partner:
+				end, length, loss, phase = follow(item) # fiber port or open end
+			else:
+				continue
+			if end is not None:
+				key = tuple(sorted([item, end]))
+				links.setdefault(key, Link(key, length, loss, phase))
+	return list(links.values())
+
+#-------------------- S-matrix --------------------#
+
+def mmi_matrix(kind, n_lamb):
+	a = 10**(-lib_LOSS.LOSS_MMI/20) / np.sqrt(2)
+	if kind == "mmi2x2": # in0, in1, out0, out1
+		S = np.zeros((4, 4), dtype=complex)
+		S[2, 0] = S[3, 1] = a
+		S[3, 0] = S[2, 1] = 1j * a
+	else: # in0, out0, out1
+		S = np.zeros((3, 3), dtype=complex)
+		S[1, 0] = S[2, 0] = a
+	S = S + S.T
+	return np.broadcast_to(S, (n_lamb,) + S.shape)
+
+def link_transmission(links, lamb):
+	# (links, lamb)
+	length = np.array([link.length for link in links])[:, None] * 1e-6
+	loss = np.array([link.loss for link in links])[:, None]
+	phase = np.array([link.phase for link in links])[:, None]
+	return 10**(-loss/20) * np.exp(1j*(2*np.pi*lib_amzm.n_eff(lamb[None, :])*length/lamb[None, :] + phase))
+
+def subcircuits(netlist, links):
+	# connected groups of links (through the MMIs): union-find on the terminals
+	parent = {}
+	def find(a):
+		while parent.setdefault(a, a) != a:
+			parent[a] = parent[parent[a]]
+			a = parent[a]
+		return a
+	for link in links:
+		a, b = link.ends
+		for end in (a, b):
+			if netlist.elements[end[0]].kind in ("mmi2x2", "mmi1x2"):
+				parent[find(end)] = find(("mmi", end[0]))
+		parent[find(a)] = find(b)
+	groups = {}
+	for k, link in enumerate(links):
+		groups.setdefault(find(link.ends[0]), []).append(k)
+	return list(groups.values())
+
+def solve(netlist, links, group, t, n_lamb):
+	# S-parameters between the terminals of a sub-circuit that are not MMI ports, (lamb, n, n)
+	blocks, ports = [], [] # ports: terminal of each row of the block-diagonal S
+	mmis = sorted({end[0] for k in group for end in links[k].ends if netlist.elements[end[0]].kind in ("mmi2x2", "mmi1x2")})
+	for i in mmis:
+		blocks.append(mmi_matrix(netlist.elements[i].kind, n_lamb))
+		ports += [("mmi", (i, j)) for j in range(len(netlist.elements[i].ports))]
+	for k in group:
+		S = np.zeros((n_lamb, 2, 2), dtype=complex)
+		S[:, 0, 1] = S[:, 1, 0] = t[k]
+		blocks.append(S)
+		ports += [("link", end) for end in links[k].ends]
+	N = len(ports)
+	S = np.zeros((n_lamb, N, N), dtype=complex)
+	n = 0
+	for block in blocks:
+		m = block.shape[-1]
+		S[:, n:n+m, n:n+m] = block
+		n += m
+	index = {port: n for n, port in enumerate(ports) if port[0] == "mmi"}
+	pairs = [(n, index[("mmi", port[1])]) for n, port in enumerate(ports) if port[0] == "link" and ("mmi", port[1]) in index]
+	internal = sorted([n for pair in pairs for n in pair])
+	external = [n for n in range(N) if n not in set(internal) and ports[n][0] == "link"]
+	if len(internal) == 0:
+		return [ports[n][1] for n in external], S[:, external][:, :, external], len(mmis)
+	pos = {n: k for k, n in enumerate(internal)}
+	P = np.zeros((len(internal), len(internal)))
+	for a, b in pairs:
+		P[pos[a], pos[b]] = P[pos[b], pos[a]] = 1
+	S_ee = S[:, external][:, :, external]
+	S_ei = S[:, external][:, :, internal]
+	S_ie = S[:, internal][:, :, external]
+	S_ii = S[:, internal][:, :, internal]
+	X = np.linalg.solve(np.eye(len(internal)) - S_ii @ P, S_ie)
+	return [ports[n][1] for n in external], S_ee + S_ei @ P @ X, len(mmis)
+
+class Result:
+	def __init__(self, netlist, lamb):
+		self.netlist = netlist
+		self.lamb = lamb
+		self.pairs = []   # (port a, port b, number of MMIs, waveguide length of the sub-circuit)
+		self.values = []  # (lamb,) transmission
+
+	def port_name(self, item):
+		element = self.netlist.elements[item[0]]
+		return f"{element.name}.{element.ports[item[1]].name}"
+
+	def port_point(self, item):
+		return self.netlist.elements[item[0]].ports[item[1]].point
+
+	def spectrum(self):
+		# lib_amzm.Spectrum, dims ("pair", "lamb")
+		return lib_amzm.Spectrum(np.array(self.values).reshape(-1, len(self.lamb)), ("pair", "lamb"), {"pair": np.arange(len(self.pairs)), "lamb": self.lamb})
+
+def simulate(netlist, lamb=LAMBDA):
+	lamb = np.asarray(lamb, dtype=float)
+	links = reduce(netlist)
+	t = link_transmission(links, lamb)
+	result = Result(netlist, lamb)
+	for group in subcircuits(netlist, links):
+		terminals, S, n_mmi = solve(netlist, links, group, t, len(lamb))
+		fiber = [k for k, item in enumerate(terminals) if netlist.elements[item[0]].ports[item[1]].name in netlist.elements[item[0]].external]
+		length = sum(links[k].length for k in group)
+		for a in range(len(fiber)):
+			for b in range(a + 1, len(fiber)):
+				T = np.abs(S[:, fiber[b], fiber[a]])**2
+				if T.max() > lib_amzm.T_FLOOR: # no path between the ports (ex. both inputs of an MMI)
+					result.pairs.append((terminals[fiber[a]], terminals[fiber[b]], n_mmi, length))
+					result.values.append(T)
+	print(f"[circuit] {len(links)} links, {len(result.pairs)} fiber port pairs, {len(lamb)} wavelengths")
+	return result
+
+#-------------------- tables --------------------#
+
+def transmission_table(result):
+	spec = result.spectrum()
+	peak = spec.dB().values.max(axis=-1) if len(result.pairs) else []
+	extinction = spec.extinction().values if len(result.pairs) else []
+	fsr = spec.fsr().values if len(result.pairs) else []
+	ret = []
+	for k, (a, b, n_mmi, length) in enumerate(result.pairs):
+		(x_a, y_a), (x_b, y_b) = result.port_point(a), result.port_point(b)
+		ret.append({
+			"port_a": result.port_name(a), "x_a": round(x_a, 3), "y_a": round(y_a, 3),
+			"port_b": result.port_name(b), "x_b": round(x_b, 3), "y_b": round(y_b, 3),
+			"mmis": n_mmi, "length": round(length, 3),
+			"il_dB": round(-peak[k], 4), "extinction_dB": round(extinction[k], 2),
+			"fsr_nm": round(fsr[k]*1e9, 4) if extinction[k] > CIRCUIT_MIN_EXTINCTION and not np.isnan(fsr[k]) else "",
+		})
+	return ret
+
+def report(rows):
+	print(f"[circuit] {'port a':<28} {'port b':<28} {'MMIs':>4} {'IL':>8} {'extinction':>10} {'FSR':>9}")
+	for row in rows:
+		fsr = f"{row['fsr_nm']:.3f}nm" if row["fsr_nm"] != "" else ""
+		print(f"[circuit] {row['port_a']:<28} {row['port_b']:<28} {row['mmis']:>4} {row['il_dB']:>6.2f}dB {row['extinction_dB']:>8.1f}dB {fsr:>9}")
@@ -0,0 +1,585 @@
+# AIST 2025 routing DRC
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import os
+import json
+import hashlib
+import numpy as np
+import gdstk
+import lib_v8 as lib
+import lib_v8_CACHE as lib_CACHE
+import lib_v8_PORT as lib_PORT
+
+# Waveguide DRC on one layer of a (flattened) cell:
+#   - spacing: edges of different nets closer than spacing (default routing_wg_pitch - wg_width)
+#   - crossing: polygons cutting each other into pieces
+#   - contact: a route touching or overlapping another polygon away from a joint
+# Each registered route (lib_v8_PORT.ROUTES, WAVEGUIDES: one path per route) is its own net. A route connects
+# only at a joint, where one of its ends meets the end of another route or a port of the cell it touches
+# (bend next to straight, waveguide ending in an MMI); a route running along or into the side of another
+# polygon is a contact violation. Other polygons (device geometry) touching or overlapping are one net.
+# Polygons are indexed in a uniform grid, only polygons with close bounding boxes are compared
+# (gdstk boolean of the polygons grown by spacing/2).
+#
+# The check runs over the hierarchy, each unique cell once (see check_cell).
+# PDK cells (gdstk.RawCell) are not expanded: the devices are checked by the foundry and reading them
+# would parse the whole PDK file. A PDK cell stands in as the box of its registered ports on the layer
+# (with stubs of the port width into the cell), so the routes ending at its ports are one net.
+#
+# Layer rules (width, spacing, enclosure) are listed in DRC_RULES and checked all at once.
+#
+# ex) violations = lib_DRC.check_layer(top_cell, lib.LAYER_SiWG)
+#     violations = lib_DRC.check_rules(top_cell) # whole rule deck
+#     lib_DRC.report(violations, top_cell)        # prints and adds markers on LAYER_DRC
+#     lib_DRC.self_check()                        # regression cases of the routing check
+
+LAYER_DRC = 1000        # marker layer
+DRC_spacing = lib.routing_wg_pitch - lib.wg_width
+DRC_grid = 50           # um, pitch of the polygon index
+DRC_precision = 1e-3    # um
+DRC_touch = 1e-2        # um, polygons closer than this are connected
+DRC_max_points = 100    # polygons are compared in pieces of at most this many points
+
+#-------------------- polygons --------------------#
+
+def port_box(cell, layer):
+	# stand-in of a PDK cell: box of its ports on layer, each port extended by its width into the cell
+	points = []
+	for port in lib_PORT.cell_ports(cell):
+		if port.layer != layer:
+			continue
+		c, s = np.cos(port.angle), np.sin(port.angle)
+		for u, v in ((0, -0.5), (0, 0.5), (-1, -0.5), (-1, 0.5)):
+			points.append((port.x + port.width * (u*c - v*s), port.y + port.width * (u*s + v*c)))
+	if len(points) == 0:
+		return []
+	points = np.array(points)
+	return [gdstk.rectangle(points.min(axis=0), points.max(axis=0), layer=layer)]
+
+def own_shapes(cell, layer):
+	# polygons of the cell itself, without references: [(polygon, route, ends)]
+	#   route: the path of a registered route, ends: its two ends (other polygons: the ports of the cell)
+	ports = np.array([port.point for port in lib_PORT.cell_ports(cell) if port.layer == layer]).reshape(-1, 2)
+	if isinstance(cell, gdstk.RawCell):
+		return [(p, False, ports) for p in port_box(cell, layer)]
+	registered = set()
+	for info in lib_PORT.cell_routes(cell) + lib_PORT.cell_waveguides(cell):
+		registered.add(tuple(np.round(np.r_[info.start.point, info.end.point], 3)))
+	ret = [(p, False, ports) for p in cell.polygons if p.layer == layer and p.datatype == 0]
+	for path in cell.paths:
+		spine = path.spine()
+		ends = np.array([spine[0], spine[-1]])
+		route = tuple(np.round(ends.ravel(), 3)) in registered
+		ret += [(p, route, ends if route else ports) for p in path.to_polygons() if p.layer == layer and p.datatype == 0]
+	for p in [p for p, *_ in ret if p.repetition.size > 0]:
+		p = p.copy()
+		ret += [(q, False, ports) for q in p.apply_repetition()]
+	return ret
+
+def own_polygons(cell, layer):
+	return [p for p, *_ in own_shapes(cell, layer)]
+
+def flat_polygons(cell, layer):
+	ret = own_polygons(cell, layer)
+	if isinstance(cell, gdstk.RawCell):
+		return ret
+	for ref in cell.references:
+		polys = flat_polygons(ref.cell, layer)
+		if len(polys) == 0:
+			continue
+		for offset in repetition_offsets(ref):
+			for p in polys:
+				p = p.copy()
+				p.transform(ref.magnification, ref.x_reflection, ref.rotation, (ref.origin[0] + offset[0], ref.origin[1] + offset[1]))
+				ret.append(p)
+	return ret
+
+def repetition_offsets(ref):
+	if ref.repetition.size == 0:
+		return np.zeros((1, 2))
+	return ref.repetition.get_offsets()
+
+#-------------------- grid --------------------#
+
+def bounding_boxes(polygons):
+	return np.array([p.bounding_box() for p in polygons], dtype=float).reshape(-1, 4)
+
+def grid_pairs(boxes, distance, grid):
+	# pairs (i < j) of boxes closer than distance, found through a uniform grid of pitch grid
+	# each box is entered in all grid cells it covers (grown by distance/2); a pair is kept only
+	# in the grid cell holding the corner of the overlap of both boxes, so no pair is reported twice
+	lo = np.floor((boxes[:, :2] - distance/2) / grid).astype(np.int64)
+	hi = np.floor((boxes[:, 2:] + distance/2) / grid).astype(np.int64)
+	nx, ny = hi[:, 0] - lo[:, 0] + 1, hi[:, 1] - lo[:, 1] + 1
+	count = nx * ny
+	index = np.repeat(np.arange(len(boxes)), count)
+	k = np.arange(len(index)) - np.repeat(np.cumsum(count) - count, count)
+	gx = lo[index, 0] + k % nx[index]
+	gy = lo[index, 1] + k // nx[index]
+	if len(index) == 0:
+		return np.zeros((0, 2), dtype=int)
+	key = (gx - gx.min()) * (gy.max() - gy.min() + 1) + (gy - gy.min())
+	order = np.argsort(key, kind="stable")
+	key, index, gx, gy = key[order], index[order], gx[order], gy[order]
+	# all pairs inside each grid cell
+	starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+	ends = np.r_[starts[1:], len(key)]
+	partners = np.repeat(ends, ends - starts) - np.arange(len(key)) - 1
+	first = np.repeat(np.arange(len(key)), partners)
+	second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(partners) - partners, partners)
+	a, b = index[first], index[second]
+	home = (np.maximum(lo[a, 0], lo[b, 0]) == gx[first]) & (np.maximum(lo[a, 1], lo[b, 1]) == gy[first])
+	a, b = a[home], b[home]
+	near = (
+		(boxes[a, 0] - distance <= boxes[b, 2]) & (boxes[b, 0] - distance <= boxes[a, 2]) &
+		(boxes[a, 1] - distance <= boxes[b, 3]) & (boxes[b, 1] - distance <= boxes[a, 3])
+	)
+	return np.sort(np.stack((a[near], b[near]), axis=1), axis=1)
+
+def segment_distance(e, f):
+	# distance between segments e[i] and f[i] (x0, y0, x1, y1), 0 when they cross
+	def point_segment(p, s):
+		d = s[:, 2:] - s[:, :2]
+		t = np.clip(np.sum((p - s[:, :2]) * d, axis=1) / np.maximum(np.sum(d*d, axis=1), 1e-300), 0, 1)
+		return np.hypot(*(s[:, :2] + d*t[:, None] - p).T)
+	ret = np.minimum.reduce([
+		point_segment(e[:, :2], f), point_segment(e[:, 2:], f),
+		point_segment(f[:, :2], e), point_segment(f[:, 2:], e),
+	])
+	def cross(o, a, b):
+		return (a[:, 0] - o[:, 0]) * (b[:, 1] - o[:, 1]) - (a[:, 1] - o[:, 1]) * (b[:, 0] - o[:, 0])
+	d1, d2 = cross(f[:, :2], f[:, 2:], e[:, :2]), cross(f[:, :2], f[:, 2:], e[:, 2:])
+	d3, d4 = cross(e[:, :2], e[:, 2:], f[:, :2]), cross(e[:, :2], e[:, 2:], f[:, 2:])
+	ret[(d1*d2 < 0) & (d3*d4 < 0)] = 0
+	return ret
+
+def polygon_distance(p, q, box):
+	# minimum distance between the edges of p and q inside box (x0, y0, x1, y1)
+	def edges(poly):
+		e = np.hstack((poly.points, np.roll(poly.points, -1, axis=0)))
+		inside = (
+			(np.maximum(e[:, 0], e[:, 2]) >= box[0]) & (np.minimum(e[:, 0], e[:, 2]) <= box[2]) &
+			(np.maximum(e[:, 1], e[:, 3]) >= box[1]) & (np.minimum(e[:, 1], e[:, 3]) <= box[3])
+		)
+		return e[inside]
+	e, f = edges(p), edges(q)
+	if len(e) == 0 or len(f) == 0:
+		return np.inf
+	i, j = np.meshgrid(np.arange(len(e)), np.arange(len(f)), indexing="ij")
+	return segment_distance(e[i.ravel()], f[j.ravel()]).min()
+
+#-------------------- nets --------------------#
+
+def find(parent, i):
+	while parent[i] != i:
+		parent[i] = parent[parent[i]]
+		i = parent[i]
+	return i
+
+def union(parent, i, j):
+	i, j = find(parent, i), find(parent, j)
+	if i != j:
+		parent[max(i, j)] = min(i, j)
+
+def cuts(p, q):
+	# True when q cuts p into several pieces (q crosses p)
+	return len(gdstk.boolean(p, q, "not", precision=DRC_precision)) > 1
+
+#-------------------- check --------------------#
+
+def fractured(polygons):
+	# long routes are compared piece by piece, owner: polygon of each piece
+	pieces, owner = [], []
+	for k, p in enumerate(polygons):
+		f = p.fracture(max_points=DRC_max_points, precision=DRC_precision)
+		pieces += f
+		owner += [k] * len(f)
+	return pieces, np.array(owner, dtype=int)
+
+def region_box(region):
+	box = bounding_boxes(region)
+	return np.r_[box[:, :2].min(axis=0), box[:, 2:].max(axis=0)]
+
+def grown_piece(piece, d):
+	return gdstk.offset(piece, d, join="round", tolerance=DRC_precision, precision=DRC_precision)
+
+def joint(p, q, box):
+	# an end/port of p meets one of q inside box
+	p = p[(p[:, 0] >= box[0]) & (p[:, 0] <= box[2]) & (p[:, 1] >= box[1]) & (p[:, 1] <= box[3])]
+	if len(p) == 0 or len(q) == 0:
+		return False
+	return np.hypot(p[:, None, 0] - q[None, :, 0], p[:, None, 1] - q[None, :, 1]).min() < DRC_touch
+
+def compare(pieces, owner, polygons, spacing, routes, ends, groups=None, grow=None, grid=DRC_grid):
+	# close pairs of pieces of different polygons (of different groups, when given):
+	#   touching [(i, j)], crossings [(i, j, point, area)], close [(i, j, point, distance)], contacts [(i, j, point, length)]
+	# routes, ends: of each polygon (see own_shapes), grow(i, d): piece i grown by d, when the caller keeps them (FlatCell.grow)
+	touching, crossings, close, contacts = [], [], [], []
+	if len(pieces) == 0:
+		return touching, crossings, close, contacts
+	pairs = grid_pairs(bounding_boxes(pieces), spacing, grid)
+	pairs = pairs[owner[pairs[:, 0]] != owner[pairs[:, 1]]]
+	if groups is not None:
+		pairs = pairs[groups[pairs[:, 0]] != groups[pairs[:, 1]]]
+	cut = {}
+	if grow is None:
+		grown = {}
+		def grow(i, d):
+			if (i, d) not in grown:
+				grown[(i, d)] = grown_piece(pieces[i], d)
+			return grown[(i, d)]
+	d = spacing/2 - 2*DRC_precision
+	for i, j in pairs.tolist():
+		a, b = owner[i], owner[j]
+		touch = gdstk.boolean(grow(i, DRC_touch/2), grow(j, DRC_touch/2), "and", precision=DRC_precision)
+		if touch:
+			# touching (bend next to straight, waveguide ending in an MMI) unless one polygon cuts the other into pieces
+			if (a, b) not in cut:
+				cut[(a, b)] = cuts(polygons[a], polygons[b]) or cuts(polygons[b], polygons[a])
+			if not cut[(a, b)]:
+				box = region_box(touch)
+				if not (routes[a] or routes[b]) or joint(ends[a], ends[b], np.r_[box[:2] - DRC_touch, box[2:] + DRC_touch]):
+					touching.append((i, j))
+				else:
+					contacts.append((i, j, ((box[:2] + box[2:]) / 2).tolist(), float((box[2:] - box[:2]).max())))
+				continue
+			region = gdstk.boolean(pieces[i], pieces[j], "and", precision=DRC_precision)
+			if region:
+				box = region_box(region)
+				crossings.append((i, j, ((box[:2] + box[2:]) / 2).tolist(), sum(p.area() for p in region)))
+			continue
+		# grown by spacing/2, the pieces overlap when they are closer than spacing
+		region = gdstk.boolean(grow(i, d), grow(j, d), "and", precision=DRC_precision)
+		if region:
+			box = region_box(region)
+			distance = polygon_distance(pieces[i], pieces[j], np.r_[box[:2] - spacing, box[2:] + spacing])
+			close.append((i, j, ((box[:2] + box[2:]) / 2).tolist(), float(distance)))
+	return touching, crossings, close, contacts
+
+def net_violations(crossings, close, net, layer):
+	# net: piece -> net, with the touching pieces already merged (contacts do not depend on the nets)
+	ret = []
+	for i, j, point, area in crossings:
+		if net(i) != net(j):
+			ret.append({"rule": "crossing", "layer": layer, "point": point, "value": area, "pieces": [i, j]})
+	for i, j, point, distance in close:
+		if net(i) != net(j):
+			ret.append({"rule": "spacing", "layer": layer, "point": point, "value": distance, "pieces": [i, j]})
+	return ret
+
+def contact_violations(contacts, layer):
+	return [{"rule": "contact", "layer": layer, "point": point, "value": length, "pieces": [i, j]} for i, j, point, length in contacts]
+
+def check_polygons(polygons, layer, spacing=DRC_spacing, routes=None, ends=None):
+	# routes, ends: of each polygon (see own_shapes), default: no routes (touching polygons are one net)
+	if routes is None:
+		routes, ends = np.zeros(len(polygons), dtype=bool), [np.zeros((0, 2))] * len(polygons)
+	pieces, owner = fractured(polygons)
+	touching, crossings, close, contacts = compare(pieces, owner, polygons, spacing, routes, ends)
+	parent = list(range(len(polygons)))
+	for i, j in touching:
+		union(parent, owner[i], owner[j])
+	return net_violations(crossings, close, lambda i: find(parent, owner[i]), layer) + contact_violations(contacts, layer)
+
+#-------------------- hierarchy --------------------#
+# Violations inside a cell are found once per unique cell (lib_v8_CACHE.cell_digest) and moved to
+# every place the cell is used (kept only if the parent does not connect their nets).
+# In the parent cell only the interactions are compared, in one compare over the flattened pieces of the
+# cell (FlatCell) where pairs inside the same instance are skipped:
+#   - own polygons of the cell against each other
+#   - own polygons against references, references against each other
+# The pieces grown for the comparison are kept with the FlatCell and placed in the parents, so each piece
+# of a unique cell is grown once.
+# Nets are carried up: each cell keeps the net of every piece of its flattened geometry, the parent
+# merges the nets of its references through the touching pieces found in the interactions.
+# Results are kept in DRC_RESULTS and, with the cell cache enabled, in lib_v8_CACHE.CACHE_DIR.
+
+DRC_FORMAT = 3   # version of the stored results, part of the key
+DRC_RESULTS = {} # key -> {"violations": in cell coordinates, with the flat pieces, "nets": net of each flat piece}
+DRC_FLAT = {}    # (cell digest, layer) -> FlatCell
+
+def transform_points(points, origin=(0, 0), rotation=0, magnification=1, x_reflection=False):
+	# same order as gdstk.Reference: reflection, magnification, rotation, translation
+	points = np.array(points, dtype=float).reshape(-1, 2)
+	if x_reflection:
+		points[:, 1] *= -1
+	c, s = np.cos(rotation), np.sin(rotation)
+	return np.stack((
+		origin[0] + magnification * (c*points[:, 0] - s*points[:, 1]),
+		origin[1] + magnification * (s*points[:, 0] + c*points[:, 1]),
+	), axis=1)
+
+class FlatCell:
+	# flattened geometry of a cell on one layer: own pieces first, then the pieces of each instance
+	# groups: -1 - polygon for own pieces, k for the pieces of instance k (starting at starts[k])
+	# routes, ends: of each polygon (see own_shapes)
+	def __init__(self, polygons, routes, ends, pieces, owner, groups, own, instances, starts):
+		self.polygons = polygons
+		self.routes = routes
+		self.ends = ends
+		self.pieces = pieces
+		self.owner = owner
+		self.groups = groups
+		self.own = own
+		self.instances = instances
+		self.starts = starts
+		self.grown = {}
+
+	def grow(self, i, d):
+		# pieces of instances are grown once in their cell and placed
+		if (i, d) not in self.grown:
+			k = self.groups[i]
+			inst = self.instances[k] if k >= 0 else None
+			if inst is None or inst.ref.magnification != 1:
+				self.grown[(i, d)] = grown_piece(self.pieces[i], d)
+			else:
+				self.grown[(i, d)] = [inst.place(p) for p in inst.flat.grow(i - self.starts[k], d)]
+		return self.grown[(i, d)]
+
+def flat_cell(cell, layer, memo):
+	key = (lib_CACHE.cell_digest(cell, memo), layer)
+	if key not in DRC_FLAT:
+		shapes = own_shapes(cell, layer)
+		polygons = [p for p, _, _ in shapes]
+		routes = np.array([route for _, route, _ in shapes], dtype=bool)
+		ends = [e for _, _, e in shapes]
+		pieces, owner = fractured(polygons)
+		groups = -1 - owner
+		insts = instances(cell, layer, memo)
+		starts = []
+		for k, inst in enumerate(insts):
+			starts.append(len(pieces))
+			owner = np.r_[owner, inst.flat.owner + len(polygons)]
+			groups = np.r_[groups, np.full(len(inst.flat.pieces), k)]
+			polygons = polygons + [inst.place(p) for p in inst.flat.polygons]
+			routes = np.r_[routes, inst.flat.routes]
+			ends = ends + [inst.place_points(e) for e in inst.flat.ends]
+			pieces = pieces + [inst.place(p) for p in inst.flat.pieces]
+		DRC_FLAT[key] = FlatCell(polygons, routes, ends, pieces, owner, groups, len(shapes), insts, starts)
+	return DRC_FLAT[key]
+
+class Instance:
+	# one placement of a cell (one element of an array reference) in the parent cell
+	def __init__(self, ref, offset, flat):
+		self.ref = ref
+		self.origin = (float(ref.origin[0] + offset[0]), float(ref.origin[1] + offset[1]))
+		self.flat = flat
+
+	def place(self, polygon):
+		ret = polygon.copy()
+		ret.transform(self.ref.magnification, self.ref.x_reflection, self.ref.rotation, self.origin)
+		return ret
+
+	def place_points(self, points):
+		return transform_points(points, self.origin, self.ref.rotation, self.ref.magnification, self.ref.x_reflection)
+
+def instances(cell, layer, memo):
+	ret = []
+	if isinstance(cell, gdstk.RawCell):
+		return ret
+	for ref in cell.references:
+		if isinstance(ref.cell, str):
+			continue
+		flat = flat_cell(ref.cell, layer, memo)
+		if len(flat.pieces) == 0:
+			continue
+		for offset in repetition_offsets(ref):
+			ret.append(Instance(ref, offset, flat))
+	return ret
+
+def drc_key(cell, layer, spacing, memo):
+	return hashlib.sha1(f"drc {DRC_FORMAT}:{lib_CACHE.cell_digest(cell, memo)}:{layer}:{spacing:.9g}".encode()).hexdigest()
+
+def check_cell(cell, layer, spacing=DRC_spacing, memo=None):
+	if memo is None:
+		memo = {}
+	key = drc_key(cell, layer, spacing, memo)
+	if key in DRC_RESULTS:
+		return DRC_RESULTS[key]
+	path = os.path.join(lib_CACHE.CACHE_DIR, f"drc_{key[:20]}.json")
+	if lib_CACHE.CACHE_ENABLED and os.path.exists(path):
+		with open(path) as f:
+			DRC_RESULTS[key] = json.load(f)
+		return DRC_RESULTS[key]
+	flat = flat_cell(cell, layer, memo)
+	# net of each flat piece: own polygons first, then the nets of each instance
+	piece_net = flat.owner[flat.groups < 0].tolist()
+	count = flat.own
+	crossings, close, contacts = [], [], []
+	for inst in flat.instances:
+		inner = check_cell(inst.ref.cell, layer, spacing, memo)
+		start = len(piece_net)
+		piece_net += [count + n for n in inner["nets"]]
+		count += max(inner["nets"], default=-1) + 1
+		# violations of the instance are checked again: the nets may be connected in this cell
+		for v in inner["violations"]:
+			found = (v["pieces"][0] + start, v["pieces"][1] + start, inst.place_points(v["point"])[0].tolist(), v["value"])
+			{"crossing": crossings, "spacing": close, "contact": contacts}[v["rule"]].append(found)
+	# interactions: all flat pieces in one compare, pairs inside the same instance are skipped (found in the instance)
+	touching, more_crossings, more_close, more_contacts = compare(
+		flat.pieces, flat.owner, flat.polygons, spacing, flat.routes, flat.ends, groups=flat.groups, grow=flat.grow,
+	)
+	parent = list(range(count))
+	for i, j in touching:
+		union(parent, piece_net[i], piece_net[j])
+	net = lambda i: find(parent, piece_net[i])
+	nets = {}
+	DRC_RESULTS[key] = {
+		"violations": net_violations(crossings + more_crossings, close + more_close, net, layer) + contact_violations(contacts + more_contacts, layer),
+		"nets": [nets.setdefault(find(parent, n), len(nets)) for n in piece_net],
+	}
+	if lib_CACHE.CACHE_ENABLED:
+		os.makedirs(lib_CACHE.CACHE_DIR, exist_ok=True)
+		with open(path + f".{os.getpid()}", "w") as f:
+			json.dump(DRC_RESULTS[key], f)
+		os.replace(path + f".{os.getpid()}", path)
+	return DRC_RESULTS[key]
+
+def unique_violations(violations):
+	# one violation per rule and place, without the piece indices
+	ret, seen = [], set()
+	for v in violations:
+		key = (v["rule"], v["layer"], round(v["point"][0], 3), round(v["point"][1], 3))
+		if key not in seen:
+			seen.add(key)
+			ret.append({k: v[k] for k in ("rule", "layer", "point", "value")})
+	return ret
+
+def check_layer(cell, layer, spacing=DRC_spacing, hierarchical=True):
+	if hierarchical:
+		return unique_violations(check_cell(cell, layer, spacing)["violations"])
+	flat = flat_cell(cell, layer, {})
+	return unique_violations(check_polygons(flat.polygons, layer, spacing, flat.routes, flat.ends))
+
+#-------------------- rule deck --------------------#
+# Layer rules, each evaluated with one batch of gdstk offset/boolean over all polygons of the layer:
+#   ("width",     layer, value)        parts of the layer narrower than value
+#   ("spacing",   layer, value)        gaps between shapes of the layer narrower than value
+#   ("enclosure", layer, value, outer) parts of the layer not inside outer by at least value
+#   ("routing",   layer, value)        check_layer(): spacing between nets, crossings and contacts
+# The violation value is the measured one (width: narrow side of the violating part, spacing: distance of
+# the shapes, enclosure: distance of the violating part to the edge of outer, negative outside), the point is
+# the center of the violating region.
+
+DRC_RULES = [
+	("routing",   lib.LAYER_SiWG,   DRC_spacing),
+	("width",     lib.LAYER_MET,    4),                 # label strokes are the narrowest metal
+	("spacing",   lib.LAYER_PW,     4),                 # windows of neighbouring pads (RF_PAD_PITCH - window size > 4)
+	("enclosure", lib.LAYER_PW,     5, lib.LAYER_MET),  # probe window on the pad metal
+	("enclosure", lib.LAYER_NPP,    0, lib.LAYER_NP),
+	("enclosure", lib.LAYER_PPP,    0, lib.LAYER_PP),
+	("enclosure", lib.LAYER_CT2PN,  1, [lib.LAYER_NPP, lib.LAYER_PPP]),
+	("enclosure", lib.LAYER_CT2PN,  0, lib.LAYER_MET),
+	("enclosure", lib.LAYER_CT2TIN, 0, lib.LAYER_TIN),
+	("enclosure", lib.LAYER_CT2TIN, 0, lib.LAYER_MET),
+]
+DRC_area = 1e-3      # um^2, smaller regions are rounding of the offsets
+DRC_tolerance = 1e-2 # um, round corners of the spacing rules
+
+def merged_layer(layers, flat):
+	# union of the polygons of one layer (or a list of layers)
+	layers = layers if isinstance(layers, (list, tuple)) else [layers]
+	polygons = [p for layer in layers for p in flat(layer)]
+	return gdstk.boolean(polygons, [], "or", precision=DRC_precision)
+
+def narrow_side(polygon):
+	box = np.array(polygon.bounding_box())
+	return float((box[1] - box[0]).min())
+
+def enclosure_distance(polygon, outer):
+	# smallest distance of the points of polygon to the edges of outer, negative for points outside outer
+	points = polygon.points
+	edges = np.vstack([np.hstack((q.points, np.roll(q.points, -1, axis=0))) for q in outer]).reshape(-1, 4)
+	if len(edges) == 0:
+		return -np.inf
+	i, j = np.meshgrid(np.arange(len(points)), np.arange(len(edges)), indexing="ij")
+	p = points[i.ravel()]
+	distance = segment_distance(np.hstack((p, p)), edges[j.ravel()]).reshape(len(points), len(edges)).min(axis=1)
+	sign = np.where(gdstk.inside(points, outer), 1, -1)
+	return float((sign * distance).min())
+
+def region_violations(region, rule, layer, measure):
+	# measure: violating polygon -> measured value
+	ret = []
+	for p in region:
+		if p.area() > DRC_area:
+			box = np.array(p.bounding_box())
+			ret.append({"rule": rule, "layer": layer, "point": ((box[0] + box[1]) / 2).tolist(), "value": measure(p)})
+	return ret
+
+def check_rule(cell, rule, flat):
+	kind, layer, value = rule[:3]
+	if kind == "routing":
+		return check_layer(cell, layer, value)
+	shapes = merged_layer(layer, flat)
+	if not shapes:
+		return []
+	if kind == "width":
+		# opening: what is left after shrinking and growing back by value/2 is wide enough (shapes at the rule width stay)
+		d = value/2 - DRC_precision
+		opened = gdstk.offset(gdstk.offset(shapes, -d, join="miter", precision=DRC_precision), d, join="miter", precision=DRC_precision)
+		return region_violations(gdstk.boolean(shapes, opened, "not", precision=DRC_precision), kind, layer, narrow_side)
+	elif kind == "spacing":
+		# shapes grown by value/2 overlap when they are closer than value (close pairs from the grid)
+		d = value/2 - DRC_precision
+		pairs = grid_pairs(bounding_boxes(shapes), value, DRC_grid).tolist()
+		grown = {}
+		for k in set(k for pair in pairs for k in pair):
+			grown[k] = gdstk.offset(shapes[k], d, join="round", tolerance=DRC_tolerance, precision=DRC_precision)
+		ret = []
+		for i, j in pairs:
+			region = gdstk.boolean(grown[i], grown[j], "and", precision=DRC_precision)
+			ret += region_violations(region, kind, layer, lambda p: float(polygon_distance(shapes[i], shapes[j], np.r_[np.ravel(p.bounding_box()) + [-value, -value, value, value]])))
+		return ret
+	elif kind == "enclosure":
+		outer = merged_layer(rule[3], flat)
+		inner = outer
+		if value > 0:
+			inner = gdstk.offset(outer, -value + DRC_precision, join="miter", precision=DRC_precision)
+		region = gdstk.boolean(shapes, inner, "not", precision=DRC_precision)
+		return region_violations(region, kind, layer, lambda p: enclosure_distance(p, outer))
+	assert False, f"unknown rule: {kind}"
+
+def check_rules(cell, rules=DRC_RULES):
+	# all rules of the deck over the flattened cell, every violation at once
+	layers = {}
+	def flat(layer):
+		if layer not in layers:
+			layers[layer] = flat_polygons(cell, layer)
+		return layers[layer]
+	violations = []
+	for rule in rules:
+		violations += check_rule(cell, rule, flat)
+	return violations
+
+def report(violations, cell=None, marker_size=2):
+	for v in violations:
+		print(f"[drc] {v['rule']} L{v['layer']} at ({v['point'][0]:.3f}, {v['point'][1]:.3f}): {v['value']:.3f}")
+	print(f"[drc] {len(violations)} violations")
+	if cell is not None:
+		for v in violations:
+			x, y = v["point"]
+			cell.add(gdstk.rectangle((x - marker_size, y - marker_size), (x + marker_size, y + marker_size), layer=LAYER_DRC, datatype=0))
+	return violations
+
+#-------------------- self check --------------------#
+# routes that touch without a joint must be reported, flat and over the hierarchy
+
+def self_check(layer=lib.LAYER_SiWG):
+	w = lib.wg_width
+	def rules(name, *routes):
+		cell = gdstk.Cell(f"DRC_CHECK_{name}")
+		for route in routes:
+			route.commit(cell)
+		top = gdstk.Cell(f"DRC_CHECK_{name}_TOP")
+		top.add(gdstk.Reference(cell))
+		ret = sorted(v["rule"] for v in check_layer(cell, layer, hierarchical=False))
+		assert ret == sorted(v["rule"] for v in check_layer(top, layer)), f"self_check(): {name}: flat and hierarchical differ"
+		return ret
+	# joint: the second route starts at the end of the first one
+	assert rules("joint", lib.Route((0, 0), layer).h(50), lib.Route((50, 0), layer).h(50).ru().v(50)) == [], "self_check(): joint"
+	# parallel overlap: neighbouring route 0.2 um into the first one
+	assert rules("overlap", lib.Route((0, 0), layer).h(100), lib.Route((20, w - 0.2), layer).h(100)) == ["contact"], "self_check(): parallel overlap"
+	# T-junction: route ending on the side of another one
+	assert rules("T", lib.Route((0, 0), layer).h(100), lib.Route((50, 50), layer).v(-50 + w/2)) == ["contact"], "self_check(): T-junction"
@@ -0,0 +1,72 @@
+# AIST 2025 optical loss budget
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import csv
+import lib_v8_PORT as lib_PORT
+
+# Expected insertion loss from the route tally (lib_v8.Route -> lib_v8_PORT.RouteInfo):
+#
+#   loss = LOSS_PROPAGATION * length + LOSS_BEND[radius] * arcs + LOSS_CROSSING * crossings (+ LOSS_SSC per SSC port)
+#
+#   rows = lib_LOSS.route_table(top_cell)            # one row per route
+#   lib_LOSS.write_table(rows, "AIST2025_CR_v8_routes.csv")
+#   port_rows = lib_LOSS.port_losses(lib_PORT.port_map(top_cell, "ssc_right"))  # + loss_dB per SSC port
+#
+# The loss values are design estimates, to be replaced with the measured values of the run.
+
+LOSS_PROPAGATION = 2.0             # dB/cm, strip waveguide (wg_width)
+LOSS_BEND = {10: 0.01, 2.5: 0.05}  # dB per 90 degree arc, by radius (um)
+LOSS_BEND_DEFAULT = 0.05           # dB per 90 degree arc, other radii
+LOSS_CROSSING = 0.2                # dB per waveguide crossing
+LOSS_SSC = 1.5                     # dB per SSC (fiber to waveguide)
+LOSS_GC = 5.0                      # dB per GC (fiber to waveguide), lib_v8_CIRCUIT
+LOSS_MMI = 0.3                     # dB excess loss per MMI, lib_v8_CIRCUIT
+LOSS_PIN = 5.0                     # dB/cm, doped section of the PIN phase shifter (no bias), lib_v8_CIRCUIT
+
+ROUTE_TABLE_FIELDS = ["cell", "start_x", "start_y", "end_x", "end_y", "length", "straight", "arc", "bends", "arcs", "crossings", "loss_dB"]
+
+def route_loss(length, arcs, crossings):
+	# dB; length in um, arcs: radius -> number of 90 degree arcs
+	ret = LOSS_PROPAGATION * length * 1e-4
+	for radius, n in arcs.items():
+		ret += n * LOSS_BEND.get(radius, LOSS_BEND_DEFAULT)
+	return ret + LOSS_CROSSING * crossings
+
+def parse_arcs(text):
+	# lib_PORT.arcs_text() -> {radius: n}
+	return {float(item[1:].split(":")[0]): int(item.split(":")[1]) for item in text.split()}
+
+def route_table(top_cell):
+	ret = []
+	for name, info in lib_PORT.top_routes(top_cell):
+		ret.append({
+			"cell": name,
+			"start_x": round(info.start.x, 3), "start_y": round(info.start.y, 3),
+			"end_x": round(info.end.x, 3), "end_y": round(info.end.y, 3),
+			"length": round(info.length, 3), "straight": round(info.straight, 3), "arc": round(info.arc_length, 3),
+			"bends": info.bends, "arcs": lib_PORT.arcs_text(info.arcs), "crossings": info.crossings,
+			"loss_dB": round(route_loss(info.length, info.arcs, info.crossings), 4),
+		})
+	return ret
+
+def port_losses(port_rows):
+	# expected insertion loss from the SSC facet to the device port
+	for row in port_rows:
+		row["loss_dB"] = round(LOSS_SSC + route_loss(row["length"], parse_arcs(row["arcs"]), row["crossings"]), 4)
+	return port_rows
+
+def write_table(rows, filename, fields=ROUTE_TABLE_FIELDS):
+	with open(filename, "w", newline="") as f:
+		writer = csv.DictWriter(f, fieldnames=fields)
+		writer.writeheader()
+		writer.writerows(rows)
+
+def report(rows):
+	# per route cell: number of routes, longest route, bends, crossings, worst loss
+	cells = {}
+	for row in rows:
+		cells.setdefault(row["cell"], []).append(row)
+	print(f"[routes] {'cell':<24} {'routes':>6} {'max length':>11} {'bends':>6} {'crossings':>9} {'max loss':>9}")
+	for name, cell_rows in cells.items():
+		print(f"[routes] {name:<24} {len(cell_rows):>6} {max(r['length'] for r in cell_rows):>9.1f}um {sum(r['bends'] for r in cell_rows):>6} {sum(r['crossings'] for r in cell_rows):>9} {max(r['loss_dB'] for r in cell_rows):>7.2f}dB")
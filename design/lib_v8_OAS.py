@@ -0,0 +1,130 @@
+# AIST 2025 OASIS export
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import os
+import hashlib
+import numpy as np
+import gdstk
+
+# OASIS copy of a written GDS (chip or merged library):
+#
+#   lib_OAS.write_oas("AIST2025_CR_v8.gds", "AIST2025_CR_v8.oas")
+#   lib_OAS.check_oas("AIST2025_CR_v8.gds", "AIST2025_CR_v8.oas")
+#
+# The GDS is read back (PDK raw cells become normal cells), identical elements of each cell are folded
+# into one element with a gdstk.Repetition, and the library is written with compressed CBLOCKs and
+# rectangle/trapezoid records:
+#   polygons   same layer and shape (in database units)
+#   references same cell, rotation, magnification and reflection
+#   labels     same text, layer and transformation
+# A repetition is a grid (columns x rows) when the offsets fill one, otherwise x, y or explicit offsets.
+#
+# check_oas() compares every cell of the OASIS file with the GDS, element by element with repetitions
+# expanded (polygons independent of the start vertex and orientation, paths as polygons).
+# OASIS texts have no rotation or magnification, so labels are compared by text, layer and position.
+
+OAS_COMPRESSION = 6 # zlib level of the CBLOCKs (0: no compression)
+OAS_MIN_REPETITION = 2
+
+#-------------------- repetitions --------------------#
+
+def repetition(offsets, precision):
+	# offsets: (n, 2) database units, sorted, offsets[0] = (0, 0)
+	xs, ys = np.unique(offsets[:, 0]), np.unique(offsets[:, 1])
+	n = len(offsets)
+	if len(xs)*len(ys) == n and len(np.unique(offsets, axis=0)) == n:
+		dx = np.diff(xs)
+		dy = np.diff(ys)
+		if (len(dx) == 0 or (dx == dx[0]).all()) and (len(dy) == 0 or (dy == dy[0]).all()):
+			return gdstk.Repetition(len(xs), len(ys), spacing=((dx[0] if len(dx) else 0)*precision, (dy[0] if len(dy) else 0)*precision))
+	if len(ys) == 1:
+		return gdstk.Repetition(x_offsets=offsets[1:, 0]*precision)
+	if len(xs) == 1:
+		return gdstk.Repetition(y_offsets=offsets[1:, 1]*precision)
+	return gdstk.Repetition(offsets=offsets[1:]*precision)
+
+def fold_group(cell, group, precision):
+	# group: [(anchor, element)], anchors in database units
+	if len(group) < OAS_MIN_REPETITION:
+		return 0
+	group.sort(key=lambda item: (item[0][1], item[0][0]))
+	anchors = np.array([anchor for anchor, _ in group], dtype=np.int64)
+	base = group[0][1]
+	cell.remove(*[element for _, element in group[1:]])
+	base.repetition = repetition(anchors - anchors[0], precision)
+	return len(group) - 1
+
+def fold_repetitions(cell, precision):
+	# number of elements folded into repetitions
+	groups = {}
+	for poly in cell.polygons:
+		if poly.repetition.size == 0:
+			points = np.round(poly.points / precision).astype(np.int64)
+			key = ("P", poly.layer, poly.datatype, (points - points[0]).tobytes())
+			groups.setdefault(key, []).append((tuple(points[0]), poly))
+	for ref in cell.references:
+		if ref.repetition.size == 0:
+			name = ref.cell if isinstance(ref.cell, str) else ref.cell.name
+			key = ("R", name, round(ref.rotation, 9), round(ref.magnification, 9), ref.x_reflection)
+			groups.setdefault(key, []).append((tuple(np.round(np.array(ref.origin) / precision).astype(np.int64)), ref))
+	for label in cell.labels:
+		if label.repetition.size == 0:
+			key = ("L", label.text, label.layer, label.texttype, label.anchor, round(label.rotation, 9), round(label.magnification, 9), label.x_reflection)
+			groups.setdefault(key, []).append((tuple(np.round(np.array(label.origin) / precision).astype(np.int64)), label))
+	return sum(fold_group(cell, group, precision) for group in groups.values())
+
+def write_oas(gds_file, oas_file):
+	oas_lib = gdstk.read_gds(gds_file)
+	folded = sum(fold_repetitions(cell, oas_lib.precision) for cell in oas_lib.cells)
+	oas_lib.write_oas(oas_file, compression_level=OAS_COMPRESSION, detect_rectangles=True, detect_trapezoids=True)
+	print(f"[oas] {oas_file}: {os.path.getsize(oas_file)/1e3:.0f} kB ({gds_file}: {os.path.getsize(gds_file)/1e3:.0f} kB), {folded} elements in repetitions")
+
+#-------------------- round trip --------------------#
+
+def polygon_key(points, precision):
+	# independent of the start vertex and the orientation
+	points = np.round(np.asarray(points) / precision).astype(np.int64)
+	x, y = points[:, 0].astype(float), points[:, 1].astype(float)
+	if np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y) < 0:
+		points = points[::-1]
+	start = np.lexsort((points[:, 1], points[:, 0]))[0]
+	return np.roll(points, -start, axis=0).tobytes()
+
+def expanded(element):
+	return element.repetition.get_offsets() if element.repetition.size > 0 else [(0, 0)]
+
+def cell_signature(cell, precision):
+	items = []
+	polygons = list(cell.polygons)
+	for path in cell.paths:
+		polygons += path.to_polygons()
+	for poly in polygons:
+		for offset in expanded(poly):
+			h = hashlib.sha1(f"P{poly.layer}/{poly.datatype}".encode())
+			h.update(polygon_key(poly.points + offset, precision))
+			items.append(h.hexdigest())
+	for ref in cell.references:
+		name = ref.cell if isinstance(ref.cell, str) else ref.cell.name
+		for offset in expanded(ref):
+			origin = np.round((np.array(ref.origin) + offset) / precision).astype(np.int64)
+			items.append(f"R{name}:{origin[0]},{origin[1]}:{round(np.cos(ref.rotation), 9) + 0.0},{round(np.sin(ref.rotation), 9) + 0.0}:{ref.magnification:.9g}:{ref.x_reflection}")
+	for label in cell.labels:
+		for offset in expanded(label):
+			origin = np.round((np.array(label.origin) + offset) / precision).astype(np.int64)
+			items.append(f"L{label.layer}/{label.texttype}:{label.text}:{origin[0]},{origin[1]}")
+	items.sort()
+	return hashlib.sha1("\n".join(items).encode()).hexdigest()
+
+def check_oas(gds_file, oas_file):
+	# cell names whose content differs between the GDS and the OASIS file
+	gds_lib = gdstk.read_gds(gds_file)
+	oas_lib = gdstk.read_oas(oas_file)
+	gds_cells = {cell.name: cell for cell in gds_lib.cells}
+	oas_cells = {cell.name: cell for cell in oas_lib.cells}
+	ret = sorted(set(gds_cells) ^ set(oas_cells))
+	for name in sorted(set(gds_cells) & set(oas_cells)):
+		if cell_signature(gds_cells[name], gds_lib.precision) != cell_signature(oas_cells[name], gds_lib.precision):
+			ret.append(name)
+	print(f"[oas] round trip {oas_file}: {len(oas_cells)} cells, " + (f"{len(ret)} differ: {ret[:10]}" if ret else "same as the GDS"))
+	return ret
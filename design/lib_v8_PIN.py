@@ -0,0 +1,203 @@
+# AIST 2025 PIN phase shifter model
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import numpy as np
+import gdstk
+import lib_v8 as lib
+
+# Resistance, capacitance, bandwidth and phase per volt of the PIN phase shifters (lib_v8.PIN_structure),
+# from the doping and contact rectangles of the generated cells:
+#
+#   rows = lib_PIN.pin_table(top_cell)         # one row per PIN cell in the hierarchy
+#   lib_PIN.report(rows)
+#   rows = lib_PIN.sweep_table(top_cell)       # cross-section of the first PIN cell, PIN_SWEEP_LENGTHS
+#   lib_LOSS.write_table(rows, "AIST2025_CR_v8_pin.csv", fields=lib_PIN.PIN_FIELDS)
+#
+# Cross-section (per side, from the contact to the junction, along the length L of the N++/P++ rectangles):
+#   R = sum over N, P: Rs(N++/P++) * heavy / L + Rs(N+/P+) * light / L + rho_c / (contact width * contact length)
+#   C = eps_Si * t_Si * L / intrinsic (depletion capacitance at zero bias)
+# Forward bias (injection), current above PIN_V_ON through R, carriers in the intrinsic region:
+#   dN = dP = I * tau / (q * intrinsic * t_Si * L), dn and dalpha from Soref and Bennett at 1550 nm
+#   phase = 2 pi / lambda * confinement * dn * L
+# Bandwidth at the V_pi bias (limits the modulator): diffusion capacitance C_d = tau * I / (n V_T) in parallel with
+#   the diode resistance r_d = n V_T / I, driven through R + R_source:
+#   f_pi = 1 / (2 pi (C + C_d) (r_d || (R + R_source))) -> 1 / (2 pi tau) for R + R_source >> r_d
+# f_RC0: RC at zero bias (depletion capacitance only), not an operating point of the forward biased modulator.
+# The process values are design estimates, to be replaced with the measured values of the run.
+
+PIN_SHEET_RESISTANCE = { # ohm/sq
+	lib.LAYER_NP: 1500,  # N+
+	lib.LAYER_PP: 1500,  # P+
+	lib.LAYER_NPP: 270,  # N++
+	lib.LAYER_PPP: 270,  # P++
+}
+PIN_CONTACT_RESISTIVITY = 8e-6 # ohm cm^2, contact to P++/N++
+PIN_SI_THICKNESS = 0.22        # um, junction height
+PIN_CONFINEMENT = 0.9          # optical mode in the intrinsic region
+PIN_LIFETIME = 1e-9            # s, carrier lifetime
+PIN_V_ON = 0.8                 # V, diode turn-on voltage
+PIN_IDEALITY = 2               # diode ideality factor (high injection)
+PIN_SOURCE_RESISTANCE = 50     # ohm, driver
+PIN_LAMBDA = 1550e-9           # m
+PIN_VOLTAGE = np.linspace(0, 3, 301)  # V, forward bias for the phase curve
+PIN_SWEEP_LENGTHS = np.arange(50, 501, 10) # um
+
+EPS_SI = 11.7 * 8.854e-12 # F/m
+Q = 1.602e-19             # C
+V_T = 0.02585             # V, thermal voltage (300 K)
+
+PIN_FIELDS = ["cell", "length", "intrinsic", "R_ohm", "C_fF", "V_pi", "I_pi_mA", "loss_pi_dB", "f_pi_MHz", "VpiL_Vmm", "f_RC0_GHz"]
+
+#-------------------- geometry --------------------#
+
+class PINGeometry:
+	# one side: (light doping length, heavy doping length, contact width, contact margin), um
+	__slots__ = ("name", "length", "intrinsic", "sides")
+
+	def __init__(self, name, length, intrinsic, sides):
+		self.name = name
+		self.length = length       # um, N++/P++ length
+		self.intrinsic = intrinsic # um, gap between N+ and P+
+		self.sides = sides         # {"N": (...), "P": (...)}
+
+	def __repr__(self):
+		return f"PINGeometry({self.name!r}, length={self.length:g}, intrinsic={self.intrinsic:g}, " + ", ".join(f"{side}: light={light:g} heavy={heavy:g} contact={width:g}" for side, (light, heavy, width, _) in self.sides.items()) + ")"
+
+def rectangles(cell, layer):
+	# (xmin, ymin, xmax, ymax) of the polygons of a layer, cell level only
+	boxes = [poly.bounding_box() for poly in cell.get_polygons(depth=0, layer=layer, datatype=0)]
+	return np.array([[b[0][0], b[0][1], b[1][0], b[1][1]] for b in boxes], dtype=float).reshape(-1, 4)
+
+def pin_geometry(cell):
+	# None if the cell is not a PIN_structure cell (one N+, P+, N++, P++ rectangle, two contacts)
+	NP, PP, NPP, PPP, CT = [rectangles(cell, layer) for layer in (lib.LAYER_NP, lib.LAYER_PP, lib.LAYER_NPP, lib.LAYER_PPP, lib.LAYER_CT2PN)]
+	if not (len(NP) == len(PP) == len(NPP) == len(PPP) == 1 and len(CT) == 2):
+		return None
+	n_left = NP[0][0] < PP[0][0]
+	def inner(rect, left):
+		# edge facing the junction
+		return rect[2] if left else rect[0]
+	length = min(NPP[0][3] - NPP[0][1], PPP[0][3] - PPP[0][1])
+	sides = {}
+	for side, light, heavy, left in (("N", NP[0], NPP[0], n_left), ("P", PP[0], PPP[0], not n_left)):
+		center = (light[0] + light[2]) / 2
+		contact = CT[np.abs((CT[:, 0] + CT[:, 2]) / 2 - center).argmin()]
+		sides[side] = (
+			np.abs(inner(light, left) - inner(heavy, left)),   # N+/P+ only
+			np.abs(inner(heavy, left) - inner(contact, left)), # N++/P++ up to the contact
+			contact[2] - contact[0],
+			length - (contact[3] - contact[1]),
+		)
+	intrinsic = PP[0][0] - NP[0][2] if n_left else NP[0][0] - PP[0][2]
+	return PINGeometry(cell.name, float(length), float(intrinsic), {side: tuple(float(v) for v in values) for side, values in sides.items()})
+
+def pin_cells(top_cell):
+	ret = []
+	for cell in [top_cell] + sorted(top_cell.dependencies(True), key=lambda c: c.name):
+		if isinstance(cell, gdstk.Cell):
+			geometry = pin_geometry(cell)
+			if geometry is not None:
+				ret.append(geometry)
+	return ret
+
+#-------------------- model --------------------#
+
+def resistance(geometry, length):
+	# ohm, length in um (array)
+	length = np.asarray(length, dtype=float)
+	ret = 0
+	for side, layers in (("N", (lib.LAYER_NP, lib.LAYER_NPP)), ("P", (lib.LAYER_PP, lib.LAYER_PPP))):
+		light, heavy, width, margin = geometry.sides[side]
+		ret = ret + PIN_SHEET_RESISTANCE[layers[0]] * light / length + PIN_SHEET_RESISTANCE[layers[1]] * heavy / length
+		ret = ret + PIN_CONTACT_RESISTIVITY / (width * (length - margin) * 1e-8)
+	return ret
+
+def capacitance(geometry, length):
+	# F, zero bias
+	return EPS_SI * PIN_SI_THICKNESS * 1e-6 * np.asarray(length, dtype=float) * 1e-6 / (geometry.intrinsic * 1e-6)
+
+def carriers(geometry, length, current):
+	# cm^-3, injected electrons (= holes) in the intrinsic region
+	volume = geometry.intrinsic * PIN_SI_THICKNESS * np.asarray(length, dtype=float) * 1e-12 # cm^3
+	return current * PIN_LIFETIME / (Q * volume)
+
+def phase_curve(geometry, length, voltage=PIN_VOLTAGE):
+	# (length, voltage): current (A), phase (rad), excess loss (dB)
+	length = np.asarray(length, dtype=float)[:, None]
+	current = np.maximum(np.asarray(voltage, dtype=float)[None, :] - PIN_V_ON, 0) / resistance(geometry, length)
+	N = carriers(geometry, length, current)
+	dn = 8.8e-22 * N + 8.5e-18 * N**0.8
+	dalpha = (8.5e-18 + 6.0e-18) * N # cm^-1
+	phase = 2 * np.pi / PIN_LAMBDA * PIN_CONFINEMENT * dn * length * 1e-6
+	loss = 10 * np.log10(np.e) * PIN_CONFINEMENT * dalpha * length * 1e-4
+	return current, phase, loss
+
+def at_phase(phase, values, target=np.pi):
+	# values (length, voltage) interpolated where the phase first reaches target, nan if not reached
+	reached = phase >= target
+	k = np.maximum(reached.argmax(axis=1), 1)[:, None]
+	p0, p1 = np.take_along_axis(phase, k - 1, axis=1), np.take_along_axis(phase, k, axis=1)
+	v0, v1 = np.take_along_axis(values, k - 1, axis=1), np.take_along_axis(values, k, axis=1)
+	with np.errstate(invalid="ignore", divide="ignore"):
+		ret = (v0 + (target - p0) * (v1 - v0) / (p1 - p0))[:, 0]
+	return np.where(reached.any(axis=1), ret, np.nan)
+
+def forward_bandwidth(R, C, current):
+	# Hz, small signal pole at the forward bias current (A)
+	r_d = PIN_IDEALITY * V_T / current
+	C_d = PIN_LIFETIME * current / (PIN_IDEALITY * V_T)
+	R_ext = R + PIN_SOURCE_RESISTANCE
+	return 1 / (2 * np.pi * (C + C_d) * r_d * R_ext / (r_d + R_ext))
+
+# carrier lifetime limit: with a large series resistance the pole is 1 / (2 pi tau)
+assert np.isclose(forward_bandwidth(1e9, 0, 10e-3), 1 / (2 * np.pi * PIN_LIFETIME), rtol=1e-3), "forward_bandwidth(): lifetime limit"
+
+def model(geometry, length):
+	# dict of (length,) arrays
+	length = np.atleast_1d(np.asarray(length, dtype=float))
+	R = resistance(geometry, length)
+	C = capacitance(geometry, length)
+	current, phase, loss = phase_curve(geometry, length)
+	V = np.broadcast_to(PIN_VOLTAGE, phase.shape)
+	V_pi = at_phase(phase, V)
+	I_pi = at_phase(phase, current)
+	return {
+		"length": length, "R": R, "C": C,
+		"f_RC0": 1 / (2 * np.pi * (R + PIN_SOURCE_RESISTANCE) * C),
+		"V_pi": V_pi, "I_pi": I_pi, "loss_pi": at_phase(phase, loss),
+		"f_pi": forward_bandwidth(R, C, I_pi),
+	}
+
+#-------------------- tables --------------------#
+
+def rows(geometry, result):
+	ret = []
+	for k, length in enumerate(result["length"]):
+		ret.append({
+			"cell": geometry.name, "length": round(float(length), 3), "intrinsic": round(float(geometry.intrinsic), 3),
+			"R_ohm": round(float(result["R"][k]), 2), "C_fF": round(float(result["C"][k]) * 1e15, 3),
+			"V_pi": round(float(result["V_pi"][k]), 3), "I_pi_mA": round(float(result["I_pi"][k]) * 1e3, 3),
+			"loss_pi_dB": round(float(result["loss_pi"][k]), 3), "f_pi_MHz": round(float(result["f_pi"][k]) * 1e-6, 1),
+			"VpiL_Vmm": round(float(result["V_pi"][k] * length * 1e-3), 4),
+			"f_RC0_GHz": round(float(result["f_RC0"][k]) * 1e-9, 1),
+		})
+	return ret
+
+def pin_table(top_cell):
+	ret = []
+	for geometry in pin_cells(top_cell):
+		ret += rows(geometry, model(geometry, geometry.length))
+	return ret
+
+def sweep_table(top_cell, lengths=PIN_SWEEP_LENGTHS):
+	geometries = pin_cells(top_cell)
+	if not geometries:
+		return []
+	return rows(geometries[0], model(geometries[0], lengths))
+
+def report(rows):
+	# f(V_pi): forward bias, limits the modulator; f_RC0: zero bias depletion capacitance, for reference
+	print(f"[pin] {'cell':<28} {'length':>7} {'R':>8} {'C':>8} {'V_pi':>6} {'I_pi':>8} {'loss':>7} {'f(V_pi)':>9} {'f_RC0':>9}")
+	for row in rows:
+		print(f"[pin] {row['cell']:<28} {row['length']:>5.0f}um {row['R_ohm']:>6.1f}ohm {row['C_fF']:>6.2f}fF {row['V_pi']:>5.2f}V {row['I_pi_mA']:>6.2f}mA {row['loss_pi_dB']:>5.2f}dB {row['f_pi_MHz']:>6.1f}MHz {row['f_RC0_GHz']:>6.1f}GHz")
@@ -0,0 +1,380 @@
+# AIST 2025 ports of generated cells
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import csv
+import json
+import numpy as np
+import gdstk
+import lib_v8_CACHE as lib_CACHE
+
+# A port is a point where a waveguide (or a metal line) leaves a cell:
+#   angle: direction of the waveguide leaving the cell (0: +x, pi/2: +y, ...)
+# Ports are registered by cell name, and transformed through gdstk.Reference:
+#
+#   lib_PORT.set_ports(ret_cell, lib_PORT.Port("opt", (0, 0), np.pi, wg_width, LAYER_SiWG))
+#   ref = gdstk.Reference(GC_cell, origin=(100, 0), rotation=np.pi/2)
+#   p = lib_PORT.ports(ref)["opt"]  # -> Port opt (100, 0) angle -pi/2
+
+SIDES = {"R": 0, "U": np.pi/2, "L": np.pi, "D": -np.pi/2}
+
+class Port:
+	__slots__ = ("name", "x", "y", "angle", "width", "layer")
+
+	def __init__(self, name, point, angle, width, layer):
+		self.name = name
+		self.x = float(point[0])
+		self.y = float(point[1])
+		self.angle = float(np.angle(np.exp(1j*angle))) # (-pi, pi]
+		self.width = width
+		self.layer = layer
+
+	@property
+	def point(self):
+		return [self.x, self.y]
+
+	@property
+	def side(self):
+		# "R", "U", "L" or "D" (direction of the waveguide leaving the port, as in lib_v8.ARC_TABLE)
+		for side, angle in SIDES.items():
+			if np.abs(np.angle(np.exp(1j*(self.angle - angle)))) < 1e-6:
+				return side
+		assert False, f"port {self.name} is not Manhattan: angle={self.angle}"
+
+	def renamed(self, name):
+		return Port(name, self.point, self.angle, self.width, self.layer)
+
+	def transformed(self, origin=(0, 0), rotation=0, magnification=1, x_reflection=False):
+		# same order as gdstk.Reference: reflection, magnification, rotation, translation
+		x, y, angle = self.x, self.y, self.angle
+		if x_reflection:
+			y, angle = -y, -angle
+		c, s = np.cos(rotation), np.sin(rotation)
+		point = [
+			origin[0] + magnification * (c*x - s*y),
+			origin[1] + magnification * (s*x + c*y),
+		]
+		return Port(self.name, point, angle + rotation, self.width * magnification, self.layer)
+
+	def to_json(self):
+		return [self.name, self.x, self.y, self.angle, self.width, self.layer]
+
+	def __repr__(self):
+		return f"Port({self.name!r}, ({self.x:g}, {self.y:g}), angle={self.angle/np.pi:g}*pi, width={self.width:g}, layer={self.layer})"
+
+class PortSet:
+	__slots__ = ("ports",)
+
+	def __init__(self, *ports):
+		self.ports = {}
+		self.add(*ports)
+
+	def add(self, *ports):
+		for port in ports:
+			assert port.name not in self.ports, f"duplicate port name: {port.name}"
+			self.ports[port.name] = port
+		return self
+
+	def __getitem__(self, name):
+		return self.ports[name]
+
+	def __contains__(self, name):
+		return name in self.ports
+
+	def __iter__(self):
+		return iter(self.ports.values())
+
+	def __len__(self):
+		return len(self.ports)
+
+	def names(self):
+		return list(self.ports)
+
+	def transformed(self, origin=(0, 0), rotation=0, magnification=1, x_reflection=False, suffix=""):
+		return PortSet(*[
+			port.transformed(origin, rotation, magnification, x_reflection).renamed(port.name + suffix)
+			for port in self
+		])
+
+	def to_json(self):
+		return [port.to_json() for port in self]
+
+	@classmethod
+	def from_json(cls, data):
+		return cls(*[Port(name, (x, y), angle, width, layer) for name, x, y, angle, width, layer in data])
+
+	def __repr__(self):
+		return "PortSet(" + ", ".join(repr(port) for port in self) + ")"
+
+#-------------------- registry --------------------#
+
+PORTS = {} # cell name -> PortSet
+
+def cell_name(cell):
+	return cell if isinstance(cell, str) else cell.name
+
+def set_ports(cell, *ports):
+	PORTS[cell_name(cell)] = PortSet(*ports)
+	return PORTS[cell_name(cell)]
+
+def cell_ports(cell):
+	return PORTS.get(cell_name(cell), PortSet())
+
+def reference_ports(ref):
+	# ports of the referenced cell in the coordinates of the parent cell
+	# arrays: one port per repetition, named {port name}_{index} (index in gdstk repetition order)
+	base = cell_ports(ref.cell)
+	if ref.repetition.size == 0:
+		return base.transformed(ref.origin, ref.rotation, ref.magnification, ref.x_reflection)
+	ret = PortSet()
+	for i, offset in enumerate(ref.repetition.get_offsets()):
+		origin = (ref.origin[0] + offset[0], ref.origin[1] + offset[1])
+		ret.add(*base.transformed(origin, ref.rotation, ref.magnification, ref.x_reflection, suffix=f"_{i}"))
+	return ret
+
+def ports(item):
+	if isinstance(item, gdstk.Reference):
+		return reference_ports(item)
+	return cell_ports(item)
+
+# ports are stored with the cells in cached GDS fragments
+lib_CACHE.IGNORED_NAMES.add("PORTS")
+lib_CACHE.CELL_DATA["ports"] = (
+	lambda name: PORTS[name].to_json() if name in PORTS else None,
+	lambda name, data: PORTS.__setitem__(name, PortSet.from_json(data)),
+)
+
+#-------------------- routes --------------------#
+# waveguides drawn with lib_v8.Route are registered by cell name when committed:
+#   start: port at the start point (angle: away from the route), end: port at the end point
+#   straight: straight length (um), arcs: radius -> number of 90 degree arcs
+#   points: Manhattan skeleton of the route (bends as corners), crossings: set by count_crossings()
+
+def transform_points(points, origin=(0, 0), rotation=0, magnification=1, x_reflection=False):
+	# same order as gdstk.Reference: reflection, magnification, rotation, translation
+	points = np.array(points, dtype=float).reshape(-1, 2)
+	if x_reflection:
+		points[:, 1] = -points[:, 1]
+	c, s = np.cos(rotation), np.sin(rotation)
+	return np.stack([
+		origin[0] + magnification * (c*points[:, 0] - s*points[:, 1]),
+		origin[1] + magnification * (s*points[:, 0] + c*points[:, 1]),
+	], axis=1)
+
+class RouteInfo:
+	__slots__ = ("start", "end", "straight", "arcs", "points", "crossings")
+
+	def __init__(self, start, end, straight, arcs, points, crossings=0):
+		self.start = start
+		self.end = end
+		self.straight = float(straight)
+		self.arcs = {float(radius): int(n) for radius, n in dict(arcs).items()}
+		self.points = np.array(points, dtype=float).reshape(-1, 2)
+		self.crossings = crossings
+
+	@property
+	def arc_length(self):
+		return float(sum(n * radius*np.pi/2 for radius, n in self.arcs.items()))
+
+	@property
+	def length(self):
+		# optical length (um)
+		return self.straight + self.arc_length
+
+	@property
+	def bends(self):
+		return sum(self.arcs.values())
+
+	def transformed(self, origin=(0, 0), rotation=0, magnification=1, x_reflection=False):
+		return RouteInfo(
+			self.start.transformed(origin, rotation, magnification, x_reflection),
+			self.end.transformed(origin, rotation, magnification, x_reflection),
+			self.straight * magnification,
+			{radius * magnification: n for radius, n in self.arcs.items()},
+			transform_points(self.points, origin, rotation, magnification, x_reflection),
+		)
+
+	def to_json(self):
+		return [self.start.to_json(), self.end.to_json(), self.straight, sorted(self.arcs.items()), self.points.tolist()]
+
+	@classmethod
+	def from_json(cls, data):
+		start, end, straight, arcs, points = data
+		return cls(Port(start[0], start[1:3], *start[3:]), Port(end[0], end[1:3], *end[3:]), straight, arcs, points)
+
+	def __repr__(self):
+		return f"RouteInfo(({self.start.x:g}, {self.start.y:g}) -> ({self.end.x:g}, {self.end.y:g}), length={self.length:.3f}, bends={self.bends}, crossings={self.crossings})"
+
+ROUTES = {}      # cell name -> [RouteInfo]
+ROUTE_CELLS = {} # cell name -> cell the routes were committed to (a new cell with the same name starts over)
+
+def add_route(cell, info):
+	if ROUTE_CELLS.get(cell.name) is not cell:
+		ROUTE_CELLS[cell.name] = cell
+		ROUTES[cell.name] = []
+	ROUTES[cell.name].append(info)
+
+def cell_routes(cell):
+	return ROUTES.get(cell_name(cell), [])
+
+def reference_routes(ref):
+	# routes of the referenced cell in the coordinates of the parent cell (one per repetition)
+	base = cell_routes(ref.cell)
+	offsets = ref.repetition.get_offsets() if ref.repetition.size > 0 else [(0, 0)]
+	return [
+		info.transformed((ref.origin[0] + offset[0], ref.origin[1] + offset[1]), ref.rotation, ref.magnification, ref.x_reflection)
+		for offset in offsets for info in base
+	]
+
+def routes(item):
+	if isinstance(item, gdstk.Reference):
+		return reference_routes(item)
+	return cell_routes(item)
+
+def count_crossings(infos, eps=1e-6):
+	# crossings between the skeletons of different routes (Manhattan segments, touching ends not counted)
+	h_segs, v_segs = [], []
+	for i, info in enumerate(infos):
+		info.crossings = 0
+		for a, b in zip(info.points[:-1], info.points[1:]):
+			if np.abs(a[1] - b[1]) < eps and np.abs(a[0] - b[0]) > eps:
+				h_segs.append((min(a[0], b[0]), max(a[0], b[0]), a[1], i))
+			elif np.abs(a[0] - b[0]) < eps and np.abs(a[1] - b[1]) > eps:
+				v_segs.append((min(a[1], b[1]), max(a[1], b[1]), a[0], i))
+	h_segs = np.array(h_segs, dtype=float).reshape(-1, 4)
+	v_segs = np.array(v_segs, dtype=float).reshape(-1, 4)
+	cross = (
+		(h_segs[:, None, 0] < v_segs[None, :, 2] - eps) & (v_segs[None, :, 2] < h_segs[:, None, 1] - eps) &
+		(v_segs[None, :, 0] < h_segs[:, None, 2] - eps) & (h_segs[:, None, 2] < v_segs[None, :, 1] - eps) &
+		(h_segs[:, None, 3] != v_segs[None, :, 3])
+	)
+	for a, b in zip(*np.nonzero(cross)):
+		infos[int(h_segs[a, 3])].crossings += 1
+		infos[int(v_segs[b, 3])].crossings += 1
+	return infos
+
+def top_routes(top_cell):
+	# [(cell name, RouteInfo)] of the top cell and of its references, in top cell coordinates, crossings counted
+	ret = [(top_cell.name, info.transformed()) for info in cell_routes(top_cell)]
+	for ref in top_cell.references:
+		ret += [(cell_name(ref.cell), info) for info in reference_routes(ref)]
+	count_crossings([info for _, info in ret])
+	return ret
+
+lib_CACHE.IGNORED_NAMES.update(["ROUTES", "ROUTE_CELLS"])
+lib_CACHE.CELL_DATA["routes"] = (
+	lambda name: [info.to_json() for info in ROUTES[name]] if name in ROUTES else None,
+	lambda name, data: ROUTES.__setitem__(name, [RouteInfo.from_json(d) for d in data]),
+)
+
+def arcs_text(arcs):
+	# ex) "R10:8 R2.5:1"
+	return " ".join(f"R{radius:g}:{n}" for radius, n in sorted(arcs.items(), key=lambda item: -item[0]))
+
+#-------------------- waveguides --------------------#
+# waveguides drawn without lib_v8.Route (lib_v8.horizontal(), vertical(), slopes), registered by cell name
+# as RouteInfo (straight: length along the points) for the circuit extraction (lib_v8_CIRCUIT),
+# not counted in the route tally
+
+WAVEGUIDES = {}      # cell name -> [RouteInfo]
+WAVEGUIDE_CELLS = {} # cell name -> cell the waveguides were added to
+
+def add_waveguide(cell, points, width, layer):
+	points = np.array(points, dtype=float).reshape(-1, 2)
+	d = np.diff(points, axis=0)
+	info = RouteInfo(
+		Port("start", points[0], np.arctan2(d[0, 1], d[0, 0]) + np.pi, width, layer),
+		Port("end", points[-1], np.arctan2(d[-1, 1], d[-1, 0]), width, layer),
+		np.hypot(d[:, 0], d[:, 1]).sum(), {}, points,
+	)
+	if WAVEGUIDE_CELLS.get(cell.name) is not cell:
+		WAVEGUIDE_CELLS[cell.name] = cell
+		WAVEGUIDES[cell.name] = []
+	WAVEGUIDES[cell.name].append(info)
+
+def cell_waveguides(cell):
+	return WAVEGUIDES.get(cell_name(cell), [])
+
+lib_CACHE.IGNORED_NAMES.update(["WAVEGUIDES", "WAVEGUIDE_CELLS"])
+lib_CACHE.CELL_DATA["waveguides"] = (
+	lambda name: [info.to_json() for info in WAVEGUIDES[name]] if name in WAVEGUIDES else None,
+	lambda name, data: WAVEGUIDES.__setitem__(name, [RouteInfo.from_json(d) for d in data]),
+)
+
+#-------------------- port map --------------------#
+# fiber array ports of a chip: SSC ports ("wg" ports of the SSC cell) numbered from the right
+# (as the SSC labels), each followed through the routes of the top cell to a device port
+# (port_x, port_y: position of the device port; length, bends and crossings: sum over the routes in between).
+# device is the referenced cell, reference the reference of the top cell placing it: {cell}#{n} (n-th reference
+# of the cell), prefixed by the placing section when placements are given (lib_v8_BUILD.Build.placements):
+#
+#   rows = lib_PORT.port_map(top_cell, "ssc_right", placements=build.placements)
+#   lib_PORT.write_port_map(rows, "AIST2025_CR_v8_ports")  # .json and .csv
+
+PORT_MAP_TOLERANCE = 1e-3 # um
+PORT_MAP_FIELDS = ["index", "ssc_x", "ssc_y", "device", "reference", "device_port", "port_x", "port_y", "length", "straight", "arc", "bends", "arcs", "crossings"]
+
+def port_map(top_cell, ssc_cell_name, ssc_port="wg", placements=None):
+	# placements: name of what placed each reference of top_cell (ex. section name), or None
+	ssc_points, device_ports = [], []
+	counts = {}
+	for r, ref in enumerate(top_cell.references):
+		name = cell_name(ref.cell)
+		reference = f"{name}#{counts.get(name, 0)}"
+		counts[name] = counts.get(name, 0) + 1
+		if placements is not None:
+			reference = f"{placements[r]}/{reference}"
+		for port in reference_ports(ref):
+			if name == ssc_cell_name:
+				if port.name.rsplit("_", 1)[0] == ssc_port:
+					ssc_points.append(port.point)
+			else:
+				device_ports.append((name, reference, port))
+	route_list = [info for _, info in top_routes(top_cell)]
+	ssc_points.sort(key=lambda p: -p[0])
+	device_xy = np.array([port.point for *_, port in device_ports]).reshape(-1, 2)
+	# route ends: (route index, 0: start / 1: end)
+	ends = [(i, k) for i in range(len(route_list)) for k in (0, 1)]
+	ends_xy = np.array([[route_list[i].start, route_list[i].end][k].point for i, k in ends]).reshape(-1, 2)
+	def at(points, p):
+		return np.nonzero(np.hypot(points[:, 0] - p[0], points[:, 1] - p[1]) < PORT_MAP_TOLERANCE)[0] if len(points) > 0 else []
+	ret = []
+	for index, point in enumerate(ssc_points):
+		row = {"index": index, "ssc_x": round(point[0], 3), "ssc_y": round(point[1], 3), "device": "", "reference": "", "device_port": "", "port_x": None, "port_y": None}
+		straight, arcs, crossings = 0.0, {}, 0
+		used = set()
+		while True:
+			devices = at(device_xy, point)
+			if len(devices) > 0:
+				name, reference, port = device_ports[devices[0]]
+				row["device"], row["reference"], row["device_port"] = name, reference, port.name
+				row["port_x"], row["port_y"] = round(port.x, 3), round(port.y, 3)
+				break
+			routes_here = [ends[j] for j in at(ends_xy, point) if ends[j][0] not in used]
+			if len(routes_here) == 0:
+				break
+			i, k = routes_here[0]
+			used.add(i)
+			info = route_list[i]
+			straight += info.straight
+			for radius, n in info.arcs.items():
+				arcs[radius] = arcs.get(radius, 0) + n
+			crossings += info.crossings
+			point = (info.end if k == 0 else info.start).point
+		arc = float(sum(n * radius*np.pi/2 for radius, n in arcs.items()))
+		row.update({
+			"length": round(straight + arc, 3), "straight": round(straight, 3), "arc": round(arc, 3),
+			"bends": sum(arcs.values()), "arcs": arcs_text(arcs), "crossings": crossings,
+		})
+		ret.append(row)
+	return ret
+
+def write_port_map(rows, basename):
+	fields = PORT_MAP_FIELDS + [k for k in (rows[0] if rows else {}) if k not in PORT_MAP_FIELDS] # ex. loss_dB (lib_v8_LOSS)
+	with open(basename + ".json", "w") as f:
+		json.dump(rows, f, indent=1)
+	with open(basename + ".csv", "w", newline="") as f:
+		writer = csv.DictWriter(f, fieldnames=fields)
+		writer.writeheader()
+		writer.writerows(rows)
+	print(f"[ports] {basename}.json, {basename}.csv: {len(rows)} ports, {sum(1 for row in rows if row['device'])} connected")
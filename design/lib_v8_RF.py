@@ -1,9 +1,10 @@
 # AIST 2025 design library
 # created on: 2026/01/22
-# last change: 2026/01/30
+# last change: 2026/10/18
 
 import gdstk
 import numpy as np
+import lib_v8_PORT as lib_PORT
 
 # AIST_PDK = gdstk.read_rawcells("../PDK_Device_Cells_20251112.gds")
 # LIB = gdstk.Library()
@@ -42,6 +43,7 @@ LAYER_SSC    = 53 # ssc box
 # RF_GND_taper_length = 45
 # RF_SIG_taper_length = RF_GND_taper_length - RF_PAD_GAP
 # RF_PAD_taper_end = 30.5
+from lib_v8 import AIST_PDK
 from lib_v8 import wg_width, radius, dr
 from lib_v8 import RF_PAD_PITCH, RF_PAD_GAP, SIG_width, GAP_width, RF_PAD_size, RF_GND_taper_length, RF_SIG_taper_length, RF_PAD_taper_end
 
@@ -151,6 +153,11 @@ def new_RF_PAD_cell():
 		taper_right_SIG_topleft, taper_right_SIG_topright,
 		taper_right_GND_topleft, taper_right_GND_topright,
 	]
+	# electrical ports at the top of the tapers (GSGSG), as lib_v8.new_RF_PAD_cell
+	lib_PORT.set_ports(ret_cell, *[
+		lib_PORT.Port(name, ((left[0] + right[0])/2, left[1]), np.pi/2, right[0] - left[0], LAYER_MET)
+		for name, left, right in zip(["GND_L", "SIG_L", "GND_M", "SIG_R", "GND_R"], ret_points[0::2], ret_points[1::2])
+	])
 	return ret_cell, ret_points
 RF_PAD_cell, RF_PAD_cell_points = new_RF_PAD_cell()
 
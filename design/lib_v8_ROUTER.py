@@ -0,0 +1,307 @@
+# AIST 2025 bus router
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import numpy as np
+import gdstk
+import lib_v8 as lib
+import lib_v8_PORT as lib_PORT
+import lib_v8_DRC as lib_DRC
+
+# Fan-out of many waveguides into an SSC array (ssc ports on a horizontal line, entered from above):
+#
+#   port ---+  (escape: turn to go down)
+#           |
+#           +------------+  track: one horizontal line per route, routing_wg_pitch apart
+#                        |
+#                       ssc
+#
+# Sources and SSC ports are matched in x order, so the L-shaped routes never cross.
+# Routes going right get higher tracks toward the right, routes going left toward the left.
+# Tracks start above the SSC line and are pushed up over keep-out boxes.
+# "R"/"L" sources go down on lanes in y order (stacked ports: the upper ones go down outside the lower ones),
+# a source within two bends of its SSC port escapes further or jogs away from it.
+#
+# ex) routes = lib_ROUTER.bus_routes(sources, ssc_point, lib.ssc_pitch, lib.LAYER_SiWG, ssc_index=range(16))
+#     sources: [(x, y, direction), ...] direction of the waveguide leaving the port: "U", "D", "L" or "R"
+#              or lib_v8_PORT.Port objects (ex. lib_PORT.ports(MZM_reference)["in0"])
+#     lane_x: x of the first lane of the "R"/"L" sources, leads: moves of each source before the router
+#
+# ex) lib_ROUTER.check_GC4x4(GC_cell, GC_output_origin, GC_pitch, ssc_point_GC) # router vs lib_v8.GC4x4_route_cell
+
+DIRECTIONS = {
+	"U": ( 0, +1),
+	"D": ( 0, -1),
+	"L": (-1,  0),
+	"R": (+1,  0),
+}
+
+def ssc_ports(ssc_point, ssc_pitch, ssc_index):
+	# ssc ports are counted from ssc_point to the left (as the ssc arrays of the chip)
+	return [[ssc_point[0] - k*ssc_pitch, ssc_point[1]] for k in ssc_index]
+
+def escape_moves(source, target_x, bend, escape, lane=None):
+	# moves from the port to a point where the route goes down: (x, y, moves)
+	x, y, direction = source
+	moves = []
+	if direction == "D":
+		return x, y, moves
+	if direction in ("R", "L"):
+		# lane: x of the way down (see escape_lanes)
+		sx = DIRECTIONS[direction][0]
+		if lane is None:
+			lane = x + sx*(escape + bend)
+		assert sx*(lane - x) >= bend - 1e-6, f"bus_routes(): lane x={lane:.3f} is behind the source at {x:.3f}"
+		if sx*(lane - x) - bend >= 1e-3:
+			moves.append(("h", lane - x - sx*bend))
+		moves.append(("arc", direction + "D"))
+		return lane, y - bend, moves
+	# "U": turn toward the target, then turn down
+	sx = +1 if target_x >= x else -1
+	turn = "R" if sx > 0 else "L"
+	if escape > 0:
+		moves.append(("v", escape))
+	moves.append(("arc", "U" + turn))
+	moves.append(("arc", turn + "D"))
+	return x + sx*2*bend, y + escape, moves
+
+def escape_lanes(starts, lanes, pitch):
+	# "R"/"L" sources in y order: the way down of an upper source passes outside the escape of every lower source
+	# (stacked or near-aligned ports would otherwise go down on the same lane)
+	lanes = dict(lanes)
+	for direction, sx in (("R", +1), ("L", -1)):
+		placed = []
+		for i in sorted((i for i in lanes if starts[i][2] == direction), key=lambda i: starts[i][1]):
+			for j in sorted(placed, key=lambda j: sx*lanes[j]):
+				if starts[j][1] < starts[i][1] - 1e-6 and sx*(lanes[i] - starts[j][0]) > -pitch and sx*(lanes[i] - lanes[j]) < pitch:
+					lanes[i] = lanes[j] + sx*pitch
+			placed.append(i)
+	return lanes
+
+def lead_end(source, lead, radius):
+	# where the lead moves leave the source: (x, y, direction)
+	x, y = route_skeleton(source, lead, radius)[-1]
+	direction = source[2]
+	for kind, value in lead:
+		if kind == "arc":
+			direction = value[1]
+	return x, y, direction
+
+def bus_routes(sources, ssc_point, ssc_pitch, layer, ssc_index=None, keepouts=(), pitch=lib.routing_wg_pitch, radius=lib.radius, escape=0, track_y=None, lane_x=None, leads=None):
+	sources = [(s.x, s.y, s.side) if isinstance(s, lib_PORT.Port) else s for s in sources]
+	n = len(sources)
+	if ssc_index is None:
+		ssc_index = range(n)
+	targets = ssc_ports(ssc_point, ssc_pitch, ssc_index)
+	assert len(targets) == n, f"bus_routes(): {n} sources for {len(targets)} ssc ports"
+	bend = radius + lib.dr
+	ssc_y = ssc_point[1]
+	# leads: moves of each source done before the escape (ex. to leave an array between its rows)
+	if leads is None:
+		leads = [[] for _ in sources]
+	starts = [lead_end(s, lead, radius) for s, lead in zip(sources, leads)]
+	target_center = np.mean([t[0] for t in targets])
+	# lanes of the "R"/"L" sources: escape, or all from lane_x outward
+	lanes = escape_lanes(starts, {
+		i: s[0] + DIRECTIONS[s[2]][0]*(escape + bend) if lane_x is None else lane_x
+		for i, s in enumerate(starts) if s[2] in ("R", "L")
+	}, pitch)
+	jogs = {} # source -> side of the jog (-1: left, +1: right)
+	for _ in range(n + 1):
+		# escape toward the mean target, then match sources and targets in x order
+		stubs = [escape_moves(s, target_center, bend, escape, lanes.get(i)) for i, s in enumerate(starts)]
+		for i, sx in jogs.items():
+			# jog: two bends away from the ssc port
+			x, y, moves = stubs[i]
+			turn = "R" if sx > 0 else "L"
+			stubs[i] = x + sx*2*bend, y - 2*bend, moves + [("arc", "D" + turn), ("arc", turn + "D")]
+		source_order = sorted(range(n), key=lambda i: stubs[i][0])
+		target_order = sorted(range(n), key=lambda i: targets[i][0])
+		match = {i: targets[j] for i, j in zip(source_order, target_order)}
+		# too close to the ssc port for two bends: "R"/"L" sources go down on the port or two bends past it, others jog
+		moved = False
+		for i in range(n):
+			d = match[i][0] - stubs[i][0]
+			if not 1e-3 < np.abs(d) < 2*bend - 1e-6:
+				continue
+			if i in lanes:
+				sx = DIRECTIONS[starts[i][2]][0]
+				lanes[i] = match[i][0] if d*sx > 0 else match[i][0] + sx*2*bend
+			else:
+				jogs[i] = -1 if d > 0 else +1
+			moved = True
+		if not moved:
+			break
+		lanes = escape_lanes(starts, lanes, pitch)
+	# track rank: routes going right stack up toward the right, routes going left toward the left
+	right = [i for i in source_order if match[i][0] > stubs[i][0] + 1e-3]
+	left = [i for i in source_order if match[i][0] < stubs[i][0] - 1e-3]
+	rank = {}
+	for k, i in enumerate(right):
+		rank[i] = k
+	for k, i in enumerate(reversed(left)):
+		rank[i] = k
+	# lowest track, pushed up until no track crosses a keep-out box
+	if track_y is None:
+		track_y = ssc_y + bend + pitch
+	boxes = np.array([[b[0][0], b[0][1], b[1][0], b[1][1]] for b in keepouts], dtype=float).reshape(-1, 4)
+	tracked = sorted(rank)
+	if len(boxes) > 0 and len(tracked) > 0:
+		x0 = np.array([min(stubs[i][0], match[i][0]) for i in tracked])[:, None]
+		x1 = np.array([max(stubs[i][0], match[i][0]) for i in tracked])[:, None]
+		k = np.array([rank[i] for i in tracked], dtype=float)[:, None]
+		margin = bend + pitch
+		for _ in range(len(boxes) + 1):
+			y = track_y + k*pitch
+			hit = (x0 < boxes[:, 2] + margin) & (x1 > boxes[:, 0] - margin) & (y > boxes[:, 1] - margin) & (y < boxes[:, 3] + margin)
+			if not hit.any():
+				break
+			track_y = np.max(np.where(hit, boxes[:, 3] + margin - k*pitch, -np.inf))
+	# routes, in the order of sources
+	routes = []
+	for i in range(n):
+		x, y, moves = stubs[i]
+		tx, ty = match[i]
+		if i in rank:
+			y_track = track_y + rank[i]*pitch
+			assert y - y_track >= bend - 1e-6, f"bus_routes(): source {i} at {sources[i][:2]} is below its track y={y_track:.3f}"
+			assert np.abs(tx - x) >= 2*bend - 1e-6, f"bus_routes(): source {i} is too close to its ssc port (x: {x:.3f} -> {tx:.3f})"
+			turn = "R" if tx > x else "L"
+			moves = moves + [
+				("v", y_track + bend - y), ("arc", "D" + turn),
+				("h", tx - x - 2*bend*np.sign(tx - x)), ("arc", turn + "D"),
+				("v", ty - (y_track - bend)),
+			]
+		else:
+			moves = moves + [("v", ty - y)]
+		routes.append(route_from_moves(sources[i], leads[i] + moves, layer, radius))
+	check_bus([route_skeleton(sources[i], r.moves, radius) for i, r in enumerate(routes)], pitch, boxes)
+	return routes
+
+def route_from_moves(source, moves, layer, radius):
+	r = lib.Route(source[:2], layer)
+	for kind, value in moves:
+		if kind == "arc":
+			r.arc(value, radius)
+		elif np.abs(value) >= 1e-3: # skip empty straights
+			getattr(r, kind)(value)
+	r.moves = moves
+	return r
+
+def route_skeleton(source, moves, radius):
+	# Manhattan center line of a route (bends as corners)
+	bend = radius + lib.dr
+	p = np.array(source[:2], dtype=float)
+	points = [p.copy()]
+	for kind, value in moves:
+		if kind == "h":
+			p += (value, 0)
+		elif kind == "v":
+			p += (0, value)
+		else:
+			p += np.array(DIRECTIONS[value[0]]) * bend
+			points.append(p.copy())
+			p += np.array(DIRECTIONS[value[1]]) * bend
+	points.append(p.copy())
+	return np.array(points)
+
+def check_bus(skeletons, pitch, boxes):
+	# crossings and parallel segments closer than pitch between different routes, segments in keep-outs
+	h_segs, v_segs = [], []
+	for i, points in enumerate(skeletons):
+		for a, b in zip(points[:-1], points[1:]):
+			if np.abs(a[1] - b[1]) < 1e-6 and np.abs(a[0] - b[0]) > 1e-6:
+				h_segs.append((min(a[0], b[0]), max(a[0], b[0]), a[1], i))
+			elif np.abs(a[0] - b[0]) < 1e-6 and np.abs(a[1] - b[1]) > 1e-6:
+				v_segs.append((min(a[1], b[1]), max(a[1], b[1]), a[0], i))
+	h_segs = np.array(h_segs, dtype=float).reshape(-1, 4)
+	v_segs = np.array(v_segs, dtype=float).reshape(-1, 4)
+	eps = 1e-6
+	# horizontal x vertical
+	cross = (
+		(h_segs[:, None, 0] <= v_segs[None, :, 2] + eps) & (v_segs[None, :, 2] <= h_segs[:, None, 1] + eps) &
+		(v_segs[None, :, 0] <= h_segs[:, None, 2] + eps) & (h_segs[:, None, 2] <= v_segs[None, :, 1] + eps) &
+		(h_segs[:, None, 3] != v_segs[None, :, 3])
+	)
+	assert not cross.any(), f"bus routes cross: {bus_pairs(cross, h_segs, v_segs)}"
+	# parallel segments
+	for segs in (h_segs, v_segs):
+		close = (
+			(segs[:, None, 0] < segs[None, :, 1] - eps) & (segs[None, :, 0] < segs[:, None, 1] - eps) &
+			(np.abs(segs[:, None, 2] - segs[None, :, 2]) < pitch - eps) &
+			(segs[:, None, 3] != segs[None, :, 3])
+		)
+		assert not close.any(), f"bus routes closer than {pitch} um: {bus_pairs(close, segs, segs)}"
+	# keep-outs
+	for segs, (lo, hi, pos) in ((h_segs, (0, 2, 1)), (v_segs, (1, 3, 0))):
+		inside = (
+			(segs[:, None, 0] < boxes[None, :, hi] - eps) & (boxes[None, :, lo] < segs[:, None, 1] - eps) &
+			(boxes[None, :, pos] < segs[:, None, 2]) & (segs[:, None, 2] < boxes[None, :, pos + 2])
+		)
+		assert not inside.any(), f"bus routes run through keep-out boxes: {sorted(set(segs[np.nonzero(inside)[0], 3].astype(int).tolist()))}"
+
+def bus_pairs(mask, segs_a, segs_b):
+	a, b = np.nonzero(mask)
+	return sorted(set(zip(segs_a[a, 3].astype(int).tolist(), segs_b[b, 3].astype(int).tolist())))[:10]
+
+def bus_route_cell(sources, ssc_point, ssc_pitch, layer, cell_name, **kwargs):
+	ret_cell = gdstk.Cell(cell_name)
+	for r in bus_routes(sources, ssc_point, ssc_pitch, layer, **kwargs):
+		r.commit(ret_cell)
+	return ret_cell
+
+#-------------------- route cells --------------------#
+def GC4x4_bus_route_cell(origin, GC_pitch, ssc_point, layer, cell_name, keepouts=()):
+	# lib_v8.GC4x4_route_cell with the bus router: same GC ports, same ssc ports, same lanes out of the array
+	sources, leads, ssc_index = [], [], []
+	for i in range(4): # row
+		for j in range(4): # column
+			wg_offset = i*4 + j
+			x, y = origin[0] + (3-j)*GC_pitch, origin[1] + (3-i)*GC_pitch
+			sources.append((x, y, "L"))
+			# leave the array above the GC row
+			leads.append([("h", -10), ("arc", "LU"), ("v", 10 + (3-j)*lib.routing_wg_pitch), ("arc", "UL")])
+			ssc_index.append(-(2 + wg_offset)) # ssc ports right of ssc_point
+	bend = lib.radius + lib.dr
+	lane_x = lib.GC_routing_width_min - bend + 15*lib.routing_wg_pitch
+	return bus_route_cell(sources, ssc_point, lib.ssc_pitch, layer, cell_name, ssc_index=ssc_index, keepouts=keepouts, lane_x=lane_x, leads=leads)
+
+def check_route_cell(hand_cell, bus_cell, shared=1):
+	# the bus router against a hand-coded route cell: same port pairs, same first skeleton points (shared)
+	hand = {(tuple(np.round(r.start.point, 3)), tuple(np.round(r.end.point, 3))): r for r in lib_PORT.cell_routes(hand_cell)}
+	bus = {(tuple(np.round(r.start.point, 3)), tuple(np.round(r.end.point, 3))): r for r in lib_PORT.cell_routes(bus_cell)}
+	assert sorted(hand) == sorted(bus), f"check_route_cell(): {bus_cell.name} does not connect the ports of {hand_cell.name}: {sorted(set(hand) ^ set(bus))[:4]}"
+	for key, r in bus.items():
+		assert np.allclose(r.points[:shared], hand[key].points[:shared], atol=1e-3), f"check_route_cell(): {bus_cell.name} leaves {key[0]} apart from {hand_cell.name}"
+	length = [sum(r.length for r in routes.values()) / len(routes) for routes in (hand, bus)]
+	bends = [sum(r.bends for r in routes.values()) / len(routes) for routes in (hand, bus)]
+	print(f"[router] {bus_cell.name}: {len(bus)} routes as {hand_cell.name}, length {length[1]:.1f} um (hand-coded {length[0]:.1f} um), bends {bends[1]:.1f} ({bends[0]:.1f})")
+
+def check_GC4x4(GC_cell, origin, GC_pitch, ssc_point, layer=lib.LAYER_SiWG):
+	# GC4x4_bus_route_cell around the GC bodies, against lib_v8.GC4x4_route_cell, DRC clean with the GC array
+	(x0, y0), (x1, y1) = GC_cell.bounding_box()
+	keepouts = [[[origin[0] + j*GC_pitch + x0, origin[1] + i*GC_pitch + y0], [origin[0] + j*GC_pitch + x1, origin[1] + i*GC_pitch + y1]] for i in range(4) for j in range(4)]
+	hand_cell = lib.GC4x4_route_cell(origin, GC_pitch, ssc_point, layer, "ROUTER_CHECK_GC4x4_hand")
+	bus_cell = GC4x4_bus_route_cell(origin, GC_pitch, ssc_point, layer, "ROUTER_CHECK_GC4x4_bus", keepouts=keepouts)
+	check_route_cell(hand_cell, bus_cell, shared=4)
+	top = gdstk.Cell("ROUTER_CHECK_GC4x4")
+	top.add(
+		gdstk.Reference(GC_cell, origin=origin, columns=4, rows=4, spacing=(GC_pitch, GC_pitch)),
+		gdstk.Reference(bus_cell),
+	)
+	violations = lib_DRC.check_layer(top, layer)
+	assert not violations, f"check_GC4x4(): {len(violations)} DRC violations, ex. {violations[0]}"
+
+def self_check(layer=lib.LAYER_SiWG):
+	def ends(name, sources, ssc_point, ssc_index):
+		routes = bus_routes(sources, ssc_point, lib.ssc_pitch, layer, ssc_index=ssc_index)
+		targets = sorted(map(tuple, ssc_ports(ssc_point, lib.ssc_pitch, ssc_index)))
+		assert sorted(tuple(np.round(r.o, 3)) for r in routes) == targets, f"self_check(): {name}"
+		return routes
+	# source within two bends of its ssc port: jog
+	ends("jog", [(444, 500, "D")], (455, 0), [0])
+	ends("escape past", [(450, 500, "R")], (455, 0), [0])
+	assert ends("escape onto", [(444, 500, "R")], (455, 0), [0])[0].moves[1] == ("arc", "RD"), "self_check(): escape onto the ssc port"
+	# stacked and near-aligned sources: lanes in y order
+	ends("stacked", [(0, 300 + 50*k, "R") for k in range(4)], (500, 0), range(4))
+	ends("near-aligned", [(2*k, 300 + 50*k, "L") for k in range(4)], (-200, 0), range(4))
@@ -0,0 +1,245 @@
+# AIST 2025 TiN resistor model
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import numpy as np
+import gdstk
+import lib_v8_PORT as lib_PORT
+
+# Resistance of the TiN resistors (lib_v8.new_TIN_SERIES_TERM_cell, lib_v8_RF.new_Load_cell),
+# from the TiN and contact rectangles of the generated cells, and sizes for a target resistance:
+#
+#   rows = lib_TIN.tin_table(top_cell)     # one row per TiN cell and pair of terminals (pads or metal nets)
+#   lib_TIN.report(rows)
+#   lib_LOSS.write_table(rows, "AIST2025_CR_v8_tin.csv", fields=lib_TIN.TIN_FIELDS)
+#   sizes = lib_TIN.size_for(50)           # -> {"TIN_width": ..., "TIN_length": ..., "contact_width": ..., "contact_length": ...}
+#   new_TIN_SERIES_TERM_cell("TERM_50Ohm", **sizes)  # or new_TIN_SERIES_TERM_cell_for("TERM_50Ohm", 50)
+#
+# Between two contacts (pitch: distance of the contact centers, width: TiN width across the current):
+#   R = Rs * pitch / width + rho_c / (contact width * contact length) * 2
+# as in the hand calculations of lib_v8.TIN_test_patterns (36x24, 12x12 contacts => 18 + 5.56*2 = 29.1 ohm).
+# In the layout, the contacts of a TiN rectangle are a network: TiN between neighbouring contacts, and each contact
+# to the metal net it lands on. The terminals are the nets (all GND pads as one, as with the GSG probe),
+# ex. new_Load_cell, GND-SIG-GND on one strip: 8 + (74.8 + 8)/2 = 49.4 ohm seen from the pads.
+# The process values are design estimates, to be replaced with the measured values of the run.
+
+LAYER_MET    = 36 # same as lib_v8
+LAYER_TIN    = 38
+LAYER_CT2TIN = 39 # contact to TiN
+
+TIN_SHEET_RESISTANCE = 27        # ohm/sq
+TIN_CONTACT_RESISTIVITY = 8e-6   # ohm cm^2, contact to TiN
+
+# design grid of size_for()
+TIN_GRID = 1                                      # um
+TIN_WIDTHS = np.arange(6, 60 + TIN_GRID, TIN_GRID)    # um
+TIN_LENGTHS = np.arange(10, 100 + TIN_GRID, TIN_GRID) # um, contact pitch
+TIN_CONTACTS = [[7, 7], [10, 10], [12, 12]]       # um, contact sizes of lib_v8.TIN_test_patterns
+TIN_CONTACT_ENCLOSURE = 0  # um, contact in TiN (lib_v8_DRC.DRC_RULES)
+TIN_CONTACT_SPACING = 2    # um, between the two contacts (gap of new_TIN_SERIES_TERM_cell)
+TIN_TOLERANCE = 0.5        # ohm, sizes closer than this to the target are all accepted
+
+TIN_GROUND = "GND"  # pad ports of the probe ground, shorted by the GSG probe
+TIN_TOUCH = 1e-3    # um, metal closer than this is one net
+TIN_SHORT = 1e-9    # ohm, contacts of the R_sheet part
+
+TIN_FIELDS = ["cell", "parent", "instances", "terminals", "contacts", "TIN_width", "pitch", "contact_width", "contact_length", "R_sheet_ohm", "R_contact_ohm", "R_ohm"]
+
+#-------------------- model --------------------#
+
+def contact_resistance(contact_width, contact_length):
+	# ohm per contact, sizes in um (arrays)
+	return TIN_CONTACT_RESISTIVITY / (np.asarray(contact_width, dtype=float) * np.asarray(contact_length, dtype=float) * 1e-8)
+
+def sheet_resistance(TIN_width, TIN_length):
+	# ohm, TiN between the contact centers
+	return TIN_SHEET_RESISTANCE * np.asarray(TIN_length, dtype=float) / np.asarray(TIN_width, dtype=float)
+
+def resistance(TIN_width, TIN_length, contact_width, contact_length):
+	# ohm, two equal contacts (arrays are broadcast)
+	return sheet_resistance(TIN_width, TIN_length) + 2 * contact_resistance(contact_width, contact_length)
+
+#-------------------- geometry --------------------#
+
+class TINStrip:
+	# contacts on one TiN rectangle, in the order of the current, um
+	__slots__ = ("width", "pitches", "contacts", "centers")
+
+	def __init__(self, width, pitches, contacts, centers):
+		self.width = width       # across the current
+		self.pitches = pitches   # contact centers, between neighbouring contacts
+		self.contacts = contacts # [(width, length)], length along the current
+		self.centers = centers   # [(x, y)] in the coordinates of the cell the strip was read from
+
+def rectangles(polygons):
+	# (xmin, ymin, xmax, ymax) of the polygons
+	boxes = [poly.bounding_box() for poly in polygons]
+	return np.array([[b[0][0], b[0][1], b[1][0], b[1][1]] for b in boxes], dtype=float).reshape(-1, 4)
+
+def tin_strips(tin_polygons, contact_polygons):
+	# contacts on each TiN rectangle, along the direction the contacts are spread
+	TIN, CT = rectangles(tin_polygons), rectangles(contact_polygons)
+	center = (CT[:, :2] + CT[:, 2:]) / 2
+	size = CT[:, 2:] - CT[:, :2]
+	ret = []
+	for tin in TIN:
+		inside = np.all((center >= tin[:2]) & (center <= tin[2:]), axis=1)
+		if inside.sum() < 2:
+			continue
+		c, s = center[inside], size[inside]
+		axis = int(np.ptp(c[:, 1]) > np.ptp(c[:, 0])) # 0: current along x, 1: along y
+		order = np.argsort(c[:, axis])
+		c, s = c[order], s[order]
+		ret.append(TINStrip(
+			float(tin[3 - axis] - tin[1 - axis]), [float(p) for p in np.diff(c[:, axis])],
+			[(float(w), float(l)) for w, l in zip(s[:, 1 - axis], s[:, axis])], [tuple(float(v) for v in p) for p in c],
+		))
+	return ret
+
+#-------------------- network --------------------#
+
+def metal_nets(cell):
+	# metal of the cell (all levels) merged into nets, and the names of the ports on each net
+	polygons = cell.get_polygons(layer=LAYER_MET, datatype=0)
+	if not polygons:
+		return [], []
+	nets = gdstk.offset(polygons, TIN_TOUCH)
+	ports = list(lib_PORT.cell_ports(cell))
+	for ref in cell.references:
+		if not isinstance(ref.cell, str):
+			ports += list(lib_PORT.ports(ref))
+	names = [[] for _ in nets]
+	for port in ports:
+		for k, net in enumerate(nets):
+			if gdstk.inside([port.point], [net])[0]:
+				names[k].append(port.name)
+	return nets, names
+
+def terminals(strip, nets, names):
+	# terminal of each contact (None: floating): all GND pad nets as one (probe ground), other pad nets by port name,
+	# nets without ports as MET0, MET1, ... along the strip; a strip without any contact on metal has one terminal per contact
+	labels = {}
+	ret = []
+	for center in strip.centers:
+		hit = [j for j, net in enumerate(nets) if gdstk.inside([center], [net])[0]]
+		if not hit:
+			ret.append(None)
+			continue
+		if hit[0] not in labels:
+			if any(name.startswith(TIN_GROUND) for name in names[hit[0]]):
+				label = TIN_GROUND
+			else:
+				label = "/".join(sorted(set(names[hit[0]]))) or "MET"
+				if label == "MET" or label in labels.values():
+					label += str(sum(v.startswith(label) for v in labels.values()))
+			labels[hit[0]] = label
+		ret.append(labels[hit[0]])
+	if all(t is None for t in ret):
+		ret = [f"CT{k}" for k in range(len(ret))]
+	return ret
+
+def network_resistance(strip, contact_terminals, a, b, contact_R=None):
+	# ohm between the terminals a and b (others floating): TiN between neighbouring contacts,
+	# contact resistance from each contact to its terminal
+	names = sorted(set(t for t in contact_terminals if t is not None))
+	n = len(strip.centers)
+	node = {t: n + k for k, t in enumerate(names)}
+	G = np.zeros((n + len(names), n + len(names)))
+	def connect(i, j, R):
+		G[i, i] += 1 / R
+		G[j, j] += 1 / R
+		G[i, j] -= 1 / R
+		G[j, i] -= 1 / R
+	for k, pitch in enumerate(strip.pitches):
+		connect(k, k + 1, float(sheet_resistance(strip.width, pitch)))
+	for k, (t, (width, length)) in enumerate(zip(contact_terminals, strip.contacts)):
+		if t is not None:
+			connect(k, node[t], float(contact_resistance(width, length)) if contact_R is None else contact_R)
+	keep = [k for k in range(len(G)) if k != node[b]]
+	current = np.zeros(len(keep))
+	current[keep.index(node[a])] = 1
+	return float(np.linalg.solve(G[np.ix_(keep, keep)], current)[keep.index(node[a])])
+
+def cell_strips(cell):
+	# (TiN cell, strip, contact terminals) of the TiN rectangles of the cell and of its direct references,
+	# with the metal of the cell; TiN whose contacts land on no metal of the cell are left to the parents
+	nets, names = metal_nets(cell)
+	items = [(cell, cell.get_polygons(depth=0, layer=LAYER_TIN, datatype=0), cell.get_polygons(depth=0, layer=LAYER_CT2TIN, datatype=0))]
+	for ref in cell.references:
+		if not isinstance(ref.cell, str) and isinstance(ref.cell, gdstk.Cell):
+			items.append((ref.cell, ref.get_polygons(depth=0, layer=LAYER_TIN, datatype=0), ref.get_polygons(depth=0, layer=LAYER_CT2TIN, datatype=0)))
+	ret = []
+	for tin_cell, tin, contacts in items:
+		for strip in tin_strips(tin, contacts):
+			contact_terminals = terminals(strip, nets, names)
+			if any(t is not None and not t.startswith("CT") for t in contact_terminals):
+				ret.append((tin_cell, strip, contact_terminals))
+			elif tin_cell is cell:
+				ret.append((tin_cell, strip, None))
+	return ret
+
+#-------------------- sizing --------------------#
+
+def size_grid(widths=TIN_WIDTHS, lengths=TIN_LENGTHS, contacts=TIN_CONTACTS):
+	# (width, length, contact) arrays of all sizes, and the design rules of new_TIN_SERIES_TERM_cell
+	contacts = np.asarray(contacts, dtype=float).reshape(-1, 2)
+	W = np.asarray(widths, dtype=float)[:, None, None]
+	L = np.asarray(lengths, dtype=float)[None, :, None]
+	cw, cl = contacts[None, None, :, 0], contacts[None, None, :, 1]
+	valid = (cw + 2 * TIN_CONTACT_ENCLOSURE <= W) & (L - cl >= TIN_CONTACT_SPACING)
+	return np.broadcast_arrays(W, L, cw, cl, valid)
+
+def size_for(target, widths=TIN_WIDTHS, lengths=TIN_LENGTHS, contacts=TIN_CONTACTS, tolerance=TIN_TOLERANCE):
+	# keyword arguments of new_TIN_SERIES_TERM_cell for the target resistance (ohm):
+	# among the sizes within the tolerance, the lowest contact resistance (the sheet resistance is
+	# the better known part), then the smallest TiN area; a target out of reach of the grid is an error
+	W, L, cw, cl, valid = size_grid(widths, lengths, contacts)
+	R = resistance(W, L, cw, cl)
+	error = np.where(valid, np.abs(R - target), np.inf)
+	best = error.min()
+	assert np.isfinite(best), "size_for(): no valid size on the grid"
+	assert best <= tolerance, f"size_for(): {target:g} ohm not on the grid, which gives {R[valid].min():.1f} to {R[valid].max():.1f} ohm (nearest: {best:.1f} ohm off)"
+	candidates = np.flatnonzero(error <= tolerance)
+	contact = contact_resistance(cw, cl).ravel()[candidates]
+	area = (W * (L + cl + 2 * TIN_CONTACT_SPACING)).ravel()[candidates]
+	k = candidates[np.lexsort((error.ravel()[candidates], area, contact))[0]]
+	return {
+		"TIN_width": float(W.flat[k]), "TIN_length": float(L.flat[k]),
+		"contact_width": float(cw.flat[k]), "contact_length": float(cl.flat[k]),
+	}
+
+#-------------------- tables --------------------#
+
+def tin_table(top_cell):
+	# one row per TiN cell, parent and pair of terminals (same rows of several references are counted in instances)
+	cells = [top_cell] + sorted([c for c in top_cell.dependencies(True) if isinstance(c, gdstk.Cell)], key=lambda c: c.name)
+	found = {}
+	for cell in cells:
+		for tin_cell, strip, contact_terminals in cell_strips(cell):
+			found.setdefault(tin_cell.name, []).append((cell, strip, contact_terminals))
+	rows = {}
+	for name, items in found.items():
+		placed = [item for item in items if item[2] is not None]
+		for parent, strip, contact_terminals in (placed if placed else [(items[0][0], items[0][1], terminals(items[0][1], [], []))]):
+			names = sorted(set(t for t in contact_terminals if t is not None))
+			for i, a in enumerate(names):
+				for b in names[i + 1:]:
+					R = network_resistance(strip, contact_terminals, a, b)
+					R_sheet = network_resistance(strip, contact_terminals, a, b, contact_R=TIN_SHORT)
+					row = {
+						"cell": name, "parent": parent.name, "instances": 1, "terminals": f"{a}-{b}", "contacts": len(strip.contacts),
+						"TIN_width": round(strip.width, 3), "pitch": round(strip.pitches[0], 3),
+						"contact_width": round(strip.contacts[0][0], 3), "contact_length": round(strip.contacts[0][1], 3),
+						"R_sheet_ohm": round(R_sheet, 2), "R_contact_ohm": round(R - R_sheet, 2), "R_ohm": round(R, 2),
+					}
+					key = tuple(v for k, v in row.items() if k != "instances")
+					if key in rows:
+						rows[key]["instances"] += 1
+					else:
+						rows[key] = row
+	return list(rows.values())
+
+def report(rows):
+	print(f"[tin] {'cell':<44} {'terminals':<16} {'n':>3} {'width':>6} {'pitch':>6} {'contact':>8} {'R_sheet':>9} {'R_contact':>9} {'R':>9}")
+	for row in rows:
+		print(f"[tin] {row['cell']:<44} {row['terminals']:<16} {row['instances']:>3} {row['TIN_width']:>4.0f}um {row['pitch']:>4.0f}um {row['contact_width']:>3.0f}x{row['contact_length']:<2.0f}um {row['R_sheet_ohm']:>6.1f}ohm {row['R_contact_ohm']:>6.1f}ohm {row['R_ohm']:>6.1f}ohm")
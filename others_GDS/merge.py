@@ -1,103 +1,355 @@
 # AIST 2025 design merging script
 # created on: 2026/01/23
-# last change: 2026/01/23
+# last change: 2026/10/18
 
+import os
+import sys
+import tempfile
+import collections
+import concurrent.futures
 import gdstk
 import numpy as np
 
-lib_ALL = gdstk.Library()
-top_cell = lib_ALL.new_cell("TOP")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../design"))
+import lib_v8_CACHE as lib_CACHE
+import lib_v8_OAS as lib_OAS
 
-CHIP_WIDTH = 5000
-CHIP_HEIGHT = 10000
+# Each source GDS is read in its own worker process: layer 0 is dropped while parsing (read_gds filter),
+# the top cell is renamed, the source specific edits are applied (SSC removal in the MPW frame) and
+# the result is written to a temporary GDS.
+# The merged library is then streamed to disk with gdstk.GdsWriter: the temporary files are copied
+# cell by cell as raw GDS records (gdstk.read_rawcells), so only one source is in memory at a time.
+# The workers still load whole sources (read_gds, rename_source): they are started only while the file
+# sizes of the sources being loaded stay within AIST_MERGE_MEMORY (MB, default 2048; a larger source runs alone),
+# so peak memory follows that budget (times the in-memory size per file size), not jobs x largest source.
+#
+# Cell names are resolved with content hashes (lib_v8_CACHE.cell_digest, references included):
+#   same content (any name)          -> one copy, the first one in the order of SOURCES
+#   same name, different content     -> renamed {new name}_{cell name} (ex. Sherry_2_wg)
+# Sources whose cells are renamed or merged are rewritten by the workers before streaming.
+
+MERGE_JOBS = int(os.environ.get("AIST_MERGE_JOBS", os.cpu_count() or 1))
+MERGE_MEMORY = float(os.environ.get("AIST_MERGE_MEMORY", 2048)) * 2**20 # bytes of source files loaded at once
+# OASIS export and round trip check of the merged chip (lib_v8_OAS), off by default:
+# both load the whole merged library (the check loads the GDS and the OASIS file together)
+MERGE_OAS = os.environ.get("AIST_MERGE_OAS", "0") != "0"
+REMOVED_LAYERS = {0}
 
-AIST_MPW_LIB = gdstk.read_gds("../MPW_Cell/MPW_Cell_5x10.gds")
-JIANG_LIB = gdstk.read_gds("../others_GDS/Jiang_20260131_2.gds")
-SHERRY_LIB_1 = gdstk.read_gds("../others_GDS/Sherry_20260131_2.gds")
-SHERRY_LIB_2 = gdstk.read_gds("../others_GDS/Sherry_20260131_1.gds")
-SUGANUMA_LIB = gdstk.read_gds("../others_GDS/20260130_SUGANUMA_main-3.gds")
-REN_LIB = gdstk.read_gds("../design/AIST2025_CR_v8.gds")
-
-AIST_MPW_LIB.rename_cell("MPW_cell", "BASE")
-JIANG_LIB.rename_cell("Top_Final_All_Loops", "Jiang")
-SHERRY_LIB_1.rename_cell("MAIN_ARRAY", "Sherry_1")
-SHERRY_LIB_2.rename_cell("MAIN_ARRAY", "Sherry_2")
-SUGANUMA_LIB.rename_cell("TOP", "Suganuma")
-REN_LIB.rename_cell("TOP_Ren", "Ren")
-
-# add rectangle regions for each pattern
 CHIP_WIDTH = 5000
 CHIP_HEIGHT = 10000
 JIANG_HEIGHT = 3500
-layer = 50 # chip area
-chip_area_JIANG = gdstk.rectangle([0, 0], [CHIP_WIDTH, JIANG_HEIGHT], layer=layer, datatype=0)
-chip_area_SUGANUMA_LEFT = gdstk.rectangle([0, JIANG_HEIGHT], [CHIP_WIDTH/2, CHIP_HEIGHT], layer=layer, datatype=0)
-chip_area_SUGANUMA_RIGHT = gdstk.rectangle([CHIP_WIDTH/2, JIANG_HEIGHT], [CHIP_WIDTH, CHIP_HEIGHT], layer=layer, datatype=0)
-top_cell.add(
-	chip_area_JIANG,
-	chip_area_SUGANUMA_LEFT,
-	chip_area_SUGANUMA_RIGHT,
-)
-
-# add NODMY region for additional dicing
-layer = 60 # NODMY
-dicing_width = 50
-dicing_JIANG = gdstk.rectangle([dicing_width, JIANG_HEIGHT-dicing_width], [CHIP_WIDTH-dicing_width, JIANG_HEIGHT+dicing_width], layer=layer, datatype=0)
-dicing_SUGANUMA = gdstk.rectangle([CHIP_WIDTH/2-dicing_width, JIANG_HEIGHT+dicing_width], [CHIP_WIDTH/2+dicing_width, CHIP_HEIGHT-dicing_width], layer=layer, datatype=0)
-top_cell.add(
-	dicing_JIANG,
-	dicing_SUGANUMA,
-)
-
-# remove layer 0
-for ext_lib in [AIST_MPW_LIB, JIANG_LIB, SHERRY_LIB_1, SHERRY_LIB_2, SUGANUMA_LIB, REN_LIB]:
+
+# (file, top cell, new name, origin, rotation)
+SOURCES = [
+	("../MPW_Cell/MPW_Cell_5x10.gds",                  "MPW_cell",            "BASE",     (2500, 5000),                   0),
+	("../others_GDS/Jiang_20260131_2.gds",             "Top_Final_All_Loops", "Jiang",    (450, 800),                     0),
+	("../others_GDS/Sherry_20260131_2.gds",            "MAIN_ARRAY",          "Sherry_1", (2370, 340+3500),               np.pi/2),
+	("../others_GDS/Sherry_20260131_1.gds",            "MAIN_ARRAY",          "Sherry_2", (3360, 340+3500),               np.pi/2),
+	("../others_GDS/20260130_SUGANUMA_main-3.gds",     "TOP",                 "Suganuma", (CHIP_WIDTH/2, CHIP_HEIGHT-5000), 0),
+	("../design/AIST2025_CR_v8.gds",                   "TOP_Ren",             "Ren",      (0, 0),                         0),
+]
+
+#-------------------- region clearing --------------------#
+# clear_regions(ext_lib, cell_name, regions): elements of the cell overlapping a region (box ((x0, y0), (x1, y1))
+# in the coordinates of the cell, touching included) are removed, or clipped with clip=True (labels are removed).
+# References are followed down to depth (None: any depth): a reference at the depth limit or entirely inside
+# a region is removed as a whole, other overlapping references are cleared in their cell (in place if the cell
+# is placed once in the library, otherwise in a copy "{cell name}_cleared").
+# Each cell is indexed once as an array of element boxes (reference boxes are transformed with numpy), so the
+# overlap test is one vectorized comparison per cell, and repetitions are split only where they are hit.
+
+def box_array(boxes):
+	return np.array([[b[0][0], b[0][1], b[1][0], b[1][1]] for b in boxes], dtype=float).reshape(-1, 4)
+
+def repetition_extent(repetition):
+	if repetition.size == 0:
+		return np.zeros(4)
+	offsets = np.array(repetition.get_offsets())
+	return np.concatenate([offsets.min(axis=0), offsets.max(axis=0)])
+
+def transform_boxes(boxes, origins, rotations, magnifications, x_reflections):
+	# boxes of the corners transformed as in gdstk.Reference (reflection, magnification, rotation, translation)
+	x = boxes[:, [0, 2, 2, 0]] * magnifications[:, None]
+	y = boxes[:, [1, 1, 3, 3]] * magnifications[:, None] * np.where(x_reflections, -1, 1)[:, None]
+	c, s = np.cos(rotations)[:, None], np.sin(rotations)[:, None]
+	tx = origins[:, 0:1] + c*x - s*y
+	ty = origins[:, 1:2] + s*x + c*y
+	return np.stack([tx.min(axis=1), ty.min(axis=1), tx.max(axis=1), ty.max(axis=1)], axis=1)
+
+def element_boxes(cell, cell_boxes):
+	# elements of the cell (repetitions included) and their boxes
+	elements, boxes = [], []
+	for poly in cell.polygons:
+		elements.append(poly)
+		boxes.append(poly.bounding_box())
+	for path in cell.paths:
+		polys = box_array([poly.bounding_box() for poly in path.to_polygons()])
+		if len(polys) > 0:
+			elements.append(path)
+			boxes.append(((polys[:, 0].min(), polys[:, 1].min()), (polys[:, 2].max(), polys[:, 3].max())))
+	for label in cell.labels:
+		extent = repetition_extent(label.repetition)
+		elements.append(label)
+		boxes.append(((label.origin[0] + extent[0], label.origin[1] + extent[1]), (label.origin[0] + extent[2], label.origin[1] + extent[3])))
+	boxes = box_array(boxes)
+	refs = [ref for ref in cell.references if not isinstance(ref.cell, str)]
+	if len(refs) > 0:
+		for ref in refs:
+			if ref.cell.name not in cell_boxes:
+				box = ref.cell.bounding_box()
+				cell_boxes[ref.cell.name] = np.array([box[0][0], box[0][1], box[1][0], box[1][1]]) if box is not None else np.zeros(4)
+		ref_boxes = transform_boxes(
+			np.array([cell_boxes[ref.cell.name] for ref in refs]),
+			np.array([ref.origin for ref in refs], dtype=float),
+			np.array([ref.rotation for ref in refs], dtype=float),
+			np.array([ref.magnification for ref in refs], dtype=float),
+			np.array([ref.x_reflection for ref in refs], dtype=bool),
+		)
+		ref_boxes += np.array([repetition_extent(ref.repetition) for ref in refs])
+		elements += refs
+		boxes = np.concatenate([boxes, ref_boxes])
+	return elements, boxes
+
+def overlaps(boxes, regions):
+	# (elements, regions)
+	return (
+		(boxes[:, None, 0] <= regions[None, :, 2]) & (regions[None, :, 0] <= boxes[:, None, 2]) &
+		(boxes[:, None, 1] <= regions[None, :, 3]) & (regions[None, :, 1] <= boxes[:, None, 3])
+	)
+
+def contains(regions, box):
+	return ((regions[:, 0] <= box[0]) & (regions[:, 1] <= box[1]) & (box[2] <= regions[:, 2]) & (box[3] <= regions[:, 3])).any()
+
+def split_repetition(element):
+	# one element per repetition offset
+	ret = []
+	for dx, dy in element.repetition.get_offsets():
+		if isinstance(element, gdstk.Reference):
+			ret.append(gdstk.Reference(element.cell, (element.origin[0] + dx, element.origin[1] + dy), element.rotation, element.magnification, element.x_reflection))
+		elif isinstance(element, gdstk.Label):
+			label = element.copy()
+			label.origin = (element.origin[0] + dx, element.origin[1] + dy)
+			label.repetition = None
+			ret.append(label)
+		else:
+			copy = element.copy()
+			copy.repetition = None
+			ret.append(copy.translate(dx, dy))
+	return ret
+
+def local_regions(regions, ref):
+	# regions in the coordinates of the referenced cell
+	assert np.abs(np.sin(2*ref.rotation)) < 1e-9, f"clear_regions(): reference to {ref.cell.name} is not Manhattan"
+	x = regions[:, [0, 2]] - ref.origin[0]
+	y = regions[:, [1, 3]] - ref.origin[1]
+	c, s = np.cos(ref.rotation), np.sin(ref.rotation)
+	x, y = (c*x + s*y) / ref.magnification, (c*y - s*x) / ref.magnification
+	if ref.x_reflection:
+		y = -y
+	return np.stack([x.min(axis=1), y.min(axis=1), x.max(axis=1), y.max(axis=1)], axis=1)
+
+def clear_cell(cell, regions, depth, clip, state):
+	elements, boxes = element_boxes(cell, state["cell_boxes"])
+	hit = overlaps(boxes, regions).any(axis=1)
+	repeated = [elements[k] for k in np.nonzero(hit)[0] if elements[k].repetition.size > 0]
+	if len(repeated) > 0:
+		for element in repeated:
+			cell.remove(element)
+			cell.add(*split_repetition(element))
+		elements, boxes = element_boxes(cell, state["cell_boxes"])
+		hit = overlaps(boxes, regions).any(axis=1)
+	report = state["report"]
+	for k in np.nonzero(hit)[0]:
+		element = elements[k]
+		if isinstance(element, gdstk.Reference):
+			if depth == 0 or contains(regions, boxes[k]):
+				cell.remove(element)
+				report[(cell.name, "removed", f"{element.cell.name} reference")] += 1
+			else:
+				element.cell = cleared_cell(element.cell, local_regions(regions, element), None if depth is None else depth - 1, clip, state)
+		elif isinstance(element, gdstk.Label):
+			cell.remove(element)
+			report[(cell.name, "removed", f"label ({element.layer}, {element.texttype})")] += 1
+		else:
+			cell.remove(element)
+			kind = f"polygon ({element.layer}, {element.datatype})" if isinstance(element, gdstk.Polygon) else "path"
+			report[(cell.name, "clipped" if clip else "removed", kind)] += 1
+			if clip:
+				region_polygons = [gdstk.rectangle(r[:2], r[2:]) for r in regions]
+				for poly in ([element] if isinstance(element, gdstk.Polygon) else element.to_polygons()):
+					cell.add(*gdstk.boolean(poly, region_polygons, "not", layer=poly.layer, datatype=poly.datatype))
+
+def cleared_cell(cell, regions, depth, clip, state):
+	key = (cell.name, np.round(regions, 3).tobytes(), depth)
+	if key not in state["cleared"]:
+		if state["placements"][cell.name] > 1:
+			name, k = f"{cell.name}_cleared", 1
+			while name in state["names"]:
+				name, k = f"{cell.name}_cleared{k}", k + 1
+			state["names"].add(name)
+			copy = cell.copy(name)
+			state["ext_lib"].add(copy)
+			state["copied"].add(cell.name)
+			state["cell_boxes"][name] = state["cell_boxes"][cell.name]
+			cell = copy
+		clear_cell(cell, regions, depth, clip, state)
+		state["cell_boxes"].pop(cell.name, None) # content changed
+		state["cleared"][key] = cell
+	return state["cleared"][key]
+
+def clear_regions(ext_lib, cell_name, regions, depth=None, clip=False):
+	# returns {(cell name, "removed" or "clipped", element): count}
+	placements = collections.Counter()
 	for cell in ext_lib.cells:
-		for poly in list(cell.polygons):
-			if poly.layer == 0:
-				cell.remove(poly)
-		for path in list(cell.paths):
-			if path.layers == 0:
-				cell.remove(path)
-		for label in list(cell.labels):
-			if label.layer == 0:
-				cell.remove(label)
-
-# remove SSCs
-def bbox_overlap(b1, b2):
-    return not (
-        b1[1][0] < b2[0][0] or
-        b1[0][0] > b2[1][0] or
-        b1[1][1] < b2[0][1] or
-        b1[0][1] > b2[1][1]
-    )
-exclude_bbox_left = ((-500-CHIP_WIDTH/2, 0-CHIP_HEIGHT/2), (500-CHIP_WIDTH/2, 5000-CHIP_HEIGHT/2))
-exclude_bbox_right = ((-500+CHIP_WIDTH/2, 0-CHIP_HEIGHT/2), (500+CHIP_WIDTH/2, CHIP_HEIGHT-CHIP_HEIGHT/2))
-cell = AIST_MPW_LIB['ssc_array']
-for ref in cell.references:
-	ref_bbox = ref.bounding_box()
-	if bbox_overlap(ref_bbox, exclude_bbox_left) or bbox_overlap(ref_bbox, exclude_bbox_right):
-		cell.remove(ref)
-for poly in cell.polygons:
-	bbox = poly.bounding_box()
-	if bbox_overlap(ref_bbox, exclude_bbox_left) or bbox_overlap(ref_bbox, exclude_bbox_right):
-		cell.remove(poly)
-
-# merge and avoid same names
-for ext_lib in [AIST_MPW_LIB, JIANG_LIB, SHERRY_LIB_1, SHERRY_LIB_2, SUGANUMA_LIB, REN_LIB]:
-	cell_map = {cell.name: cell for cell in lib_ALL.cells}
+		for ref in cell.references:
+			if not isinstance(ref.cell, str):
+				placements[ref.cell.name] += max(1, ref.repetition.size)
+	state = {
+		"ext_lib": ext_lib,
+		"placements": placements,
+		"names": set(cell.name for cell in ext_lib.cells),
+		"cell_boxes": {},
+		"cleared": {},
+		"copied": set(),
+		"report": collections.Counter(),
+	}
+	clear_cell(ext_lib[cell_name], box_array(regions), depth, clip, state)
+	# cells replaced by their cleared copies everywhere
+	referenced = set(ref.cell.name for cell in ext_lib.cells for ref in cell.references if not isinstance(ref.cell, str))
+	for name in state["copied"] - referenced:
+		ext_lib.remove(ext_lib[name])
+	for (name, action, element), count in state["report"].items():
+		print(f"[merge] {name}: {action} {count} x {element}")
+	return state["report"]
+
+#-------------------- SSC removal --------------------#
+def remove_SSCs(ext_lib):
+	exclude_bbox_left = ((-500-CHIP_WIDTH/2, 0-CHIP_HEIGHT/2), (500-CHIP_WIDTH/2, 5000-CHIP_HEIGHT/2))
+	exclude_bbox_right = ((-500+CHIP_WIDTH/2, 0-CHIP_HEIGHT/2), (500+CHIP_WIDTH/2, CHIP_HEIGHT-CHIP_HEIGHT/2))
+	# SSC units and their markers, whole units are removed (depth=0)
+	clear_regions(ext_lib, "ssc_array", [exclude_bbox_left, exclude_bbox_right], depth=0)
+
+EDITS = {"BASE": remove_SSCs} # new name -> function(library)
+
+#-------------------- sources --------------------#
+def read_source(source, tmp_dir):
+	# runs in a worker process: filtered, renamed and edited source written to tmp_dir
+	filename, top_name, new_name = source[:3]
+	info = gdstk.gds_info(filename)
+	keep = {ld for ld in info["layers_and_datatypes"] if ld[0] not in REMOVED_LAYERS}
+	ext_lib = gdstk.read_gds(filename, unit=1e-6, filter=keep)
+	for cell in ext_lib.cells: # labels are not filtered by read_gds
+		for label in [label for label in cell.labels if label.layer in REMOVED_LAYERS]:
+			cell.remove(label)
+	ext_lib.rename_cell(top_name, new_name)
+	if new_name in EDITS:
+		EDITS[new_name](ext_lib)
+	ext_lib.precision = 1e-9 # same database unit as the merged library, raw records are copied as they are
+	path = os.path.join(tmp_dir, new_name + ".gds")
+	ext_lib.write_gds(path)
+	memo = {}
+	return path, {cell.name: lib_CACHE.cell_digest(cell, memo) for cell in ext_lib.cells}
+
+def merged_names(digests):
+	# cell name -> name in the merged library, per source
+	kept = {} # digest -> merged name
+	used = {"TOP"}
+	ret = []
+	for (_, _, new_name, *_), cell_digests in zip(SOURCES, digests):
+		names = {}
+		for name, digest in cell_digests.items():
+			if digest in kept:
+				names[name] = kept[digest]
+				if kept[digest] != name:
+					print(f"[merge] {new_name}: {name} -> {kept[digest]} (same content)")
+				continue
+			merged_name = name
+			while merged_name in used:
+				merged_name = f"{new_name}_{merged_name}"
+			if merged_name != name:
+				print(f"[merge] {new_name}: {name} -> {merged_name} (name clash)")
+			kept[digest] = merged_name
+			used.add(merged_name)
+			names[name] = merged_name
+		ret.append(names)
+	return ret
+
+def rename_source(path, names):
+	# runs in a worker process: cells renamed in place, identical cells of the source merged into one
+	# (copies of cells from an earlier source keep their merged name and are skipped while streaming)
+	ext_lib = gdstk.read_gds(path)
+	merged = {} # merged name -> kept cell
 	for cell in ext_lib.cells:
-		if cell.name in cell_map:
-			ext_cell = cell_map[cell.name]
-		else:
-			lib_ALL.add(cell)
-			cell_map[cell.name] = cell
-top_cell.add(
-	gdstk.Reference(AIST_MPW_LIB["BASE"], origin=(2500,5000)),
-	gdstk.Reference(JIANG_LIB["Jiang"], origin=(450,800)),
-	gdstk.Reference(SHERRY_LIB_1["Sherry_1"], origin=(2370, 340+3500), rotation=np.pi/2),
-	gdstk.Reference(SHERRY_LIB_2["Sherry_2"], origin=(3360, 340+3500), rotation=np.pi/2),
-	gdstk.Reference(SUGANUMA_LIB["Suganuma"], origin=(CHIP_WIDTH/2, CHIP_HEIGHT-5000)),
-	gdstk.Reference(REN_LIB["Ren"], origin=(0, 0)),
-)
-
-lib_ALL.write_gds("AIST2025_TLab.gds")
+		merged.setdefault(names[cell.name], cell)
+	for cell in ext_lib.cells:
+		for ref in cell.references:
+			if not isinstance(ref.cell, str) and merged[names[ref.cell.name]] is not ref.cell:
+				ref.cell = merged[names[ref.cell.name]]
+	for cell in list(ext_lib.cells):
+		if merged[names[cell.name]] is not cell:
+			ext_lib.remove(cell)
+	for cell in ext_lib.cells:
+		cell.name = names[cell.name]
+	ext_lib.write_gds(path)
+
+def merged_top_cell(names):
+	top_cell = gdstk.Cell("TOP")
+	# add rectangle regions for each pattern
+	layer = 50 # chip area
+	chip_area_JIANG = gdstk.rectangle([0, 0], [CHIP_WIDTH, JIANG_HEIGHT], layer=layer, datatype=0)
+	chip_area_SUGANUMA_LEFT = gdstk.rectangle([0, JIANG_HEIGHT], [CHIP_WIDTH/2, CHIP_HEIGHT], layer=layer, datatype=0)
+	chip_area_SUGANUMA_RIGHT = gdstk.rectangle([CHIP_WIDTH/2, JIANG_HEIGHT], [CHIP_WIDTH, CHIP_HEIGHT], layer=layer, datatype=0)
+	top_cell.add(
+		chip_area_JIANG,
+		chip_area_SUGANUMA_LEFT,
+		chip_area_SUGANUMA_RIGHT,
+	)
+	# add NODMY region for additional dicing
+	layer = 60 # NODMY
+	dicing_width = 50
+	dicing_JIANG = gdstk.rectangle([dicing_width, JIANG_HEIGHT-dicing_width], [CHIP_WIDTH-dicing_width, JIANG_HEIGHT+dicing_width], layer=layer, datatype=0)
+	dicing_SUGANUMA = gdstk.rectangle([CHIP_WIDTH/2-dicing_width, JIANG_HEIGHT+dicing_width], [CHIP_WIDTH/2+dicing_width, CHIP_HEIGHT-dicing_width], layer=layer, datatype=0)
+	top_cell.add(
+		dicing_JIANG,
+		dicing_SUGANUMA,
+	)
+	# sources, referenced by name (their cells are streamed separately)
+	for (_, _, new_name, origin, rotation), source_names in zip(SOURCES, names):
+		top_cell.add(gdstk.Reference(source_names[new_name], origin=origin, rotation=rotation))
+	return top_cell
+
+def bounded_map(pool, func, sizes, *args):
+	# pool.map, with tasks started only while the sizes of the running ones fit in MERGE_MEMORY
+	futures, running = [None] * len(sizes), {}
+	for k, size in enumerate(sizes):
+		while running and sum(running.values()) + size > MERGE_MEMORY:
+			done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+			for future in done:
+				running.pop(future)
+		futures[k] = pool.submit(func, *[a[k] for a in args])
+		running[futures[k]] = size
+	return [future.result() for future in futures]
+
+def merge(outfile):
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		with concurrent.futures.ProcessPoolExecutor(min(MERGE_JOBS, len(SOURCES))) as pool:
+			sizes = [os.path.getsize(source[0]) for source in SOURCES]
+			paths, digests = zip(*bounded_map(pool, read_source, sizes, SOURCES, [tmp_dir]*len(SOURCES)))
+			names = merged_names(digests)
+			renamed = [i for i, source_names in enumerate(names) if any(k != v for k, v in source_names.items())]
+			bounded_map(pool, rename_source, [os.path.getsize(paths[i]) for i in renamed], [paths[i] for i in renamed], [names[i] for i in renamed])
+		writer = gdstk.GdsWriter(outfile, unit=1e-6, precision=1e-9)
+		written = set()
+		for path in paths: # in the order of SOURCES, a cell name already written has the same content
+			for name, raw_cell in gdstk.read_rawcells(path).items():
+				if name not in written:
+					writer.write(raw_cell)
+					written.add(name)
+		writer.write(merged_top_cell(names))
+		writer.close()
+
+if __name__ == "__main__":
+	merge("AIST2025_TLab.gds")
+	if MERGE_OAS:
+		lib_OAS.write_oas("AIST2025_TLab.gds", "AIST2025_TLab.oas")
+		assert not lib_OAS.check_oas("AIST2025_TLab.gds", "AIST2025_TLab.oas"), "OASIS round trip differs from the GDS"
@@ -1,9 +1,11 @@
 # Simulating transmittance of asymmetric MZM
 # created on: 2026/01/21
-# last change: 2026/01/21
+# last change: 2026/10/18
 
 import numpy as np
+import lib_plot # before pyplot: Agg backend
 import matplotlib.pyplot as plt
+import lib_amzm
 
 phi_num = 6
 phi_list = [np.pi * i/phi_num for i in range(phi_num)]
@@ -17,8 +19,7 @@ color_list = [
 	'darkorchid',
 ]
 
-n_Si = 3.48
-dL_list = [ # m, difference of optical path length
+dL_list = [ # m, difference of geometrical path length (n_eff, n_g in lib_amzm)
 	1e-6,
 	10e-6,
 	20e-6,
@@ -33,40 +34,30 @@ lamb_max = 1565e-9 # m
 lamb_num = 1000
 lamb = np.linspace(lamb_min, lamb_max, lamb_num)
 
-def amzm_transmittance(lamb, dL, phi):
-	branch1 = 1/np.sqrt(2) # reference path
-	branch2 = 1/np.sqrt(2) * np.exp(1j*2*np.pi*n_Si*dL/lamb + 1j*phi)
-	return np.abs(1/np.sqrt(2) * (branch1 + branch2)) ** 2
-
-def plot(x, y_list, phi_list, dL, color_list, filename):
-	dlamb_FSR = (1550e-9*1550e-9)/(n_Si*dL)
+def draw(fig, x, y_dB_list, dL):
+	dlamb_FSR = lib_amzm.fsr(dL)
 	# print(f"[debug] dL={dL*1e6:.0f}um, dlamb_FSR={dlamb_FSR*1e9:.5f}nm")
 	# multiple plot on one graph
-	plt.rcParams["font.size"] = 16
-	fig = plt.figure(figsize=(12,6))
-	for i in range(len(y_list)):
-		phi = phi_list[i]
-		y = y_list[i]
-		y_dB = 10*np.log10(y)
+	ax = fig.add_subplot()
+	for i in range(len(y_dB_list)):
 		color = color_list[i]
-		plt.plot(x*1e9, y_dB, color=color, label="$\\phi=\\frac{"+f"{2*i}"+"\\pi}{"+f"{phi_num}"+"}$")
-	plt.legend(loc='right', bbox_to_anchor=(1.2,0.5))
-	plt.xlim([lamb_min*1e9, lamb_max*1e9])
-	plt.ylim([-70, 0])
-	plt.xlabel("Wavelength (nm)")
-	plt.ylabel("Transmittance (dB)")
-	plt.title(f"dL={dL*1e6:.0f}µm, "+"$\\Delta \\lambda_{FSR}="+f"{dlamb_FSR*1e9:.3f}$nm")
-	plt.tight_layout()
-	plt.savefig(filename)
-	# free used memory
-	plt.clf()
-	plt.close()
-	print(f"[out] saved figure as '{filename}'")
-
-for dL in dL_list:
-	y_list = []
-	for i in range(phi_num):
-		phi = phi_list[i]
-		y = amzm_transmittance(lamb, dL, phi)
-		y_list.append(y)
-	plot(lamb, y_list, phi_list, dL, color_list, f"amzm_T_dL{dL*1e6:.0f}um.svg")
+		ax.plot(x*1e9, y_dB_list[i], color=color, label="$\\phi=\\frac{"+f"{2*i}"+"\\pi}{"+f"{phi_num}"+"}$")
+	ax.legend(loc='right', bbox_to_anchor=(1.2,0.5))
+	ax.set_xlim([lamb_min*1e9, lamb_max*1e9])
+	ax.set_ylim([-70, 0])
+	ax.set_xlabel("Wavelength (nm)")
+	ax.set_ylabel("Transmittance (dB)")
+	ax.set_title(f"dL={dL*1e6:.0f}µm, "+"$\\Delta \\lambda_{FSR}="+f"{dlamb_FSR*1e9:.3f}$nm")
+	fig.tight_layout()
+
+spec = lib_amzm.transmittance(dL_list, phi_list, lamb) # (dL, phi, lamb)
+spec_dB = spec.dB().values
+fsr = spec.fsr().values
+extinction = spec.extinction().values
+for i, dL in enumerate(dL_list):
+	fsr_text = f"{fsr[i].mean()*1e9:.3f}nm" if not np.isnan(fsr[i]).any() else "< 2 minima in band"
+	print(f"[amzm] dL={dL*1e6:.0f}um, FSR={lib_amzm.fsr(dL)*1e9:.3f}nm (spectrum {fsr_text}), extinction {extinction[i].min():.1f}dB")
+
+# figures rendered headless in worker processes (formats: AIST_PLOT_FORMATS, ex. svg,png,pdf)
+plt.rcParams["font.size"] = 16
+lib_plot.render([(draw, (lamb, spec_dB[i], dL), f"amzm_T_dL{dL*1e6:.0f}um") for i, dL in enumerate(dL_list)], pdf="amzm_T.pdf")
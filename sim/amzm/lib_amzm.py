@@ -0,0 +1,91 @@
+# Vectorized transmittance of asymmetric MZM
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import numpy as np
+
+# Whole (dL x phi x wavelength) grid in one broadcast call:
+#
+#   spec = lib_amzm.transmittance(dL_list, phi_list, lamb)   # Spectrum, dims ("dL", "phi", "lamb")
+#   spec.sel(dL=100e-6, phi=0).values                        # (lamb,) nearest coordinates
+#   spec.dB()                                                # 10 log10(T), floored at T_FLOOR
+#   spec.fsr()                                               # (dL, phi) m, from the spacing of the minima
+#   spec.extinction()                                        # (dL, phi) dB, max - min over the wavelength
+#
+# Dispersion of the waveguide to first order around LAMBDA_0:
+#   n_eff(lamb) = N_EFF - (N_G - N_EFF) * (lamb - LAMBDA_0) / LAMBDA_0
+# so the phase difference of the arms is 2 pi n_eff(lamb) dL / lamb + phi and the FSR is lamb^2 / (N_G dL).
+
+LAMBDA_0 = 1550e-9 # m
+N_EFF = 2.44       # effective index of the Si strip waveguide at LAMBDA_0 (wg_width, 220 nm)
+N_G = 4.20         # group index at LAMBDA_0
+T_FLOOR = 1e-12    # -120 dB, for log10 of the ideal nulls
+
+def n_eff(lamb, n_eff_0=N_EFF, n_g=N_G):
+	return n_eff_0 - (n_g - n_eff_0) * (lamb - LAMBDA_0) / LAMBDA_0
+
+def fsr(dL, lamb=LAMBDA_0, n_g=N_G):
+	# analytic FSR, m
+	return lamb**2 / (n_g * np.asarray(dL))
+
+class Spectrum:
+	# minimal labeled array: values with one coordinate array per dimension
+	def __init__(self, values, dims, coords):
+		self.values = values
+		self.dims = tuple(dims)
+		self.coords = {dim: np.asarray(coords[dim]) for dim in self.dims}
+		assert self.values.shape == tuple(len(self.coords[dim]) for dim in self.dims)
+
+	def __repr__(self):
+		return f"Spectrum({', '.join(f'{dim}: {len(self.coords[dim])}' for dim in self.dims)})"
+
+	@property
+	def shape(self):
+		return self.values.shape
+
+	def axis(self, dim):
+		return self.dims.index(dim)
+
+	def sel(self, **kwargs):
+		# nearest coordinate for each given dimension, the dimension is dropped
+		index = [slice(None)] * len(self.dims)
+		for dim, value in kwargs.items():
+			index[self.axis(dim)] = int(np.abs(self.coords[dim] - value).argmin())
+		dims = [dim for dim in self.dims if dim not in kwargs]
+		return Spectrum(self.values[tuple(index)], dims, {dim: self.coords[dim] for dim in dims})
+
+	def dB(self):
+		return Spectrum(10 * np.log10(np.maximum(self.values, T_FLOOR)), self.dims, self.coords)
+
+	def fsr(self, dim="lamb"):
+		# mean spacing of the local minima along dim, nan with less than two minima
+		y = np.moveaxis(self.values, self.axis(dim), -1)
+		x = self.coords[dim]
+		is_min = (y[..., 1:-1] < y[..., :-2]) & (y[..., 1:-1] <= y[..., 2:])
+		count = is_min.sum(axis=-1)
+		first = is_min.argmax(axis=-1)
+		last = is_min.shape[-1] - 1 - is_min[..., ::-1].argmax(axis=-1)
+		with np.errstate(invalid="ignore", divide="ignore"):
+			ret = np.where(count >= 2, (x[last + 1] - x[first + 1]) / (count - 1), np.nan)
+		dims = [d for d in self.dims if d != dim]
+		return Spectrum(ret, dims, {d: self.coords[d] for d in dims})
+
+	def extinction(self, dim="lamb"):
+		# dB, max - min along dim
+		y = self.dB().values
+		ret = y.max(axis=self.axis(dim)) - y.min(axis=self.axis(dim))
+		dims = [d for d in self.dims if d != dim]
+		return Spectrum(ret, dims, {d: self.coords[d] for d in dims})
+
+def field(lamb, dL, phi, n_eff_0=N_EFF, n_g=N_G):
+	# output field of the bar port, broadcast over lamb, dL and phi
+	branch1 = 1/np.sqrt(2) # reference path
+	branch2 = 1/np.sqrt(2) * np.exp(1j*2*np.pi*n_eff(lamb, n_eff_0, n_g)*dL/lamb + 1j*phi)
+	return 1/np.sqrt(2) * (branch1 + branch2)
+
+def transmittance(dL_list, phi_list, lamb, n_eff_0=N_EFF, n_g=N_G):
+	dL = np.asarray(dL_list, dtype=float)[:, None, None]
+	phi = np.asarray(phi_list, dtype=float)[None, :, None]
+	lamb = np.asarray(lamb, dtype=float)
+	T = np.abs(field(lamb[None, None, :], dL, phi, n_eff_0, n_g)) ** 2
+	return Spectrum(T, ("dL", "phi", "lamb"), {"dL": dL[:, 0, 0], "phi": phi[0, :, 0], "lamb": lamb})
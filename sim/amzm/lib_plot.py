@@ -0,0 +1,72 @@
+# Headless plot rendering of simulation outputs
+# created on: 2026/10/18
+# last change: 2026/10/18
+
+import os
+import multiprocessing
+import concurrent.futures
+import matplotlib
+matplotlib.use("Agg") # no display needed
+matplotlib.rcParams["svg.hashsalt"] = "AIST2025" # fixed element ids, so that unchanged figures give the same files
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+# Each figure is drawn by a function draw(fig, *args) on a new figure:
+#
+#   jobs = [(draw, (lamb, T, dL), f"amzm_T_dL{dL*1e6:.0f}um") for ...]
+#   lib_plot.render(jobs, formats=["png", "pdf"], pdf="amzm_T.pdf")
+#
+#   svg, png: one file per figure ({basename}.{format}), rendered in worker processes
+#             (AIST_PLOT_JOBS, default: number of cores; forked, so draw may be defined in the script;
+#             serial where fork is not available)
+#   pdf:      all figures as the pages of one file, in the order of jobs
+# Formats default to AIST_PLOT_FORMATS (comma separated, default: svg).
+
+PLOT_JOBS = int(os.environ.get("AIST_PLOT_JOBS", os.cpu_count() or 1))
+PLOT_FORMATS = os.environ.get("AIST_PLOT_FORMATS", "svg").split(",")
+PLOT_FIGSIZE = (12, 6) # inch
+PLOT_DPI = 100         # png
+PLOT_METADATA = {"svg": {"Date": None}, "pdf": {"CreationDate": None}} # no time stamps in the files
+
+def figure(draw, args):
+	fig = plt.figure(figsize=PLOT_FIGSIZE)
+	draw(fig, *args)
+	return fig
+
+def render_files(draw, args, basename, formats):
+	fig = figure(draw, args)
+	ret = []
+	for fmt in formats:
+		filename = f"{basename}.{fmt}"
+		fig.savefig(filename, dpi=PLOT_DPI, metadata=PLOT_METADATA.get(fmt))
+		ret.append(filename)
+	# free used memory
+	plt.close(fig)
+	return ret
+
+def render(jobs, formats=None, pdf=None, jobs_num=None):
+	formats = PLOT_FORMATS if formats is None else formats
+	jobs_num = PLOT_JOBS if jobs_num is None else jobs_num
+	file_formats = [fmt for fmt in formats if fmt != "pdf"]
+	ret = []
+	if file_formats and jobs:
+		if jobs_num > 1 and len(jobs) > 1 and "fork" in multiprocessing.get_all_start_methods():
+			context = multiprocessing.get_context("fork")
+			with concurrent.futures.ProcessPoolExecutor(min(jobs_num, len(jobs)), mp_context=context) as pool:
+				futures = [pool.submit(render_files, draw, args, basename, file_formats) for draw, args, basename in jobs]
+				for future in futures:
+					ret += future.result()
+		else:
+			for draw, args, basename in jobs:
+				ret += render_files(draw, args, basename, file_formats)
+	if "pdf" in formats:
+		assert pdf is not None, "render(): pdf file name needed for the pdf format"
+		with PdfPages(pdf, metadata=PLOT_METADATA["pdf"]) as pages:
+			for draw, args, _ in jobs:
+				fig = figure(draw, args)
+				pages.savefig(fig)
+				plt.close(fig)
+		ret.append(pdf)
+	for filename in ret:
+		print(f"[out] saved figure as '{filename}'")
+	return ret